@@ -7,6 +7,8 @@ from app.api.api_v1.endpoints import relations
 from app.api.api_v1.endpoints import content
 from app.api.api_v1.endpoints import process_audio
 from app.api.api_v1.endpoints import quiz
+from app.api.api_v1.endpoints import cache
+from app.api.api_v1.endpoints import ingest
 
 
 api_router = APIRouter()
@@ -18,3 +20,5 @@ api_router.include_router(relations.router, prefix="/relations", tags=["relation
 api_router.include_router(content.router, prefix="/content", tags=["content"])
 api_router.include_router(process_audio.router, prefix="/process_audio", tags=["process_audio"])
 api_router.include_router(quiz.router, prefix="/quiz", tags=["quiz"])
+api_router.include_router(cache.router, prefix="/cache", tags=["cache"])
+api_router.include_router(ingest.router, prefix="/ingest", tags=["ingest"])
@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+
+from app.services import entity_cache
+
+router = APIRouter()
+
+@router.get("/entities")
+def read_entity_cache_stats():
+    """
+    Hit ratio (for this worker) and memory use of the cache in front of single-row reads.
+    """
+    return {"backend": type(entity_cache.entity_cache).__name__, **entity_cache.entity_cache.stats()}
@@ -1,55 +1,65 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Response
+from typing import List, Optional
 
 from app import schemas
+from app.core.pagination import CREATED_ORDER, finish_page, page_limit, paginate
+from app.core.serialization import list_response
 from app.core.supabase import supabase
+from app.services.entity_cache import invalidate_entity, read_entity, store_entity
+from app.services.quiz_cache import invalidate_quiz_cache
+from app.services.quiz_jobs import enqueue_quiz_pregeneration
 
 router = APIRouter()
 
 @router.post("/", response_model=schemas.Content)
-def create_content(content: schemas.ContentCreate):
-    response = supabase.table("event_person_topics_content").insert(content.model_dump()).execute()
+async def create_content(content: schemas.ContentCreate):
+    response = await supabase.table("event_person_topics_content").insert(content.model_dump()).execute()
     if not response.data:
         raise HTTPException(status_code=400, detail="Content could not be created")
+    await invalidate_quiz_cache([row["user_friend_event_id"] for row in response.data if row.get("user_friend_event_id")])
     return response.data[0]
 
 @router.get("/", response_model=List[schemas.Content])
-def read_content(skip: int = 0, limit: int = 100):
-    response = supabase.table("event_person_topics_content").select("*").range(skip, skip + limit - 1).execute()
-    return response.data
+async def read_content(response: Response, cursor: Optional[str] = None, limit: int = page_limit()):
+    content_response = await paginate(supabase.table("event_person_topics_content").select("*"), CREATED_ORDER, cursor, limit).execute()
+    return list_response(schemas.Content, finish_page(response, content_response.data, CREATED_ORDER, limit), response)
 
 
 @router.get("/content/{user_friend_event_id}", response_model=List[schemas.Content])
-def read_content_by_user_friend_event(user_friend_event_id: int):
-    response = supabase.table("event_person_topics_content").select("*").eq("user_friend_event_id", user_friend_event_id).execute()
-    return response.data
+async def read_content_by_user_friend_event(user_friend_event_id: int):
+    response = await supabase.table("event_person_topics_content").select("*").eq("user_friend_event_id", user_friend_event_id).execute()
+    return list_response(schemas.Content, response.data)
 
 @router.get("/{content_id}", response_model=schemas.Content)
-def read_single_content(content_id: int):
-    response = supabase.table("event_person_topics_content").select("*").eq("id", content_id).execute()
-    if not response.data:
+async def read_single_content(content_id: int):
+    content = await read_entity("event_person_topics_content", content_id)
+    if content is None:
         raise HTTPException(status_code=404, detail="Content not found")
-    return response.data[0]
+    return content
 
 @router.put("/{content_id}", response_model=schemas.Content)
-def update_content(content_id: int, content_in: schemas.ContentUpdate):
+async def update_content(content_id: int, content_in: schemas.ContentUpdate):
     update_data = content_in.model_dump(exclude_unset=True)
     if not update_data:
         raise HTTPException(status_code=400, detail="No data provided to update")
-    response = supabase.table("event_person_topics_content").update(update_data).eq("id", content_id).execute()
+    response = await supabase.table("event_person_topics_content").update(update_data).eq("id", content_id).execute()
     if not response.data:
         raise HTTPException(status_code=404, detail="Content not found")
+    await store_entity("event_person_topics_content", response.data[0])
+    await invalidate_quiz_cache([row["user_friend_event_id"] for row in response.data if row.get("user_friend_event_id")])
     return response.data[0]
 
 @router.delete("/{content_id}", response_model=schemas.Content)
-def delete_content(content_id: int):
-    response = supabase.table("event_person_topics_content").delete().eq("id", content_id).execute()
+async def delete_content(content_id: int):
+    response = await supabase.table("event_person_topics_content").delete().eq("id", content_id).execute()
     if not response.data:
         raise HTTPException(status_code=404, detail="Content not found")
+    await invalidate_entity("event_person_topics_content", content_id)
+    await invalidate_quiz_cache([row["user_friend_event_id"] for row in response.data if row.get("user_friend_event_id")])
     return response.data[0]
 
 @router.post("/bulk", response_model=List[schemas.Content])
-def create_bulk_content(bulk_data: schemas.content.BulkContentCreate):
+async def create_bulk_content(bulk_data: schemas.content.BulkContentCreate):
     content_entries = []
     for topic_item in bulk_data.topics:
         content_entry = {
@@ -60,10 +70,13 @@ def create_bulk_content(bulk_data: schemas.content.BulkContentCreate):
         content_entries.append(content_entry)
     
     # Insert all entries at once
-    response = supabase.table("event_person_topics_content").insert(content_entries).execute()
+    response = await supabase.table("event_person_topics_content").insert(content_entries).execute()
     if not response.data:
         raise HTTPException(status_code=400, detail="Content could not be created")
     
+    # Build the pair's next quiz in the background so it is ready when opened
+    for user_id, friend_id in await invalidate_quiz_cache([bulk_data.user_friend_event_id]):
+        await enqueue_quiz_pregeneration(user_id, friend_id)
     return response.data
 
 
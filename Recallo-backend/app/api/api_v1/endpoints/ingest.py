@@ -0,0 +1,57 @@
+import logging
+from datetime import date
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Form, HTTPException, Response, UploadFile
+
+from app import schemas
+from app.core.timing import server_timing
+from app.services.audio_pipeline import check_audio_size
+from app.services.ingest import ingest_memory
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.post("/", response_model=schemas.IngestResponse)
+async def ingest(
+    response: Response,
+    audio: UploadFile,
+    user_id: UUID = Form(...),
+    friend_id: Optional[UUID] = Form(default=None),
+    friend_name: Optional[str] = Form(default=None),
+    event_id: Optional[UUID] = Form(default=None),
+    event_name: Optional[str] = Form(default=None),
+    event_date: Optional[date] = Form(default=None),
+    remarks: str = Form(default=""),
+):
+    """
+    Save a memory from a recording in one request.
+
+    Pass `friend_id` for an existing friend or `friend_name` to create one, and
+    `event_id` for an existing event or `event_name` (and `event_date`) to
+    create one. Per-stage timings are returned in `timings` and the
+    Server-Timing header.
+    """
+    check_audio_size(audio)
+
+    try:
+        result = await ingest_memory(
+            audio,
+            str(user_id),
+            remarks=remarks,
+            friend_id=str(friend_id) if friend_id else None,
+            friend_name=friend_name,
+            event_id=str(event_id) if event_id else None,
+            event_name=event_name,
+            event_date=event_date,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Ingest for user %s failed", user_id)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    response.headers["Server-Timing"] = server_timing(result["timings"])
+    return result
@@ -1,21 +1,18 @@
-import os
-import shutil
-import json
-import re # <-- Ensure re is imported early for clarity
-from dotenv import load_dotenv
+import asyncio
+import logging
+import time
 from fastapi import APIRouter, UploadFile, Form, HTTPException
-from deepgram import DeepgramClient
-from anthropic import Anthropic
+from fastapi.responses import StreamingResponse
 
-router = APIRouter()
-
-load_dotenv() 
+from app.core.metrics import AUDIO_FAILURES
+from app.core.sse import SSE_HEADERS, sse_event
+from app.services import audio_pipeline
+from app.services.audio_jobs import get_audio_job, submit_audio_job
+from app.services.audio_pipeline import analyze, check_audio_size, stream_analysis, transcribe
 
-deepgram_key = os.getenv("DEEPGRAM_API_KEY")
-deepgram = DeepgramClient(api_key=deepgram_key)
+logger = logging.getLogger(__name__)
 
-anthropic_key = os.getenv("ANTHROPIC_API_KEY")
-client = Anthropic(api_key=anthropic_key)
+router = APIRouter()
 
 
 @router.post("/")
@@ -24,126 +21,110 @@ async def process_audio(
     friend_name: str = Form(default="my friend"), 
     remarks: str = Form(default=""),
 ):
-    temp_filename = f"temp_{audio.filename}"
+    check_audio_size(audio)
 
     try:
-        # --- Save audio temporarily ---
-        with open(temp_filename, "wb") as buffer:
-            shutil.copyfileobj(audio.file, buffer)
-
-        with open(temp_filename, "rb") as f:
-            audio_bytes = f.read()
-
-        # --- Prepare Keyterms (omitted for brevity, same as original) ---
-        options = {
-            "model": "nova-3",
-            "smart_format": True,
-            "detect_language": True,
-        }
-        if remarks:
-            terms = [w for w in remarks.split() if len(w) > 4][:10]
-            if terms:
-                options["keyterm"] = terms
-
-        # --- Deepgram transcription (omitted for brevity, same as original) ---
-        dg_response = deepgram.listen.v1.media.transcribe_file(
-            request=audio_bytes,
-            **options
-        )
-
-        if (not dg_response.results or 
-            not dg_response.results.channels or 
-            not dg_response.results.channels[0].alternatives):
-             raise HTTPException(status_code=400, detail="No transcript generated from audio")
-
-        transcript = dg_response.results.channels[0].alternatives[0].transcript
-        if not transcript:
-            raise HTTPException(status_code=400, detail="Transcript was empty")
+        # --- Deepgram transcription, skipped when these bytes were already transcribed ---
+        transcript, _ = await transcribe(audio, remarks)
 
         # --- Claude analysis ---
-        name_for_prompt = friend_name if friend_name.strip() else "my friend"
-
-        system_prompt = (
-            "You are a helpful assistant analyzing a personal conversation transcript.\n"
-            "The goal is to summarize the speaker's activities and discussions in a **casual, diary-like style**.\n"
-            "The speaker is creating this summary for their own memory review. The friend's name is **{name_for_prompt}**.\n"
-            "--- GUIDELINES FOR CONTENT GENERATION ---\n"
-            "1. **Tone and Voice:** Use the first person (I/my, we/our) and maintain an informal, chatty tone.\n"
-            "2. **Language Handling:** Detect the language of the transcript automatically. Generate the summary in the same language as the transcript.\n"
-            "3. **Friend Reference (Crucial):** Never use 'you' in the generated summary content. Always refer to the friend by their actual name **{name_for_prompt}** or a descriptor like 'my friend' (or equivalent in the transcript's language).\n"
-            "4. **Perspective:** Write strictly from the speaker's point of view, detailing the events as the speaker experienced them. Adapt phrasing naturally to the transcript's language.\n"
-            "   - Example: 'I showed her my pet' → 'I showed **{name_for_prompt}** my pet' (or translated appropriately).\n"
-            "   - Example: '{name_for_prompt} told me X' → '**{name_for_prompt}** told me X' (or translated appropriately).\n"
-            "5. **Anonymity:** Replace sensitive names (other than {name_for_prompt}) with generic placeholders appropriate to the language (e.g., 'another friend', 'a relative').\n"
-            "6. **Output:** Extract the main topics or events discussed and return **JSON only**, using the following format.\n"
-            "--- JSON FORMAT ---\n"
-            "{\n"
-            "  \"topics\": [\n"
-            "    {\"topic\": \"string\", \"content\": \"string\"}\n"
-            "  ]\n"
-            "}\n"
-        )
-
-        ai_response = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=2000,
-            temperature=0,
-            system=system_prompt, 
-            messages=[
-                {
-                    "role": "user",
-                    "content": f"Transcript:\n{transcript}"
-                }
-            ]
-        )
-
-        if ai_response.stop_reason == "refusal" or not ai_response.content:
-            return {
-                "topics": [],
-                "warning": "Claude refused due to safety rules."
-            }
-
-        raw_output = ai_response.content[0].text.strip()
-
-        # 1. Remove code fences and optional 'json' tag
-        if "```" in raw_output:
-            parts = raw_output.split("```")
-            if len(parts) > 1:
-                raw_output = parts[1].strip()
-        if raw_output.lower().startswith("json"):
-            raw_output = raw_output[4:].strip()
+        return await analyze(transcript, friend_name)
 
-        try:
-            analyzed = json.loads(raw_output)
-        except Exception:
-             import re 
-             match = re.search(r"(\{.*\})", raw_output, re.DOTALL)
-             if match:
-                 # Attempt to parse the content captured by the regex group
-                 json_string = match.group(1).strip()
-                 try:
-                     analyzed = json.loads(json_string)
-                 except Exception:
-                     # If regex capture still fails, raise the original error
-                     raise HTTPException(
-                        status_code=500,
-                        detail=f"Claude did NOT return valid JSON after regex cleanup. Clean string was:\n{json_string}"
-                    )
-             else:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Claude did NOT return valid JSON. Raw output was:\n{raw_output}"
-                )
-        
-        return analyzed
-
-    except Exception as e:
-        print("Error:", e)
+    except HTTPException as e:
         # Ensure the raised HTTPException detail is not truncated/malformed
-        if isinstance(e, HTTPException):
-             raise e
+        logger.warning("Audio processing failed with %s: %s", e.status_code, e.detail)
+        AUDIO_FAILURES.labels("process_audio", str(e.status_code)).inc()
+        raise
+    except Exception as e:
+        logger.exception("Audio processing failed")
+        AUDIO_FAILURES.labels("process_audio", "500").inc()
         raise HTTPException(status_code=500, detail=str(e))
 
-    finally:
-        if os.path.exists(temp_filename):
-            os.remove(temp_filename)
\ No newline at end of file
+@router.post("/stream")
+async def process_audio_stream(
+    audio: UploadFile,
+    friend_name: str = Form(default="my friend"),
+    remarks: str = Form(default=""),
+):
+    """
+    Process audio as Server-Sent Events reporting each stage as it completes.
+
+    Events: `received` (bytes), `transcribed` (transcript, cached), one `topic`
+    per extracted topic, then `done` (topic count, per-stage timings) or `error`
+    (status_code and detail). Every event carries `elapsed_ms` since the request
+    reached the endpoint.
+    """
+    check_audio_size(audio)
+    started = time.perf_counter()
+
+    def elapsed_ms(since: float = started) -> float:
+        return round((time.perf_counter() - since) * 1000, 1)
+
+    async def events():
+        timings = {}
+        yield sse_event("received", {"bytes": audio.size, "elapsed_ms": elapsed_ms()})
+        try:
+            stage_started = time.perf_counter()
+            transcript, cached = await transcribe(audio, remarks)
+            timings["transcribe_ms"] = elapsed_ms(stage_started)
+            yield sse_event("transcribed", {"transcript": transcript, "cached": cached, "stage_ms": timings["transcribe_ms"], "elapsed_ms": elapsed_ms()})
+
+            stage_started = time.perf_counter()
+            count = 0
+            async for topic in stream_analysis(transcript, friend_name):
+                yield sse_event("topic", {"index": count, **topic, "elapsed_ms": elapsed_ms()})
+                count += 1
+            timings["analyze_ms"] = elapsed_ms(stage_started)
+        except HTTPException as e:
+            logger.warning("Streamed audio processing failed with %s: %s", e.status_code, e.detail)
+            AUDIO_FAILURES.labels("process_audio_stream", str(e.status_code)).inc()
+            yield sse_event("error", {"status_code": e.status_code, "detail": e.detail, "elapsed_ms": elapsed_ms()})
+            return
+        except asyncio.TimeoutError:
+            logger.warning("Streamed audio analysis timed out")
+            AUDIO_FAILURES.labels("process_audio_stream", "504").inc()
+            yield sse_event("error", {"status_code": 504, "detail": "Transcript analysis timed out", "elapsed_ms": elapsed_ms()})
+            return
+        except Exception as e:
+            logger.exception("Streamed audio processing failed")
+            AUDIO_FAILURES.labels("process_audio_stream", "500").inc()
+            yield sse_event("error", {"status_code": 500, "detail": str(e), "elapsed_ms": elapsed_ms()})
+            return
+        yield sse_event("done", {"topics": count, "timings": timings, "elapsed_ms": elapsed_ms()})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.post("/jobs", status_code=202)
+async def submit_process_audio_job(
+    audio: UploadFile,
+    friend_name: str = Form(default="my friend"),
+    remarks: str = Form(default=""),
+):
+    """
+    Queue the audio for background processing and return its job right away.
+
+    The job id is derived from the audio and form fields, so resubmitting the
+    same recording returns the same job (and its result once done).
+    """
+    check_audio_size(audio)
+    return await submit_audio_job(audio, friend_name, remarks)
+
+@router.get("/jobs/{job_id}")
+def read_process_audio_job(job_id: str):
+    """
+    Status of an audio processing job; `result` holds the transcript and topics once done
+    """
+    job = get_audio_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Audio job not found")
+    return job
+
+@router.get("/cache")
+def read_cache_stats():
+    """
+    Hit/miss counts (for this worker) and size of the transcript and analysis caches.
+    """
+    return {
+        "transcripts": audio_pipeline.transcript_cache.stats(),
+        "analysis": audio_pipeline.analysis_cache.stats(),
+    }
@@ -1,211 +1,142 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
-import anthropic
-import json
-import os
-from pydantic import BaseModel
+import asyncio
+from typing import Optional
 
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.responses import StreamingResponse
+
+from app import schemas
+from app.core.pagination import CREATED_ORDER, finish_page, page_limit, paginate
+from app.core.query_plan import QueryPlan
+from app.core.sse import SSE_HEADERS, sse_event
 from app.core.supabase import supabase
+from app.services.quiz_generator import generate_quiz_for_pair, prepare_quiz, stream_quiz_for_pair
+from app.services.quiz_jobs import quiz_jobs, quiz_job_key
 
 router = APIRouter()
 
-# Initialize Anthropic client
-client = anthropic.Anthropic(
-    api_key=os.getenv("ANTHROPIC_API_KEY")
-)
-
-class QuizRequest(BaseModel):
-    user_id: str
-    friend_id: str
-
-class QuizQuestion(BaseModel):
-    question: str
-    options: List[str]
-    correct_answer: int
-    topic: str
-    explanation: str
-
-class QuizResponse(BaseModel):
-    questions: List[QuizQuestion]
-    friend_name: str
-
-@router.post("/generate", response_model=QuizResponse)
-async def generate_quiz(quiz_request: QuizRequest):
+@router.post("/generate", response_model=schemas.QuizResponse)
+async def generate_quiz(quiz_request: schemas.QuizRequest):
     """
     Generate a quiz based on user-friend interactions
     """
     try:
-        # Get friend name
-        friend_response = supabase.table("friends").select("friend_name").eq("id", quiz_request.friend_id).single().execute()
-        if not friend_response.data:
-            raise HTTPException(status_code=404, detail="Friend not found")
-        friend_name = friend_response.data["friend_name"]
-        
-        # Get all user-friend-event relationships
-        relations_response = supabase.table("user_friends_events")\
-            .select("id, event_id")\
-            .eq("user_id", quiz_request.user_id)\
-            .eq("friend_id", quiz_request.friend_id)\
-            .execute()
-        
-        if not relations_response.data or len(relations_response.data) < 2:
-            raise HTTPException(status_code=400, detail="Not enough interactions with this friend")
-        
-        # Get all content for these relationships
-        relation_ids = [rel["id"] for rel in relations_response.data]
-        content_response = supabase.table("event_person_topics_content")\
-            .select("*")\
-            .in_("user_friend_event_id", relation_ids)\
-            .execute()
-        
-        if not content_response.data:
-            raise HTTPException(status_code=404, detail="No content found for this friend")
-        
-        # Get event details for context
-        event_ids = [rel["event_id"] for rel in relations_response.data]
-        events_response = supabase.table("events")\
-            .select("id, event_name, event_date")\
-            .in_("id", event_ids)\
-            .execute()
-        
-        events_dict = {event["id"]: event for event in events_response.data}
-        
-        # Prepare content for quiz generation
-        content_by_event = {}
-        for content in content_response.data:
-            # Find the event for this content
-            event_id = None
-            for rel in relations_response.data:
-                if rel["id"] == content["user_friend_event_id"]:
-                    event_id = rel["event_id"]
-                    break
-            
-            if event_id and event_id in events_dict:
-                event_name = events_dict[event_id]["event_name"]
-                if event_name not in content_by_event:
-                    content_by_event[event_name] = []
-                content_by_event[event_name].append({
-                    "topic": content["topic"],
-                    "content": content["content"]
-                })
-        
-        # Format content for the prompt
-        formatted_content = f"Friend: {friend_name}\n\n"
-        for event_name, topics in content_by_event.items():
-            formatted_content += f"Event: {event_name}\n"
-            for topic in topics:
-                formatted_content += f"  Topic: {topic['topic']}\n"
-                formatted_content += f"  Content: {topic['content']}\n\n"
-        
-        # Generate quiz using Claude
-        prompt = f"""Based on the following conversation records between a user and their friend {friend_name}, create a 10-question multiple choice quiz.
-
-{formatted_content}
-
-Create exactly 10 questions that test memory of qualitative details about conversations, events, and topics discussed. Focus on memorable details, personal information shared, opinions expressed, and specific topics discussed.
-
-Each question should:
-1. Be clear and specific
-2. Have 4 answer options (A, B, C, D)
-3. Have only one correct answer
-4. Test meaningful information rather than trivial details
-5. Include a mix of different topics and events
-
-Return the quiz in this exact JSON format:
-{{
-  "questions": [
-    {{
-      "question": "What did {friend_name} mention about...",
-      "options": ["Option A", "Option B", "Option C", "Option D"],
-      "correct_answer": 0,
-      "topic": "The main topic this question relates to",
-      "explanation": "Brief explanation of why this is the correct answer"
-    }}
-  ]
-}}
-
-The correct_answer should be the index (0-3) of the correct option.
-Make the questions engaging and focused on interesting details from the conversations."""
-
-        message = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=4000,
-            temperature=0.7,
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-        )
-        
-        # Parse the response
-        response_text = message.content[0].text
-        
-        # Extract JSON from the response
-        try:
-            # Find the JSON content
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            json_str = response_text[json_start:json_end]
-            quiz_data = json.loads(json_str)
-        except (json.JSONDecodeError, ValueError) as e:
-            raise HTTPException(status_code=500, detail=f"Failed to parse quiz response: {str(e)}")
-        
-        # Convert to response model
-        questions = []
-        for q in quiz_data["questions"]:
-            questions.append(QuizQuestion(
-                question=q["question"],
-                options=q["options"],
-                correct_answer=q["correct_answer"],
-                topic=q.get("topic", "General"),
-                explanation=q.get("explanation", "")
-            ))
-        
-        return QuizResponse(
-            questions=questions,
-            friend_name=friend_name
-        )
+        return await generate_quiz_for_pair(quiz_request.user_id, quiz_request.friend_id)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/content/{user_id}/{friend_id}")
-async def get_friend_content(user_id: str, friend_id: str):
+@router.post("/generate/stream")
+async def generate_quiz_stream(quiz_request: schemas.QuizRequest):
     """
-    Get all content for a specific user-friend combination
+    Generate a quiz as Server-Sent Events, one `question` event per finished question.
+
+    Events: `start` (friend_name), `question` (index and QuizQuestion), then
+    `done` (count) or `error` (status_code and detail).
     """
     try:
-        # Get all user-friend-event relationships
-        relations_response = supabase.table("user_friends_events")\
+        prepared = await prepare_quiz(quiz_request.user_id, quiz_request.friend_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def events():
+        yield sse_event("start", {"friend_name": prepared.friend_name})
+        count = 0
+        try:
+            async for question in stream_quiz_for_pair(prepared, quiz_request.user_id, quiz_request.friend_id):
+                yield sse_event("question", {"index": count, **question.model_dump()})
+                count += 1
+        except asyncio.TimeoutError:
+            yield sse_event("error", {"status_code": 504, "detail": "Quiz generation timed out"})
+            return
+        except Exception as e:
+            yield sse_event("error", {"status_code": 500, "detail": str(e)})
+            return
+        if count == 0:
+            yield sse_event("error", {"status_code": 500, "detail": "Failed to parse quiz response"})
+            return
+        yield sse_event("done", {"count": count})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.get("/content/{user_id}/{friend_id}")
+async def get_friend_content(user_id: str, friend_id: str, response: Response, cursor: Optional[str] = None, limit: int = page_limit()):
+    """
+    Get a page of content for a specific user-friend combination, oldest first,
+    with the events and relations it belongs to.
+
+    Content is paged directly, with its user_friends_events row embedded; the
+    inner join keeps only the pair's content. The relations and events are then
+    read for that page alone, so each page costs the same however long the
+    pair's history is.
+
+    The next page's cursor is returned in the X-Next-Cursor header.
+    """
+    async def fetch_content():
+        content_query = supabase.table("event_person_topics_content")\
+            .select("*, user_friends_events!inner(event_id)")\
+            .eq("user_friends_events.user_id", user_id)\
+            .eq("user_friends_events.friend_id", friend_id)
+        content_response = await paginate(content_query, CREATED_ORDER, cursor, limit).execute()
+        return finish_page(response, content_response.data, CREATED_ORDER, limit)
+
+    async def fetch_relations(page):
+        relations_response = await supabase.table("user_friends_events")\
             .select("id, event_id")\
-            .eq("user_id", user_id)\
-            .eq("friend_id", friend_id)\
+            .in_("id", list({item["user_friend_event_id"] for item in page}))\
             .execute()
-        
-        if not relations_response.data:
-            return {"events": [], "content": []}
-        
-        # Get all content for these relationships
-        relation_ids = [rel["id"] for rel in relations_response.data]
-        content_response = supabase.table("event_person_topics_content")\
-            .select("*")\
-            .in_("user_friend_event_id", relation_ids)\
-            .execute()
-        
-        # Get event details
-        event_ids = [rel["event_id"] for rel in relations_response.data]
-        events_response = supabase.table("events")\
+        return relations_response.data
+
+    async def fetch_events(page):
+        events_response = await supabase.table("events")\
             .select("*")\
-            .in_("id", event_ids)\
+            .in_("id", list({item["user_friends_events"]["event_id"] for item in page}))\
             .execute()
-        
+        return events_response.data
+
+    try:
+        async with QueryPlan() as plan:
+            plan.add("content", fetch_content)
+            plan.add("relations", fetch_relations, after=["content"])
+            plan.add("events", fetch_events, after=["content"])
+
+            # Get a page of the pair's content
+            page = await plan.get("content")
+            if not page:
+                return {"events": [], "content": [], "relations": []}
+
+            # Get the page's relations and event details at once
+            relations, events = await plan.gather("relations", "events")
+
+        content = [{key: value for key, value in item.items() if key != "user_friends_events"} for item in page]
+
         return {
-            "events": events_response.data,
-            "content": content_response.data,
-            "relations": relations_response.data
+            "events": events,
+            "content": content,
+            "relations": relations
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/jobs")
+def read_quiz_jobs():
+    """
+    Number of quiz pre-generation jobs in each status
+    """
+    return quiz_jobs.counts()
+
+@router.get("/jobs/{user_id}/{friend_id}")
+def read_quiz_job(user_id: str, friend_id: str):
+    """
+    Status of the quiz pre-generation job for a user-friend combination
+    """
+    job = quiz_jobs.get(quiz_job_key(user_id, friend_id))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Quiz job not found")
+    return job
@@ -1,15 +1,55 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Response
+from typing import List, Optional, Sequence
 
 from app import schemas
+from app.core.pagination import CREATED_ORDER, finish_page, page_limit, paginate
+from app.core.serialization import list_response
 from app.core.supabase import supabase
+from pydantic import BaseModel
 from uuid import UUID
 
 router = APIRouter()
 
+async def upsert_relations(table: str, relations: Sequence[BaseModel], natural_key: Sequence[str]) -> list:
+    """
+    Insert relations in one statement, reusing rows that already exist for the same natural key.
+
+    Returns every requested row, new or existing, with its id, in request
+    order. Existing rows are returned as stored, never overwritten, so
+    optional columns left out of the request keep their values. Duplicates
+    within the request collapse into one row (the last one wins).
+    """
+    rows = {}
+    for relation in relations:
+        # mode="json" turns the UUIDs into strings in the same pass
+        row = relation.model_dump(mode="json")
+        rows[tuple(str(row[column]) for column in natural_key)] = row
+    if not rows:
+        return []
+
+    def key_of(row):
+        return tuple(str(row[column]) for column in natural_key)
+
+    # Ignoring duplicates returns just the inserted rows, so existing ones are read back after
+    response = await supabase.table(table)\
+        .upsert(list(rows.values()), on_conflict=",".join(natural_key), ignore_duplicates=True)\
+        .execute()
+    found = {key_of(row): row for row in response.data}
+    missing = [key for key in rows if key not in found]
+    if missing:
+        query = supabase.table(table).select("*")
+        for position, column in enumerate(natural_key):
+            query = query.in_(column, list({key[position] for key in missing}))
+        existing = await query.execute()
+        for row in existing.data:
+            found.setdefault(key_of(row), row)
+    if any(key not in found for key in rows):
+        raise HTTPException(status_code=400, detail="Relations could not be created")
+    return [found[key] for key in rows]
+
 # User Friends
 @router.post("/user-friends/", response_model=schemas.UserFriend)
-def create_user_friend(relation: schemas.UserFriendCreate):
+async def create_user_friend(relation: schemas.UserFriendCreate):
     # Convert Pydantic model to a dictionary
     relation_data = relation.model_dump()
     
@@ -19,20 +59,24 @@ def create_user_friend(relation: schemas.UserFriendCreate):
             relation_data[key] = str(value)
             
     # Now insert the dictionary with string UUIDs
-    response = supabase.table("user_friends").insert(relation_data).execute()
+    response = await supabase.table("user_friends").insert(relation_data).execute()
     
     if not response.data:
         raise HTTPException(status_code=400, detail="Relation could not be created")
     return response.data[0]
 
 @router.get("/user-friends/", response_model=List[schemas.UserFriend])
-def read_user_friends(skip: int = 0, limit: int = 100):
-    response = supabase.table("user_friends").select("*").range(skip, skip + limit - 1).execute()
-    return response.data
+async def read_user_friends(response: Response, cursor: Optional[str] = None, limit: int = page_limit()):
+    relations_response = await paginate(supabase.table("user_friends").select("*"), CREATED_ORDER, cursor, limit).execute()
+    return list_response(schemas.UserFriend, finish_page(response, relations_response.data, CREATED_ORDER, limit), response)
+
+@router.post("/user-friends/bulk", response_model=List[schemas.UserFriend])
+async def create_user_friends_bulk(relations: List[schemas.UserFriendCreate]):
+    return await upsert_relations("user_friends", relations, ("user_id", "friend_id"))
 
 # User Events
 @router.post("/user-events/", response_model=schemas.UserEvent)
-def create_user_event(relation: schemas.UserEventCreate):
+async def create_user_event(relation: schemas.UserEventCreate):
 
     # Convert Pydantic model to a dictionary
     relation_data = relation.model_dump()
@@ -43,19 +87,23 @@ def create_user_event(relation: schemas.UserEventCreate):
             relation_data[key] = str(value)
             
     # Now insert the dictionary with string UUIDs
-    response = supabase.table("user_events").insert(relation_data).execute()
+    response = await supabase.table("user_events").insert(relation_data).execute()
     if not response.data:
         raise HTTPException(status_code=400, detail="Relation could not be created")
     return response.data[0]
 
 @router.get("/user-events/", response_model=List[schemas.UserEvent])
-def read_user_events(skip: int = 0, limit: int = 100):
-    response = supabase.table("user_events").select("*").range(skip, skip + limit - 1).execute()
-    return response.data
+async def read_user_events(response: Response, cursor: Optional[str] = None, limit: int = page_limit()):
+    relations_response = await paginate(supabase.table("user_events").select("*"), CREATED_ORDER, cursor, limit).execute()
+    return list_response(schemas.UserEvent, finish_page(response, relations_response.data, CREATED_ORDER, limit), response)
+
+@router.post("/user-events/bulk", response_model=List[schemas.UserEvent])
+async def create_user_events_bulk(relations: List[schemas.UserEventCreate]):
+    return await upsert_relations("user_events", relations, ("user_id", "event_id"))
 
 # User Friends Events
 @router.post("/user-friends-events/", response_model=schemas.UserFriendsEvent)
-def create_user_friends_event(relation: schemas.UserFriendsEventCreate):
+async def create_user_friends_event(relation: schemas.UserFriendsEventCreate):
     # Convert Pydantic model to a dictionary
     relation_data = relation.model_dump()
     
@@ -65,19 +113,23 @@ def create_user_friends_event(relation: schemas.UserFriendsEventCreate):
             relation_data[key] = str(value)
             
     # Now insert the dictionary with string UUIDs
-    response = supabase.table("user_friends_events").insert(relation_data).execute()
+    response = await supabase.table("user_friends_events").insert(relation_data).execute()
     if not response.data:
         raise HTTPException(status_code=400, detail="Relation could not be created")
     return response.data[0]
 
 @router.get("/user-friends-events/", response_model=List[schemas.UserFriendsEvent])
-def read_user_friends_events(skip: int = 0, limit: int = 100):
-    response = supabase.table("user_friends_events").select("*").range(skip, skip + limit - 1).execute()
-    return response.data
+async def read_user_friends_events(response: Response, cursor: Optional[str] = None, limit: int = page_limit()):
+    relations_response = await paginate(supabase.table("user_friends_events").select("*"), CREATED_ORDER, cursor, limit).execute()
+    return list_response(schemas.UserFriendsEvent, finish_page(response, relations_response.data, CREATED_ORDER, limit), response)
+
+@router.post("/user-friends-events/bulk", response_model=List[schemas.UserFriendsEvent])
+async def create_user_friends_events_bulk(relations: List[schemas.UserFriendsEventCreate]):
+    return await upsert_relations("user_friends_events", relations, ("user_id", "friend_id", "event_id"))
 
 @router.get("/user-friends-events/{user_id}/{friend_id}/{event_id}", response_model=schemas.UserFriendsEvent)
-def get_user_friend_event_id(user_id: str, friend_id: str, event_id: str):
-    response = supabase.table("user_friends_events").select("*")\
+async def get_user_friend_event_id(user_id: str, friend_id: str, event_id: str):
+    response = await supabase.table("user_friends_events").select("*")\
         .eq("user_id", user_id)\
         .eq("friend_id", friend_id)\
         .eq("event_id", event_id)\
@@ -1,34 +1,53 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Response
+from typing import List, Optional
 from uuid import UUID
 
 from app import schemas
+from app.core.pagination import CREATED_ORDER, finish_page, page_limit, paginate
+from app.core.serialization import list_response
 from app.core.supabase import supabase
+from app.core.timing import server_timing
+from app.services.dashboard import build_dashboard
+from app.services.entity_cache import read_entity, store_entity
 
 router = APIRouter()
 
 @router.get("/", response_model=List[schemas.User])
-def read_users(skip: int = 0, limit: int = 100):
+async def read_users(response: Response, cursor: Optional[str] = None, limit: int = page_limit()):
     """
-    Retrieve users (profiles).
+    Retrieve users (profiles), oldest first.
+
+    The next page's cursor is returned in the X-Next-Cursor header.
     """
-    response = supabase.table("users").select("*").range(skip, skip + limit - 1).execute()
-    return response.data
+    users_response = await paginate(supabase.table("users").select("*"), CREATED_ORDER, cursor, limit).execute()
+    return list_response(schemas.User, finish_page(response, users_response.data, CREATED_ORDER, limit), response)
 
 @router.get("/{user_id}", response_model=schemas.User)
-def read_user(user_id: UUID):
+async def read_user(user_id: UUID):
     """
     Get a specific user profile.
     """
-    response = supabase.table("users").select("*").eq("id", str(user_id)).execute()
+    user = await read_entity("users", str(user_id))
     
-    if not response.data:
+    if user is None:
         raise HTTPException(status_code=404, detail="User not found")
         
-    return response.data[0]
+    return user
+
+@router.get("/{user_id}/dashboard", response_model=schemas.Dashboard)
+async def read_user_dashboard(user_id: UUID, response: Response):
+    """
+    Everything the home screen shows in one response: the profile, latest
+    events, friends, newest content and totals.
+
+    Per-section timings are reported in the Server-Timing header.
+    """
+    dashboard, timings = await build_dashboard(str(user_id))
+    response.headers["Server-Timing"] = server_timing(timings)
+    return dashboard
 
 @router.put("/{user_id}", response_model=schemas.User)
-def update_user(user_id: UUID, user_in: schemas.UserUpdate):
+async def update_user(user_id: UUID, user_in: schemas.UserUpdate):
     """
     Update a user profile.
     """
@@ -38,9 +57,10 @@ def update_user(user_id: UUID, user_in: schemas.UserUpdate):
     if not update_data:
         raise HTTPException(status_code=400, detail="No data provided to update")
 
-    response = supabase.table("users").update(update_data).eq("id", str(user_id)).execute()
+    response = await supabase.table("users").update(update_data).eq("id", str(user_id)).execute()
     
     if not response.data:
         raise HTTPException(status_code=404, detail="User not found")
         
+    await store_entity("users", response.data[0])
     return response.data[0]
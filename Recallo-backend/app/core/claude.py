@@ -0,0 +1,96 @@
+import asyncio
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import record_claude_usage, track_upstream
+
+if TYPE_CHECKING:
+    from anthropic import AsyncAnthropic
+
+_client: Optional["AsyncAnthropic"] = None
+
+
+def get_claude() -> "AsyncAnthropic":
+    """
+    The process-wide Claude client, created on first use.
+
+    The SDK is imported here rather than at module load, as it accounts for
+    most of the app's import time and is only needed once a request calls Claude.
+    """
+    global _client
+    if _client is None:
+        from anthropic import AsyncAnthropic
+
+        _client = AsyncAnthropic(
+            api_key=settings.ANTHROPIC_API_KEY,
+            base_url=settings.ANTHROPIC_BASE_URL,
+            timeout=settings.ANTHROPIC_TIMEOUT,
+        )
+    return _client
+
+# Caps in-flight Claude calls per worker, independently of the API's own concurrency
+_semaphore = asyncio.Semaphore(settings.ANTHROPIC_MAX_CONCURRENCY)
+
+
+async def create_message(**kwargs):
+    """
+    Call the Claude messages API without blocking the event loop.
+
+    Waits for a free slot, then raises asyncio.TimeoutError if the call takes
+    longer than ANTHROPIC_TIMEOUT seconds.
+    """
+    async with _semaphore:
+        with track_upstream("anthropic", kwargs.get("model", "unknown")):
+            message = await asyncio.wait_for(
+                get_claude().messages.create(**kwargs),
+                timeout=settings.ANTHROPIC_TIMEOUT,
+            )
+        record_claude_usage(kwargs.get("model", "unknown"), getattr(message, "usage", None))
+        return message
+
+
+class StreamedMessage:
+    """
+    The text of a Claude response, iterated as it is generated.
+
+    Once iteration ends, `stop_reason` holds why Claude stopped ("end_turn" for
+    a complete answer, "max_tokens" when it was cut off, ...).
+    """
+
+    def __init__(self, kwargs: Dict[str, Any]):
+        self.kwargs = kwargs
+        self.stop_reason: Optional[str] = None
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._stream(**self.kwargs)
+
+    async def _stream(self, **kwargs) -> AsyncIterator[str]:
+        async with _semaphore:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + settings.ANTHROPIC_TIMEOUT
+            model = kwargs.get("model", "unknown")
+            with track_upstream("anthropic", model):
+                async with get_claude().messages.stream(**kwargs) as stream:
+                    text_stream = stream.text_stream.__aiter__()
+                    while True:
+                        remaining = deadline - loop.time()
+                        if remaining <= 0:
+                            raise asyncio.TimeoutError
+                        try:
+                            text = await asyncio.wait_for(text_stream.__anext__(), timeout=remaining)
+                        except StopAsyncIteration:
+                            break
+                        yield text
+                    final_message = await stream.get_final_message()
+            record_claude_usage(model, final_message.usage)
+            self.stop_reason = final_message.stop_reason
+
+
+def stream_message(**kwargs) -> StreamedMessage:
+    """
+    Stream the text of a Claude response as it is generated.
+
+    Holds a concurrency slot for the whole stream and raises asyncio.TimeoutError
+    once it has run for longer than ANTHROPIC_TIMEOUT seconds.
+    """
+    return StreamedMessage(kwargs)
@@ -1,14 +1,65 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field, AliasChoices
-from typing import List
+from typing import List, Optional
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Recallo Backend"
     API_V1_STR: str = "/api/v1"
     BACKEND_CORS_ORIGINS: List[str] = ["*"]
     
-    SUPABASE_URL: str = Field(validation_alias=AliasChoices("SUPABASE_URL", "REACT_APP_SUPABASE_URL"))
-    SUPABASE_KEY: str = Field(validation_alias=AliasChoices("SUPABASE_KEY", "REACT_APP_SUPABASE_ANON_KEY"))
+    # Checked when the app connects to Supabase, so the app can be imported without them
+    SUPABASE_URL: Optional[str] = Field(None, validation_alias=AliasChoices("SUPABASE_URL", "REACT_APP_SUPABASE_URL"))
+    SUPABASE_KEY: Optional[str] = Field(None, validation_alias=AliasChoices("SUPABASE_KEY", "REACT_APP_SUPABASE_ANON_KEY"))
+
+    # Supabase HTTP connection pool
+    SUPABASE_MAX_CONNECTIONS: int = 20
+    SUPABASE_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    SUPABASE_KEEPALIVE_EXPIRY: float = 30.0
+    SUPABASE_TIMEOUT: float = 10.0
+
+    # Largest page a list endpoint returns
+    MAX_PAGE_SIZE: int = 500
+
+    # List endpoints encode database rows directly with orjson instead of
+    # revalidating them against their response model
+    FAST_SERIALIZATION: bool = False
+
+    # Largest accepted audio upload, in bytes
+    MAX_AUDIO_UPLOAD_BYTES: int = 50 * 1024 * 1024
+
+    # Local persistent caches
+    CACHE_DIR: str = ".cache"
+    TRANSCRIPT_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    ANALYSIS_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    ANALYSIS_CACHE_TTL: float = 30 * 24 * 60 * 60
+    QUIZ_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
+    # Single users, friends, events and content rows: "memory" keeps them per
+    # worker, "sqlite" shares them between the workers on a host
+    ENTITY_CACHE_BACKEND: str = "memory"
+    ENTITY_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+    ENTITY_CACHE_TTL: float = 60.0
+
+    # Approximate token budget for the conversation records in a quiz prompt
+    QUIZ_CONTEXT_TOKEN_BUDGET: int = 6000
+
+    # Background workers per process that build quizzes after new content; 0 disables them
+    QUIZ_PREGENERATION_WORKERS: int = 2
+
+    # Background workers per process that run submitted audio jobs; 0 disables them
+    AUDIO_JOB_WORKERS: int = 2
+
+    # Upstream AI services: API keys, in-flight calls per worker and per-call timeout (seconds)
+    DEEPGRAM_API_KEY: Optional[str] = None
+    ANTHROPIC_API_KEY: Optional[str] = None
+    DEEPGRAM_MAX_CONCURRENCY: int = 4
+    DEEPGRAM_TIMEOUT: float = 120.0
+    ANTHROPIC_MAX_CONCURRENCY: int = 8
+    ANTHROPIC_TIMEOUT: float = 90.0
+
+    # Override the Deepgram and Anthropic API hosts, e.g. to point at local stand-ins
+    DEEPGRAM_BASE_URL: Optional[str] = None
+    ANTHROPIC_BASE_URL: Optional[str] = None
 
     class Config:
         case_sensitive = True
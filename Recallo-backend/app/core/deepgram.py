@@ -0,0 +1,56 @@
+import asyncio
+from typing import TYPE_CHECKING, Optional
+
+from app.core.config import settings
+from app.core.metrics import track_upstream
+
+if TYPE_CHECKING:
+    from deepgram import AsyncDeepgramClient, DeepgramClientEnvironment
+
+_client: Optional["AsyncDeepgramClient"] = None
+
+
+def deepgram_environment() -> "DeepgramClientEnvironment":
+    from deepgram import DeepgramClientEnvironment
+
+    if not settings.DEEPGRAM_BASE_URL:
+        return DeepgramClientEnvironment.PRODUCTION
+    base = settings.DEEPGRAM_BASE_URL.rstrip("/")
+    websocket = "ws" + base[len("http"):] if base.startswith("http") else base
+    return DeepgramClientEnvironment(base=base, production=websocket, agent=websocket, agent_rest=base)
+
+
+def get_deepgram() -> "AsyncDeepgramClient":
+    """
+    The process-wide Deepgram client, created (and the SDK imported) on first use.
+    """
+    global _client
+    if _client is None:
+        from deepgram import AsyncDeepgramClient
+
+        _client = AsyncDeepgramClient(api_key=settings.DEEPGRAM_API_KEY, environment=deepgram_environment())
+    return _client
+
+# Caps in-flight transcriptions per worker, independently of the API's own concurrency
+_semaphore = asyncio.Semaphore(settings.DEEPGRAM_MAX_CONCURRENCY)
+
+
+async def transcribe_file(audio, **options):
+    """
+    Transcribe pre-recorded audio with Deepgram without blocking the event loop.
+
+    `audio` is either bytes or an async iterator of chunks streamed as the body.
+
+    Waits for a free slot, then raises asyncio.TimeoutError if the call takes
+    longer than DEEPGRAM_TIMEOUT seconds.
+    """
+    if not isinstance(audio, (bytes, bytearray, memoryview)):
+        # A streamed body can only be sent once, so the SDK must not retry it
+        options.setdefault("request_options", {"max_retries": 0})
+
+    async with _semaphore:
+        with track_upstream("deepgram", options.get("model", "unknown")):
+            return await asyncio.wait_for(
+                get_deepgram().listen.v1.media.transcribe_file(request=audio, **options),
+                timeout=settings.DEEPGRAM_TIMEOUT,
+            )
@@ -0,0 +1,214 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class JobQueue:
+    """
+    Persistent job queue in a SQLite file, drained by a pool of asyncio workers.
+
+    Jobs are identified by a key. Enqueueing a key that is already queued
+    coalesces into the existing job; enqueueing one that is running marks it to
+    run once more when the current run ends. Several worker processes can share
+    the same file: claiming a job is a single atomic update, and jobs left
+    running by a dead process are picked up again after `stale_after` seconds.
+
+    Every call may wait on another process's write lock, so workers and async
+    code (aenqueue/asubmit/aget) run them on a worker thread.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        handler: JobHandler,
+        concurrency: int,
+        poll_interval: float = 1.0,
+        stale_after: float = 600.0,
+    ):
+        self.path = path
+        self.handler = handler
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "key TEXT PRIMARY KEY, payload TEXT NOT NULL, status TEXT NOT NULL, "
+                "rerun INTEGER NOT NULL DEFAULT 0, attempts INTEGER NOT NULL DEFAULT 0, "
+                "result TEXT, error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_updated_at ON jobs (status, updated_at)")
+            self._conn = conn
+        return self._conn
+
+    def enqueue(self, key: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        job = self._enqueue(key, payload)
+        self._wake()
+        return job
+
+    def _enqueue(self, key: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            # Right-hand sides see the existing row, so `status` is the status before this enqueue
+            conn.execute(
+                "INSERT INTO jobs (key, payload, status, created_at, updated_at) VALUES (:key, :payload, :queued, :now, :now) "
+                "ON CONFLICT (key) DO UPDATE SET "
+                "payload = excluded.payload, "
+                "rerun = CASE WHEN status = :running THEN 1 ELSE rerun END, "
+                "status = CASE WHEN status = :running THEN status ELSE :queued END, "
+                "error = CASE WHEN status = :running THEN error ELSE NULL END, "
+                "updated_at = CASE WHEN status IN (:queued, :running) THEN updated_at ELSE :now END",
+                {"key": key, "payload": json.dumps(payload), "queued": QUEUED, "running": RUNNING, "now": now},
+            )
+            return self._get(conn, key)
+
+    def submit(self, key: str, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Queue a job unless one with this key is already queued, running or done.
+
+        Only a failed job is retried. Returns the job and whether it was (re)queued.
+        """
+        job, queued = self._submit(key, payload)
+        if queued:
+            self._wake()
+        return job, queued
+
+    def _submit(self, key: str, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute(
+                "INSERT INTO jobs (key, payload, status, created_at, updated_at) VALUES (:key, :payload, :queued, :now, :now) "
+                "ON CONFLICT (key) DO UPDATE SET "
+                "payload = excluded.payload, status = :queued, error = NULL, updated_at = :now "
+                "WHERE status = :failed",
+                {"key": key, "payload": json.dumps(payload), "queued": QUEUED, "failed": FAILED, "now": now},
+            )
+            return self._get(conn, key), cursor.rowcount > 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._get(self._connect(), key)
+
+    async def aenqueue(self, key: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        job = await asyncio.to_thread(self._enqueue, key, payload)
+        self._wake()
+        return job
+
+    async def asubmit(self, key: str, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        job, queued = await asyncio.to_thread(self._submit, key, payload)
+        if queued:
+            self._wake()
+        return job, queued
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get, key)
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _get(self, conn: sqlite3.Connection, key: str) -> Optional[Dict[str, Any]]:
+        row = conn.execute("SELECT * FROM jobs WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        job["rerun"] = bool(job["rerun"])
+        return job
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._connect().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ? "
+                "WHERE key = ("
+                "SELECT key FROM jobs WHERE status = ? OR (status = ? AND updated_at < ?) "
+                "ORDER BY updated_at LIMIT 1"
+                ") RETURNING key, payload",
+                (RUNNING, now, QUEUED, RUNNING, now - self.stale_after),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"key": row["key"], "payload": json.loads(row["payload"])}
+
+    def _finish(self, key: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        status = FAILED if error is not None else DONE
+        with self._lock:
+            self._connect().execute(
+                "UPDATE jobs SET "
+                "status = CASE WHEN rerun = 1 THEN ? ELSE ? END, "
+                "rerun = 0, result = ?, error = ?, updated_at = ? WHERE key = ?",
+                (QUEUED, status, json.dumps(result) if result is not None else None, error, time.time(), key),
+            )
+
+    async def run_once(self) -> bool:
+        """
+        Claim and run a single job. Returns False when nothing was queued.
+        """
+        job = await asyncio.to_thread(self._claim)
+        if job is None:
+            return False
+        try:
+            result = await self.handler(job["payload"])
+        except Exception as e:
+            await asyncio.to_thread(self._finish, job["key"], error=getattr(e, "detail", None) or str(e) or type(e).__name__)
+        else:
+            await asyncio.to_thread(self._finish, job["key"], result=result)
+        return True
+
+    async def _work(self) -> None:
+        while True:
+            if await self.run_once():
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self) -> None:
+        if self._workers or self.concurrency <= 0:
+            return
+        self._wakeup = asyncio.Event()
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._wakeup = None
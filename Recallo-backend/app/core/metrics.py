@@ -0,0 +1,181 @@
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+import httpx
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+REQUEST_LATENCY = Histogram(
+    "recallo_http_request_duration_seconds",
+    "Time from receiving a request to sending the last byte of its response",
+    ["method", "route", "status"],
+)
+REQUEST_QUERIES = Histogram(
+    "recallo_http_request_supabase_queries",
+    "Supabase queries issued while handling one request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 4, 5, 8, 13, 21, 34, 55, 89),
+)
+LAST_REQUEST_QUERIES = Gauge(
+    "recallo_http_request_supabase_queries_last",
+    "Supabase queries issued by the most recent request to a route",
+    ["method", "route"],
+    multiprocess_mode="mostrecent",
+)
+UPSTREAM_CALLS = Counter(
+    "recallo_upstream_requests",
+    "Calls to upstream services by target (Supabase table, Deepgram model, Claude model) and outcome",
+    ["upstream", "target", "outcome"],
+)
+UPSTREAM_LATENCY = Histogram(
+    "recallo_upstream_request_duration_seconds",
+    "Latency of calls to upstream services",
+    ["upstream", "target"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+AUDIO_FAILURES = Counter(
+    "recallo_audio_processing_failures",
+    "Audio uploads that failed to process, by endpoint and the status code reported to the client",
+    ["endpoint", "status"],
+)
+CLAUDE_TOKENS = Counter(
+    "recallo_claude_tokens",
+    "Tokens reported in Claude usage, by model and kind (input, output, cache_read, cache_creation)",
+    ["model", "kind"],
+)
+
+
+class RequestStats:
+    def __init__(self, method: str = "", path: str = ""):
+        self.method = method
+        self.path = path
+        self.supabase_queries = 0
+
+
+# Stats of the request being handled; tasks started by the handler share the same object
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+class UpstreamCall:
+    def __init__(self):
+        self.outcome = "ok"
+
+
+@contextmanager
+def track_upstream(upstream: str, target: str) -> Iterator[UpstreamCall]:
+    """
+    Count and time one upstream call. Exceptions mark it failed; set `outcome` for other failures.
+    """
+    call = UpstreamCall()
+    started = time.perf_counter()
+    try:
+        yield call
+    except (asyncio.TimeoutError, httpx.TimeoutException):
+        call.outcome = "timeout"
+        raise
+    except BaseException:
+        call.outcome = "error"
+        raise
+    finally:
+        UPSTREAM_LATENCY.labels(upstream, target).observe(time.perf_counter() - started)
+        UPSTREAM_CALLS.labels(upstream, target, call.outcome).inc()
+
+
+def record_claude_usage(model: str, usage: Any) -> None:
+    if usage is None:
+        return
+    for kind, field in (
+        ("input", "input_tokens"),
+        ("output", "output_tokens"),
+        ("cache_read", "cache_read_input_tokens"),
+        ("cache_creation", "cache_creation_input_tokens"),
+    ):
+        tokens = getattr(usage, field, None)
+        if tokens:
+            CLAUDE_TOKENS.labels(model, kind).inc(tokens)
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport that reports every Supabase request as an upstream call and
+    adds it to the current request's query count.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        stats = current_request.get()
+        if stats is not None:
+            stats.supabase_queries += 1
+        with track_upstream("supabase", supabase_target(request.url.path)) as call:
+            response = await self._transport.handle_async_request(request)
+            if response.status_code >= 400:
+                call.outcome = "error"
+            return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def supabase_target(path: str) -> str:
+    # "/rest/v1/friends" -> "friends", "/rest/v1/rpc/fn" -> "rpc/fn", "/auth/v1/user" -> "auth"
+    parts = [part for part in path.split("/") if part]
+    if parts[:2] == ["rest", "v1"] and len(parts) > 2:
+        return "/".join(parts[2:4]) if parts[2] == "rpc" else parts[2]
+    return parts[0] if parts else "unknown"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency and Supabase query count per route.
+
+    Routes are labelled by their path template (`/api/v1/users/{user_id}`), so
+    label cardinality stays bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope["method"], scope["path"])
+        token = current_request.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            current_request.reset(token)
+            route = getattr(scope.get("route"), "path_format", None) or "unmatched"
+            method = scope["method"]
+            REQUEST_LATENCY.labels(method, route, str(status)).observe(time.perf_counter() - started)
+            REQUEST_QUERIES.labels(method, route).observe(stats.supabase_queries)
+            LAST_REQUEST_QUERIES.labels(method, route).set(stats.supabase_queries)
+
+
+def render_metrics() -> tuple:
+    """
+    Metrics in the Prometheus text format, and its content type.
+
+    With PROMETHEUS_MULTIPROC_DIR set, values are aggregated across worker processes.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
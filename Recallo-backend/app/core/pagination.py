@@ -0,0 +1,105 @@
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query, Response
+
+from app.core.config import settings
+
+# Response header carrying the cursor of the next page; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Insertion order, the default for plain list endpoints
+CREATED_ORDER = ("created_at", "id")
+
+
+def page_limit(default: int = 100) -> Any:
+    return Query(default=default, ge=1, le=settings.MAX_PAGE_SIZE)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def quote(value: Any) -> str:
+    # Values in a PostgREST logic tree are quoted so dots, colons and commas in timestamps survive
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def keyset_filter(columns: Sequence[str], values: Sequence[Any], desc: bool = False, nullable: bool = False) -> str:
+    """
+    PostgREST `or` filter matching rows after (`values`) in (`columns`) order.
+
+    `columns` is a sort column followed by a unique tie-breaker. With `nullable`
+    the sort column may be null; null rows sort last.
+    """
+    column, tie_breaker = columns
+    value, tie_value = values
+    op = "lt" if desc else "gt"
+    if value is None:
+        return f"and({column}.is.null,{tie_breaker}.{op}.{quote(tie_value)})"
+    conditions = [
+        f"{column}.{op}.{quote(value)}",
+        f"and({column}.eq.{quote(value)},{tie_breaker}.{op}.{quote(tie_value)})",
+    ]
+    if nullable:
+        conditions.append(f"{column}.is.null")
+    return ",".join(conditions)
+
+
+def paginate(
+    query: Any,
+    columns: Sequence[str],
+    cursor: Optional[str],
+    limit: int,
+    desc: bool = False,
+    nullable: bool = False,
+) -> Any:
+    """
+    Restrict a select query to the page after `cursor`, in `columns` order.
+
+    One row more than `limit` is requested so `finish_page` can tell whether
+    another page follows without counting.
+    """
+    if cursor is not None:
+        query = query.or_(keyset_filter(columns, decode_cursor(cursor, len(columns)), desc, nullable))
+    column, tie_breaker = columns
+    return query\
+        .order(column, desc=desc, nullsfirst=False if nullable else None)\
+        .order(tie_breaker, desc=desc)\
+        .limit(limit + 1)
+
+
+def split_page(rows: List[Dict[str, Any]], columns: Sequence[str], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Trim the look-ahead row. Returns the page and the next page's cursor, if there is one.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor([rows[-1][column] for column in columns])
+
+
+def set_next_cursor(response: Response, cursor: Optional[str]) -> None:
+    if cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+
+
+def finish_page(response: Response, rows: List[Dict[str, Any]], columns: Sequence[str], limit: int) -> List[Dict[str, Any]]:
+    """
+    Trim the look-ahead row and, when there is one, set the next page's cursor header.
+    """
+    rows, cursor = split_page(rows, columns, limit)
+    set_next_cursor(response, cursor)
+    return rows
@@ -0,0 +1,94 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Sequence, Tuple
+
+Step = Callable[..., Awaitable[Any]]
+
+
+class QueryPlan:
+    """
+    Named async steps that run as soon as the steps they depend on are done.
+
+    A step is started the first time it (or a step that depends on it) is
+    requested, and runs once; its result is shared by every later request.
+    Steps that do not depend on each other run concurrently, so a request
+    takes as long as its critical path rather than the sum of its queries.
+
+        async with QueryPlan() as plan:
+            plan.add("relations", fetch_relations)
+            plan.add("content", fetch_content, after=["relations"])
+            plan.add("events", fetch_events, after=["relations"])
+            plan.add("friend", fetch_friend)
+            content, events, friend = await plan.gather("content", "events", "friend")
+
+    A step is called with the results of its `after` steps, in order. Leaving
+    the block cancels steps that are still running, e.g. a prefetch made
+    unnecessary by an early return.
+    """
+
+    def __init__(self):
+        self._steps: Dict[str, Tuple[Step, Tuple[str, ...]]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.timings: Dict[str, float] = {}
+
+    def add(self, name: str, step: Step, after: Sequence[str] = ()) -> None:
+        # Dependencies must already be defined, which also rules out cycles
+        if name in self._steps:
+            raise ValueError(f"Step {name!r} is already defined")
+        missing = [dependency for dependency in after if dependency not in self._steps]
+        if missing:
+            raise ValueError(f"Step {name!r} depends on undefined steps {missing}")
+        self._steps[name] = (step, tuple(after))
+
+    def _task(self, name: str) -> asyncio.Task:
+        if name not in self._tasks:
+            step, after = self._steps[name]
+            dependencies = [self._task(dependency) for dependency in after]
+            self._tasks[name] = asyncio.ensure_future(self._run(name, step, dependencies))
+        return self._tasks[name]
+
+    async def _run(self, name: str, step: Step, dependencies: List[asyncio.Task]) -> Any:
+        results = [await dependency for dependency in dependencies]
+        started = time.perf_counter()
+        try:
+            return await step(*results)
+        finally:
+            self.timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
+    def start(self, *names: str) -> None:
+        """
+        Start these steps in the background without waiting for them.
+        """
+        for name in names:
+            self._task(name)
+
+    async def get(self, name: str) -> Any:
+        return await self._task(name)
+
+    async def gather(self, *names: str) -> List[Any]:
+        return list(await asyncio.gather(*(self._task(name) for name in names)))
+
+    async def settle(self) -> None:
+        """
+        Wait for every started step to finish, successfully or not, without cancelling any.
+
+        Steps that write use this after a failure: a write already sent may be
+        committed even if cancelling it would discard the response.
+        """
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def close(self) -> None:
+        pending = [task for task in self._tasks.values() if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        # Failures nobody awaited are expected here (e.g. after an early error); mark them seen
+        for task in self._tasks.values():
+            if not task.cancelled():
+                task.exception()
+
+    async def __aenter__(self) -> "QueryPlan":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
@@ -0,0 +1,72 @@
+import json
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Type
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:  # the fast path still works, with the stdlib encoder
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@lru_cache(maxsize=None)
+def model_fields(model: Type[BaseModel]) -> Tuple[Tuple[Tuple[str, Any], ...], FrozenSet[str]]:
+    """
+    The model's optional fields with their defaults, and its required field names.
+    """
+    optional = tuple(
+        (name, field.get_default(call_default_factory=True))
+        for name, field in model.model_fields.items()
+        if not field.is_required()
+    )
+    required = frozenset(name for name, field in model.model_fields.items() if field.is_required())
+    return optional, required
+
+
+def project(model: Type[BaseModel], row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Trim a database row to the fields `model` returns, filling in defaults.
+
+    Rows missing a required field are validated as usual, so they fail the same way.
+    """
+    optional, required = model_fields(model)
+    if not required.issubset(row):
+        return model.model_validate(row).model_dump(mode="json")
+    projected = {name: row[name] for name in required}
+    for name, default in optional:
+        projected[name] = row.get(name, default)
+    return projected
+
+
+def list_response(model: Type[BaseModel], rows: List[Dict[str, Any]], response: Optional[Response] = None) -> Any:
+    """
+    Return a list endpoint's rows, encoded directly when FAST_SERIALIZATION is on.
+
+    By default rows go through the route's response_model like any other
+    return value. The fast path trusts rows read from the database: it keeps
+    the model's fields without revalidating them and encodes with orjson, so
+    values are sent as stored (e.g. timestamps keep Postgres' formatting).
+    Headers set on `response`, such as the next-page cursor, are kept.
+    """
+    if not settings.FAST_SERIALIZATION:
+        return rows
+    fast = FastJSONResponse([project(model, row) for row in rows])
+    if response is not None:
+        fast.headers.raw.extend(response.headers.raw)
+    return fast
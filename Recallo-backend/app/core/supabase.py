@@ -1,4 +1,83 @@
-from supabase import create_client, Client
+import logging
+from typing import TYPE_CHECKING, Optional
+
+import httpx
+
 from app.core.config import settings
+from app.core.metrics import InstrumentedTransport
+
+if TYPE_CHECKING:
+    from postgrest import AsyncRequestBuilder
+    from supabase import AsyncClient
+
+logger = logging.getLogger(__name__)
+
+
+class SupabasePool:
+    """
+    Process-wide async Supabase client on top of a pooled, keep-alive HTTP client.
+
+    Opened by the application lifespan when credentials are set, and otherwise
+    on the first query, as the Claude and Deepgram clients are. Endpoints import
+    the shared `supabase` instance and await queries:
+    `await supabase.table(...).execute()`.
+    """
+
+    def __init__(self):
+        self._http: Optional[httpx.AsyncClient] = None
+        self._client: Optional["AsyncClient"] = None
+
+    async def connect(self) -> None:
+        if self._client is not None:
+            return
+        if not settings.SUPABASE_URL or not settings.SUPABASE_KEY:
+            # Serve what does not need the database, e.g. the debug server or tests
+            logger.warning("SUPABASE_URL and SUPABASE_KEY are not set; Supabase queries will fail")
+            return
+        self._open()
+
+    def _open(self) -> None:
+        if not settings.SUPABASE_URL or not settings.SUPABASE_KEY:
+            raise RuntimeError("SUPABASE_URL and SUPABASE_KEY must be set to query Supabase")
+        # Imported here so importing the app does not pay for the SDK
+        from supabase import AsyncClient, AsyncClientOptions
+
+        # Pool limits and HTTP/2 live on the transport, which is wrapped to record metrics
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY,
+            ),
+            http2=True,
+        )
+        self._http = httpx.AsyncClient(
+            transport=InstrumentedTransport(transport),
+            timeout=settings.SUPABASE_TIMEOUT,
+            follow_redirects=True,
+        )
+        # The constructor sets the key's auth headers; acreate_client would only
+        # add a stored user session, which a server-side client never has
+        self._client = AsyncClient(
+            settings.SUPABASE_URL,
+            settings.SUPABASE_KEY,
+            options=AsyncClientOptions(httpx_client=self._http),
+        )
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+        self._http = None
+        self._client = None
+
+    @property
+    def client(self) -> "AsyncClient":
+        if self._client is None:
+            self._open()
+        return self._client
+
+    def table(self, table_name: str) -> "AsyncRequestBuilder":
+        return self.client.table(table_name)
+
 
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+supabase = SupabasePool()
@@ -0,0 +1,20 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+
+@contextmanager
+def timed(timings: Dict[str, float], name: str) -> Iterator[None]:
+    """
+    Record how long the block took, in milliseconds, as `timings[name]`.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
+
+def server_timing(timings: Dict[str, float]) -> str:
+    # Server-Timing header value, shown per request by browser dev tools
+    return ", ".join(f"{name};dur={duration}" for name, duration in timings.items())
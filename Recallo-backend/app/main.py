@@ -1,12 +1,31 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.supabase import supabase
+from app.services.audio_jobs import audio_jobs
+from app.services.quiz_jobs import quiz_jobs
 from app.api.api_v1.api import api_router
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the pooled Supabase client once per process
+    await supabase.connect()
+    await quiz_jobs.start()
+    await audio_jobs.start()
+    yield
+    await audio_jobs.stop()
+    await quiz_jobs.stop()
+    await supabase.close()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 # Set all CORS enabled origins
@@ -17,10 +36,19 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, "Server-Timing"],
     )
 
+# Per-route latency and Supabase query counts, exposed at /metrics
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
 @app.get("/")
 def root():
     return {"message": "Welcome to Recallo Backend"}
@@ -4,3 +4,6 @@ from .friend import Friend, FriendCreate, FriendUpdate
 from .event import Event, EventCreate, EventUpdate
 from .relations import UserEvent, UserEventCreate, UserFriend, UserFriendCreate, UserFriendsEvent, UserFriendsEventCreate
 from .content import Content, ContentCreate, ContentUpdate
+from .quiz import QuizRequest, QuizQuestion, QuizResponse
+from .dashboard import Dashboard, DashboardStats
+from .ingest import IngestResponse
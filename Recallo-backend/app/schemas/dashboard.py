@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+from .user import User
+from .friend import Friend
+from .event import Event
+from .content import Content
+
+class DashboardStats(BaseModel):
+    friend_count: int
+    event_count: int
+    content_count: int
+
+class Dashboard(BaseModel):
+    user: User
+    events: List[Event]
+    events_next_cursor: Optional[str] = None
+    friends: List[Friend]
+    friends_next_cursor: Optional[str] = None
+    recent_content: List[Content]
+    stats: DashboardStats
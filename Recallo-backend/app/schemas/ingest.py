@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from uuid import UUID
+from typing import Dict, List
+
+from .content import Content
+
+class IngestResponse(BaseModel):
+    transcript: str
+    friend_id: UUID
+    event_id: UUID
+    user_friend_event_id: int
+    content: List[Content]
+    # Milliseconds per stage: transcribe, analyze, relations, content and total
+    timings: Dict[str, float]
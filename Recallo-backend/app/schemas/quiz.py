@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from typing import List
+
+class QuizRequest(BaseModel):
+    user_id: str
+    friend_id: str
+
+class QuizQuestion(BaseModel):
+    question: str
+    options: List[str]
+    correct_answer: int
+    topic: str
+    explanation: str
+
+class QuizResponse(BaseModel):
+    questions: List[QuizQuestion]
+    friend_name: str
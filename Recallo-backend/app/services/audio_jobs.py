@@ -0,0 +1,102 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import UploadFile
+
+from app.core.config import settings
+from app.core.jobs import DONE, JobQueue
+from app.services.audio_pipeline import analyze, iter_audio, transcribe, transcription_options
+
+# Uploads waiting for a worker, named by job id; removed once their job has run
+AUDIO_SPOOL_DIR = os.path.join(settings.CACHE_DIR, "audio_jobs")
+
+
+async def process_audio_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    audio_path = payload["audio_path"]
+    try:
+        with open(audio_path, "rb") as f:
+            audio = UploadFile(f, size=os.path.getsize(audio_path))
+            transcript, _ = await transcribe(audio, payload["remarks"])
+        analyzed = await analyze(transcript, payload["friend_name"])
+    finally:
+        remove_spooled_audio(audio_path)
+    return {"transcript": transcript, **analyzed}
+
+
+# Submitted recordings, transcribed and analyzed by `AUDIO_JOB_WORKERS` workers per process
+audio_jobs = JobQueue(
+    os.path.join(settings.CACHE_DIR, "audio_jobs.sqlite3"),
+    handler=process_audio_job,
+    concurrency=settings.AUDIO_JOB_WORKERS,
+)
+
+
+def remove_spooled_audio(audio_path: str) -> None:
+    try:
+        os.remove(audio_path)
+    except FileNotFoundError:
+        pass
+
+
+async def spool_audio(audio: UploadFile, inputs: Any) -> Tuple[str, str]:
+    """
+    Copy the upload into the spool directory, hashing it on the way.
+
+    Returns the job id, a hash of `inputs` and the audio bytes, and the path of the copy.
+    """
+    os.makedirs(AUDIO_SPOOL_DIR, exist_ok=True)
+    digest = hashlib.sha256(json.dumps(inputs, sort_keys=True).encode("utf-8"))
+    fd, temp_path = tempfile.mkstemp(dir=AUDIO_SPOOL_DIR, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for chunk in iter_audio(audio):
+                digest.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+    except BaseException:
+        remove_spooled_audio(temp_path)
+        raise
+    job_id = digest.hexdigest()
+    audio_path = os.path.join(AUDIO_SPOOL_DIR, job_id)
+    os.replace(temp_path, audio_path)
+    return job_id, audio_path
+
+
+def describe_audio_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": job["key"],
+        "status": job["status"],
+        "result": job["result"],
+        "error": job["error"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+
+
+async def submit_audio_job(audio: UploadFile, friend_name: str, remarks: str) -> Dict[str, Any]:
+    """
+    Queue the recording for processing, keyed by its content and parameters.
+
+    Submitting the same audio with the same friend name and remarks returns the
+    existing job, so a client retrying after a dropped connection pays nothing.
+    Only a failed job is run again.
+    """
+    options = transcription_options(remarks)
+    job_id, audio_path = await spool_audio(audio, [options, friend_name])
+    job, queued = await audio_jobs.asubmit(job_id, {
+        "audio_path": audio_path,
+        "friend_name": friend_name,
+        "remarks": remarks,
+    })
+    if not queued and job["status"] == DONE:
+        remove_spooled_audio(audio_path)
+    return describe_audio_job(job)
+
+
+def get_audio_job(job_id: str) -> Optional[Dict[str, Any]]:
+    job = audio_jobs.get(job_id)
+    return describe_audio_job(job) if job is not None else None
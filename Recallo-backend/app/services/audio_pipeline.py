@@ -0,0 +1,250 @@
+import os
+import json
+import asyncio
+import hashlib
+import re
+from typing import Any, AsyncIterator, Dict, Tuple
+
+from fastapi import UploadFile, HTTPException
+
+from app.core.config import settings
+from app.core.cache import SQLiteCache
+from app.core.deepgram import transcribe_file
+from app.core.claude import create_message, stream_message
+from app.services.json_stream import ArrayItemStreamParser
+
+AUDIO_CHUNK_SIZE = 64 * 1024
+
+ANALYSIS_MODEL = "claude-sonnet-4-5-20250929"
+# Bump whenever the analysis prompt changes so cached topics from the old prompt are not reused
+ANALYSIS_PROMPT_VERSION = 1
+
+# Transcripts keyed by a hash of the audio bytes and transcription options
+transcript_cache = SQLiteCache(
+    os.path.join(settings.CACHE_DIR, "transcripts.sqlite3"),
+    max_bytes=settings.TRANSCRIPT_CACHE_MAX_BYTES,
+)
+
+# Extracted topics keyed by a hash of transcript, friend name, model and prompt
+analysis_cache = SQLiteCache(
+    os.path.join(settings.CACHE_DIR, "analysis.sqlite3"),
+    max_bytes=settings.ANALYSIS_CACHE_MAX_BYTES,
+    ttl=settings.ANALYSIS_CACHE_TTL,
+)
+
+
+def check_audio_size(audio: UploadFile) -> None:
+    # Rejects oversized uploads up front when the client sent a size; iter_audio enforces it regardless
+    if audio.size is not None and audio.size > settings.MAX_AUDIO_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="Audio file is too large")
+
+
+async def iter_audio(audio: UploadFile) -> AsyncIterator[bytes]:
+    """
+    Stream the spooled upload in fixed-size chunks, enforcing the size cap.
+
+    Only one chunk is held in memory at a time, whatever the recording length.
+    """
+    await audio.seek(0)
+    total = 0
+    while chunk := await audio.read(AUDIO_CHUNK_SIZE):
+        total += len(chunk)
+        if total > settings.MAX_AUDIO_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail="Audio file is too large")
+        yield chunk
+
+
+async def transcript_cache_key(audio: UploadFile, options: dict) -> str:
+    """
+    Hash the audio content together with the Deepgram options (model, keyterms, ...).
+    """
+    digest = hashlib.sha256(json.dumps(options, sort_keys=True).encode("utf-8"))
+    async for chunk in iter_audio(audio):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def analysis_cache_key(transcript: str, friend_name: str, system_prompt: str) -> str:
+    """
+    Hash every input that determines Claude's (temperature 0) topic extraction.
+    """
+    inputs = [ANALYSIS_PROMPT_VERSION, ANALYSIS_MODEL, system_prompt, friend_name, transcript]
+    return hashlib.sha256(json.dumps(inputs).encode("utf-8")).hexdigest()
+
+
+def transcription_options(remarks: str) -> Dict[str, Any]:
+    options = {
+        "model": "nova-3",
+        "smart_format": True,
+        "detect_language": True,
+    }
+    # Long words from the remarks help Deepgram with names and rare terms
+    if remarks:
+        terms = [w for w in remarks.split() if len(w) > 4][:10]
+        if terms:
+            options["keyterm"] = terms
+    return options
+
+
+async def transcribe(audio: UploadFile, remarks: str = "") -> Tuple[str, bool]:
+    """
+    Transcribe the audio with Deepgram unless these bytes were already transcribed.
+
+    Returns the transcript and whether it came from the cache.
+    """
+    options = transcription_options(remarks)
+    cache_key = await transcript_cache_key(audio, options)
+    transcript = await transcript_cache.aget(cache_key)
+    if transcript is not None:
+        return transcript, True
+
+    try:
+        dg_response = await transcribe_file(iter_audio(audio), **options)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Transcription timed out")
+
+    if (not dg_response.results or 
+        not dg_response.results.channels or 
+        not dg_response.results.channels[0].alternatives):
+         raise HTTPException(status_code=400, detail="No transcript generated from audio")
+
+    transcript = dg_response.results.channels[0].alternatives[0].transcript
+    if not transcript:
+        raise HTTPException(status_code=400, detail="Transcript was empty")
+
+    await transcript_cache.aset(cache_key, transcript)
+    return transcript, False
+
+
+def analysis_prompt(friend_name: str) -> Tuple[str, str]:
+    """
+    Returns the name used for the friend and the system prompt for topic extraction.
+    """
+    name_for_prompt = friend_name if friend_name.strip() else "my friend"
+
+    system_prompt = (
+        "You are a helpful assistant analyzing a personal conversation transcript.\n"
+        "The goal is to summarize the speaker's activities and discussions in a **casual, diary-like style**.\n"
+        "The speaker is creating this summary for their own memory review. The friend's name is **{name_for_prompt}**.\n"
+        "--- GUIDELINES FOR CONTENT GENERATION ---\n"
+        "1. **Tone and Voice:** Use the first person (I/my, we/our) and maintain an informal, chatty tone.\n"
+        "2. **Language Handling:** Detect the language of the transcript automatically. Generate the summary in the same language as the transcript.\n"
+        "3. **Friend Reference (Crucial):** Never use 'you' in the generated summary content. Always refer to the friend by their actual name **{name_for_prompt}** or a descriptor like 'my friend' (or equivalent in the transcript's language).\n"
+        "4. **Perspective:** Write strictly from the speaker's point of view, detailing the events as the speaker experienced them. Adapt phrasing naturally to the transcript's language.\n"
+        "   - Example: 'I showed her my pet' → 'I showed **{name_for_prompt}** my pet' (or translated appropriately).\n"
+        "   - Example: '{name_for_prompt} told me X' → '**{name_for_prompt}** told me X' (or translated appropriately).\n"
+        "5. **Anonymity:** Replace sensitive names (other than {name_for_prompt}) with generic placeholders appropriate to the language (e.g., 'another friend', 'a relative').\n"
+        "6. **Output:** Extract the main topics or events discussed and return **JSON only**, using the following format.\n"
+        "--- JSON FORMAT ---\n"
+        "{\n"
+        "  \"topics\": [\n"
+        "    {\"topic\": \"string\", \"content\": \"string\"}\n"
+        "  ]\n"
+        "}\n"
+    )
+    return name_for_prompt, system_prompt
+
+
+def analysis_message_params(transcript: str, system_prompt: str) -> Dict[str, Any]:
+    return {
+        "model": ANALYSIS_MODEL,
+        "max_tokens": 2000,
+        "temperature": 0,
+        "system": system_prompt,
+        "messages": [
+            {
+                "role": "user",
+                "content": f"Transcript:\n{transcript}"
+            }
+        ],
+    }
+
+
+async def analyze(transcript: str, friend_name: str) -> Dict[str, Any]:
+    """
+    Extract diary-style topics from a transcript with Claude, reusing cached results.
+    """
+    name_for_prompt, system_prompt = analysis_prompt(friend_name)
+
+    analysis_key = analysis_cache_key(transcript, name_for_prompt, system_prompt)
+    cached_analysis = await analysis_cache.aget(analysis_key)
+    if cached_analysis is not None:
+        return json.loads(cached_analysis)
+
+    try:
+        ai_response = await create_message(**analysis_message_params(transcript, system_prompt))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Transcript analysis timed out")
+
+    if ai_response.stop_reason == "refusal" or not ai_response.content:
+        return {
+            "topics": [],
+            "warning": "Claude refused due to safety rules."
+        }
+
+    raw_output = ai_response.content[0].text.strip()
+
+    # 1. Remove code fences and optional 'json' tag
+    if "```" in raw_output:
+        parts = raw_output.split("```")
+        if len(parts) > 1:
+            raw_output = parts[1].strip()
+    if raw_output.lower().startswith("json"):
+        raw_output = raw_output[4:].strip()
+
+    try:
+        analyzed = json.loads(raw_output)
+    except Exception:
+         match = re.search(r"(\{.*\})", raw_output, re.DOTALL)
+         if match:
+             # Attempt to parse the content captured by the regex group
+             json_string = match.group(1).strip()
+             try:
+                 analyzed = json.loads(json_string)
+             except Exception:
+                 # If regex capture still fails, raise the original error
+                 raise HTTPException(
+                    status_code=500,
+                    detail=f"Claude did NOT return valid JSON after regex cleanup. Clean string was:\n{json_string}"
+                )
+         else:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Claude did NOT return valid JSON. Raw output was:\n{raw_output}"
+            )
+
+    await analysis_cache.aset(analysis_key, json.dumps(analyzed))
+    return analyzed
+
+
+async def stream_analysis(transcript: str, friend_name: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield each extracted topic as soon as Claude has finished writing it.
+
+    Cached results are replayed. A stream is cached like `analyze` only when
+    Claude finished its answer and every topic in it was valid, never a list
+    cut off at max_tokens.
+    """
+    name_for_prompt, system_prompt = analysis_prompt(friend_name)
+
+    analysis_key = analysis_cache_key(transcript, name_for_prompt, system_prompt)
+    cached_analysis = await analysis_cache.aget(analysis_key)
+    if cached_analysis is not None:
+        for topic in json.loads(cached_analysis).get("topics", []):
+            yield topic
+        return
+
+    parser = ArrayItemStreamParser()
+    topics = []
+    dropped = 0
+    stream = stream_message(**analysis_message_params(transcript, system_prompt))
+    async for text in stream:
+        for topic in parser.feed(text):
+            if not isinstance(topic.get("topic"), str) or not isinstance(topic.get("content"), str):
+                dropped += 1
+                continue
+            topics.append(topic)
+            yield topic
+
+    if topics and stream.stop_reason == "end_turn" and not dropped and not parser.skipped:
+        await analysis_cache.aset(analysis_key, json.dumps({"topics": topics}))
@@ -0,0 +1,85 @@
+import time
+from typing import Any, Dict, List, Tuple
+
+from fastapi import HTTPException
+
+from app.core.query_plan import QueryPlan
+from app.core.supabase import supabase
+from app.services.entity_cache import read_entity
+from app.services.user_timeline import fetch_user_event_links, read_user_events_page, read_user_friends_page
+
+# Rows per section on the home screen; the list endpoints continue from the returned cursors
+DASHBOARD_EVENTS = 10
+DASHBOARD_FRIENDS = 20
+DASHBOARD_CONTENT = 10
+
+
+async def read_recent_content(links: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    The newest content across the user's relations, and how much content they have in total.
+    """
+    relation_ids = [link["id"] for link in links]
+    if not relation_ids:
+        return [], 0
+    content_response = await supabase.table("event_person_topics_content")\
+        .select("*", count="exact")\
+        .in_("user_friend_event_id", relation_ids)\
+        .order("created_at", desc=True)\
+        .order("id", desc=True)\
+        .limit(DASHBOARD_CONTENT)\
+        .execute()
+    count = content_response.count if content_response.count is not None else len(content_response.data)
+    return content_response.data, count
+
+
+async def count_user_friends(user_id: str) -> int:
+    uf_response = await supabase.table("user_friends")\
+        .select("id", count="exact")\
+        .eq("user_id", user_id)\
+        .limit(1)\
+        .execute()
+    return uf_response.count if uf_response.count is not None else len(uf_response.data)
+
+
+async def build_dashboard(user_id: str) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Assemble the home screen for a user. Returns the payload and per-section timings in ms.
+
+    Sections that do not depend on each other run concurrently: the profile,
+    the events and friends pages, the friend count, and the user's relations.
+    Once the relations are in, recent content runs too.
+    """
+    started = time.perf_counter()
+    async with QueryPlan() as plan:
+        plan.add("user", lambda: read_entity("users", user_id))
+        plan.add("links", lambda: fetch_user_event_links(user_id))
+        plan.add("events", lambda: read_user_events_page(user_id, None, DASHBOARD_EVENTS))
+        plan.add("content", read_recent_content, after=["links"])
+        plan.add("friends", lambda: read_user_friends_page(user_id, None, DASHBOARD_FRIENDS))
+        plan.add("stats", lambda: count_user_friends(user_id))
+        user, links, events_page, content, friends_page, friend_count = await plan.gather(
+            "user", "links", "events", "content", "friends", "stats",
+        )
+    timings = {**plan.timings, "total": round((time.perf_counter() - started) * 1000, 1)}
+
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    events, events_next_cursor = events_page
+    recent_content, content_count = content
+    friends, friends_next_cursor = friends_page
+    dashboard = {
+        "user": user,
+        "events": events,
+        "events_next_cursor": events_next_cursor,
+        "friends": friends,
+        "friends_next_cursor": friends_next_cursor,
+        "recent_content": recent_content,
+        "stats": {
+            "friend_count": friend_count,
+            "event_count": len({link["event_id"] for link in links}),
+            "content_count": content_count,
+        },
+    }
+    return dashboard, timings
+
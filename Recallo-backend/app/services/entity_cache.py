@@ -0,0 +1,49 @@
+import json
+import os
+from typing import Any, Dict, Optional
+
+from app.core.cache import MemoryCache, SQLiteCache
+from app.core.config import settings
+from app.core.supabase import supabase
+
+
+def make_entity_cache():
+    if settings.ENTITY_CACHE_BACKEND == "sqlite":
+        return SQLiteCache(
+            os.path.join(settings.CACHE_DIR, "entities.sqlite3"),
+            max_bytes=settings.ENTITY_CACHE_MAX_BYTES,
+            ttl=settings.ENTITY_CACHE_TTL,
+        )
+    return MemoryCache(max_bytes=settings.ENTITY_CACHE_MAX_BYTES, ttl=settings.ENTITY_CACHE_TTL)
+
+
+# Rows fetched by id, refreshed by the update endpoints and dropped by the delete endpoints
+entity_cache = make_entity_cache()
+
+
+def entity_cache_key(table: str, entity_id: Any) -> str:
+    return f"{table}:{entity_id}"
+
+
+async def read_entity(table: str, entity_id: Any) -> Optional[Dict[str, Any]]:
+    """
+    Fetch a row by id, from the cache when possible. Returns None if there is no such row.
+    """
+    key = entity_cache_key(table, entity_id)
+    cached = await entity_cache.aget(key)
+    if cached is not None:
+        return json.loads(cached)
+
+    response = await supabase.table(table).select("*").eq("id", entity_id).execute()
+    if not response.data:
+        return None
+    await entity_cache.aset(key, json.dumps(response.data[0]))
+    return response.data[0]
+
+
+async def store_entity(table: str, row: Dict[str, Any]) -> None:
+    await entity_cache.aset(entity_cache_key(table, row["id"]), json.dumps(row))
+
+
+async def invalidate_entity(table: str, entity_id: Any) -> None:
+    await entity_cache.adelete(entity_cache_key(table, entity_id))
@@ -0,0 +1,31 @@
+from typing import Any, Dict, List
+
+from app.core.supabase import supabase
+
+
+async def attach_friend_names(events: List[Dict[str, Any]], event_friends_map: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+    """
+    Fill `friend_names` for every event from an event_id -> friend_ids map.
+
+    All friend names are fetched in a single query and shared between events,
+    so each friend is looked up once however many events they appear in.
+    """
+    friend_ids = list({
+        friend_id
+        for event in events
+        for friend_id in event_friends_map.get(event['id'], [])
+    })
+
+    names_by_id = {}
+    if friend_ids:
+        friends_response = await supabase.table("friends").select("id, friend_name").in_("id", friend_ids).execute()
+        names_by_id = {f['id']: f['friend_name'] for f in friends_response.data}
+
+    for event in events:
+        event['friend_names'] = [
+            names_by_id[friend_id]
+            for friend_id in event_friends_map.get(event['id'], [])
+            if friend_id in names_by_id
+        ]
+
+    return events
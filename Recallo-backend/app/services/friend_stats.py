@@ -0,0 +1,42 @@
+from typing import Any, Dict, List
+
+from app.core.supabase import supabase
+
+
+async def attach_friend_stats(friends: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Fill `event_count` and `last_event_date` for a page of friends.
+
+    Uses one query no matter how many friends are passed in: the friends with
+    every user_friends_events link, and each linked event's date, embedded.
+    PostgREST's row cap applies to the top-level rows, one per friend, so the
+    stats stay exact however many links the page's friends have between them.
+    """
+    for friend in friends:
+        friend['event_count'] = 0
+        friend['last_event_date'] = None
+
+    if not friends:
+        return friends
+
+    friend_ids = [friend['id'] for friend in friends]
+
+    # 1. Get every friend's links with the linked event's date
+    stats_response = await supabase.table("friends")\
+        .select("id, user_friends_events(events(event_date))")\
+        .in_("id", friend_ids)\
+        .execute()
+
+    # Aggregate in memory
+    stats = {}
+    for row in stats_response.data:
+        links = row.get('user_friends_events') or []
+        dates = [link['events']['event_date'] for link in links if link.get('events') and link['events'].get('event_date')]
+        stats[row['id']] = (len(links), max(dates, default=None))
+
+    for friend in friends:
+        count, last_date = stats.get(friend['id'], (0, None))
+        friend['event_count'] = count
+        friend['last_event_date'] = last_date
+
+    return friends
@@ -0,0 +1,172 @@
+import logging
+import time
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, UploadFile
+
+from app.core.query_plan import QueryPlan
+from app.core.supabase import supabase
+from app.core.timing import timed
+from app.services.audio_pipeline import analyze, transcribe
+from app.services.entity_cache import read_entity
+from app.services.quiz_jobs import enqueue_quiz_pregeneration
+
+logger = logging.getLogger(__name__)
+
+
+class CreatedRows:
+    """
+    Rows written by one ingest, so a failed ingest can delete them again.
+    """
+
+    def __init__(self):
+        self.rows: List[Tuple[str, List[Any]]] = []
+
+    def add(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        if rows:
+            self.rows.append((table, [row["id"] for row in rows]))
+
+    async def delete(self) -> None:
+        # Newest first, so rows are removed before the rows they reference
+        for table, ids in reversed(self.rows):
+            try:
+                await supabase.table(table).delete().in_("id", ids).execute()
+            except Exception:
+                logger.exception("Cleanup of %s rows %s after a failed ingest failed", table, ids)
+        self.rows = []
+
+
+async def insert_rows(created: CreatedRows, table: str, rows: Any) -> List[Dict[str, Any]]:
+    response = await supabase.table(table).insert(rows).execute()
+    if not response.data:
+        raise HTTPException(status_code=400, detail=f"Could not create {table} rows")
+    created.add(table, response.data)
+    return response.data
+
+
+async def link(created: CreatedRows, table: str, row: Dict[str, Any], natural_key: Sequence[str]) -> Dict[str, Any]:
+    """
+    Get or create a relation row. Only a row this call inserted is recorded for cleanup.
+    """
+    # Ignoring duplicates returns just the inserted row, so an existing link comes back empty
+    response = await supabase.table(table).upsert(row, on_conflict=",".join(natural_key), ignore_duplicates=True).execute()
+    if response.data:
+        created.add(table, response.data)
+        return response.data[0]
+    query = supabase.table(table).select("*")
+    for column in natural_key:
+        query = query.eq(column, row[column])
+    existing = await query.execute()
+    if not existing.data:
+        raise HTTPException(status_code=400, detail=f"Could not link {table}")
+    return existing.data[0]
+
+
+async def ingest_memory(
+    audio: UploadFile,
+    user_id: str,
+    remarks: str = "",
+    friend_id: Optional[str] = None,
+    friend_name: Optional[str] = None,
+    event_id: Optional[str] = None,
+    event_name: Optional[str] = None,
+    event_date: Optional[date] = None,
+) -> Dict[str, Any]:
+    """
+    Turn a recording into a stored memory in one pass.
+
+    Transcribes and analyzes the audio, creates the friend and event unless
+    existing ids are given, links them to the user and each other, and stores
+    the extracted topics as content. Nothing is written until analysis has
+    succeeded; if writing fails part-way, rows created so far are deleted.
+    """
+    if friend_id is None and not (friend_name or "").strip():
+        raise HTTPException(status_code=422, detail="Either friend_id or friend_name is required")
+    if event_id is None and not (event_name or "").strip():
+        raise HTTPException(status_code=422, detail="Either event_id or event_name is required")
+
+    if friend_id is not None:
+        friend = await read_entity("friends", friend_id)
+        if friend is None:
+            raise HTTPException(status_code=404, detail="Friend not found")
+        friend_name = friend["friend_name"]
+    if event_id is not None and await read_entity("events", event_id) is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    with timed(timings, "transcribe"):
+        transcript, _ = await transcribe(audio, remarks)
+
+    with timed(timings, "analyze"):
+        analyzed = await analyze(transcript, friend_name)
+    topics = [
+        {"topic": topic["topic"], "content": topic["content"]}
+        for topic in analyzed.get("topics", [])
+        if isinstance(topic, dict) and isinstance(topic.get("topic"), str) and isinstance(topic.get("content"), str)
+    ]
+    if not topics:
+        raise HTTPException(status_code=422, detail=analyzed.get("warning") or "No topics found in the recording")
+
+    created = CreatedRows()
+
+    async def resolve_friend():
+        if friend_id is not None:
+            return friend_id
+        rows = await insert_rows(created, "friends", {"friend_name": friend_name})
+        return rows[0]["id"]
+
+    async def resolve_event():
+        if event_id is not None:
+            return event_id
+        rows = await insert_rows(created, "events", {
+            "event_name": event_name,
+            "event_date": event_date.isoformat() if event_date else None,
+        })
+        return rows[0]["id"]
+
+    try:
+        with timed(timings, "relations"):
+            async with QueryPlan() as plan:
+                plan.add("friend", resolve_friend)
+                plan.add("event", resolve_event)
+                plan.add("user_friend", lambda friend: link(created, "user_friends", {
+                    "user_id": user_id, "friend_id": friend, "friendname": friend_name,
+                }, ("user_id", "friend_id")), after=["friend"])
+                plan.add("user_event", lambda event: link(created, "user_events", {
+                    "user_id": user_id, "event_id": event,
+                }, ("user_id", "event_id")), after=["event"])
+                plan.add("relation", lambda friend, event: link(created, "user_friends_events", {
+                    "user_id": user_id, "friend_id": friend, "event_id": event,
+                }, ("user_id", "friend_id", "event_id")), after=["friend", "event"])
+                try:
+                    resolved_friend_id, resolved_event_id, relation, _, _ = await plan.gather(
+                        "friend", "event", "relation", "user_friend", "user_event",
+                    )
+                except BaseException:
+                    # Let sibling writes finish so every committed row is recorded for cleanup
+                    await plan.settle()
+                    raise
+
+        with timed(timings, "content"):
+            content = await insert_rows(created, "event_person_topics_content", [
+                {"user_friend_event_id": relation["id"], **topic} for topic in topics
+            ])
+    except BaseException:
+        await created.delete()
+        raise
+
+    # Build the pair's next quiz in the background so it is ready when opened
+    await enqueue_quiz_pregeneration(user_id, resolved_friend_id)
+
+    timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+    return {
+        "transcript": transcript,
+        "friend_id": resolved_friend_id,
+        "event_id": resolved_event_id,
+        "user_friend_event_id": relation["id"],
+        "content": content,
+        "timings": timings,
+    }
@@ -0,0 +1,58 @@
+import json
+from typing import Any, Dict, List
+
+
+class ArrayItemStreamParser:
+    """
+    Pull complete items out of a JSON document such as `{"questions": [{...}, {...}]}`
+    while it is still streaming in.
+
+    Prose around the document is ignored. Every object nested directly inside
+    an array of the top-level object is returned by `feed` as soon as its
+    closing brace arrives; `skipped` counts items that were not valid JSON.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0
+        self.stack: List[str] = []
+        self.in_string = False
+        self.escaped = False
+        self.item_start = None
+        self.skipped = 0
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        self.buffer += text
+        items = []
+        while self.position < len(self.buffer):
+            char = self.buffer[self.position]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"' and self.stack:
+                self.in_string = True
+            elif char in "{[":
+                if char == "{" and self.stack == ["{", "["]:
+                    self.item_start = self.position
+                self.stack.append(char)
+            elif char in "}]" and self.stack:
+                self.stack.pop()
+                if char == "}" and self.stack == ["{", "["] and self.item_start is not None:
+                    try:
+                        items.append(json.loads(self.buffer[self.item_start:self.position + 1]))
+                    except json.JSONDecodeError:
+                        self.skipped += 1
+                    self.item_start = None
+            self.position += 1
+
+        # Drop text that can no longer be part of a pending item
+        keep_from = self.item_start if self.item_start is not None else self.position
+        self.buffer = self.buffer[keep_from:]
+        self.position -= keep_from
+        if self.item_start is not None:
+            self.item_start = 0
+        return items
@@ -0,0 +1,66 @@
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.cache import SQLiteCache
+from app.core.config import settings
+from app.core.supabase import supabase
+
+# Generated quizzes per (user_id, friend_id), tagged with the content watermark they were built from
+quiz_cache = SQLiteCache(
+    os.path.join(settings.CACHE_DIR, "quizzes.sqlite3"),
+    max_bytes=settings.QUIZ_CACHE_MAX_BYTES,
+)
+
+
+def quiz_cache_key(user_id: str, friend_id: str) -> str:
+    return f"{user_id}:{friend_id}"
+
+
+async def content_watermark(relation_ids: List[int]) -> str:
+    """
+    Summarize the content stored for these relations as "<row count>:<max id>".
+
+    Any insert or delete changes it; updates are covered by explicit invalidation.
+    """
+    response = await supabase.table("event_person_topics_content")\
+        .select("id", count="exact")\
+        .in_("user_friend_event_id", relation_ids)\
+        .order("id", desc=True)\
+        .limit(1)\
+        .execute()
+    max_id = response.data[0]["id"] if response.data else 0
+    count = response.count if response.count is not None else len(response.data)
+    return f"{count}:{max_id}"
+
+
+async def get_cached_quiz(user_id: str, friend_id: str, watermark: str) -> Optional[Dict[str, Any]]:
+    cached = await quiz_cache.aget(quiz_cache_key(user_id, friend_id))
+    if cached is None:
+        return None
+    entry = json.loads(cached)
+    if entry["watermark"] != watermark:
+        return None
+    return entry["quiz"]
+
+
+async def cache_quiz(user_id: str, friend_id: str, watermark: str, quiz: Dict[str, Any]) -> None:
+    await quiz_cache.aset(quiz_cache_key(user_id, friend_id), json.dumps({"watermark": watermark, "quiz": quiz}))
+
+
+async def invalidate_quiz_cache(user_friend_event_ids: List[int]) -> List[Tuple[str, str]]:
+    """
+    Drop cached quizzes for every user/friend pair behind these relations.
+
+    Returns the (user_id, friend_id) pairs that were invalidated.
+    """
+    if not user_friend_event_ids:
+        return []
+    response = await supabase.table("user_friends_events")\
+        .select("user_id, friend_id")\
+        .in_("id", list(set(user_friend_event_ids)))\
+        .execute()
+    pairs = list({(relation["user_id"], relation["friend_id"]) for relation in response.data})
+    for user_id, friend_id in pairs:
+        await quiz_cache.adelete(quiz_cache_key(user_id, friend_id))
+    return pairs
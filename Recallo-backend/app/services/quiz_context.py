@@ -0,0 +1,106 @@
+import heapq
+from typing import Any, Dict, List
+
+# Rough size of a token for English text; good enough to keep prompts under budget
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def format_topic(topic: Dict[str, Any]) -> str:
+    return f"  Topic: {topic['topic']}\n  Content: {topic['content']}\n\n"
+
+
+def build_quiz_context(
+    friend_name: str,
+    relations: List[Dict[str, Any]],
+    events: List[Dict[str, Any]],
+    contents: List[Dict[str, Any]],
+    token_budget: int,
+    recency_half_life: float = 5.0,
+) -> str:
+    """
+    Format a representative subset of a friend's content for the quiz prompt.
+
+    Topics are picked greedily by score until `token_budget` is spent. A topic's
+    score halves every `recency_half_life` events back in time, and is divided
+    by one plus the number of topics already picked from the same event and
+    with the same title, so the subset spreads over many events and subjects.
+    """
+    # Index relations and events by id so each content row resolves in O(1)
+    event_by_relation = {rel["id"]: rel["event_id"] for rel in relations}
+    events_by_id = {event["id"]: event for event in events}
+
+    candidates = []
+    for content in contents:
+        event = events_by_id.get(event_by_relation.get(content["user_friend_event_id"]))
+        if event is None:
+            continue
+        candidates.append({
+            "event": event,
+            "topic": content["topic"],
+            "content": content["content"],
+            "recency": (event.get("event_date") or "", content.get("created_at") or "", content.get("id") or 0),
+        })
+
+    # Rank events newest first by their most recent content
+    event_recency = {}
+    for item in candidates:
+        event_id = item["event"]["id"]
+        event_recency[event_id] = max(event_recency.get(event_id, item["recency"]), item["recency"])
+    event_rank = {
+        event_id: rank
+        for rank, event_id in enumerate(sorted(event_recency, key=event_recency.get, reverse=True))
+    }
+
+    picks_per_event: Dict[Any, int] = {}
+    picks_per_topic: Dict[str, int] = {}
+
+    def score(item):
+        weight = 0.5 ** (event_rank[item["event"]["id"]] / recency_half_life)
+        penalty = (1 + picks_per_event.get(item["event"]["id"], 0)) * (1 + picks_per_topic.get(item["topic_key"], 0))
+        return weight / penalty
+
+    # Lazy greedy selection: scores only drop as picks accumulate, so a popped item
+    # whose fresh score still beats the next stored score is the true maximum
+    header = f"Friend: {friend_name}\n\n"
+    remaining = token_budget - estimate_tokens(header)
+    heap = []
+    for index, item in enumerate(candidates):
+        item["topic_key"] = (item["topic"] or "").strip().lower()
+        item["text"] = format_topic(item)
+        item["tokens"] = estimate_tokens(item["text"])
+        heap.append((-score(item), index))
+    heapq.heapify(heap)
+
+    selected = []
+    while heap and remaining > 0:
+        _, index = heapq.heappop(heap)
+        item = candidates[index]
+        fresh = score(item)
+        if heap and fresh < -heap[0][0]:
+            heapq.heappush(heap, (-fresh, index))
+            continue
+        cost = item["tokens"]
+        if item["event"]["id"] not in picks_per_event:
+            cost += estimate_tokens(f"Event: {item['event']['event_name']}\n")
+        if cost > remaining:
+            continue
+        remaining -= cost
+        selected.append(item)
+        picks_per_event[item["event"]["id"]] = picks_per_event.get(item["event"]["id"], 0) + 1
+        picks_per_topic[item["topic_key"]] = picks_per_topic.get(item["topic_key"], 0) + 1
+
+    # Lay the selection out oldest event first, topics in their original order
+    selected.sort(key=lambda item: (event_recency[item["event"]["id"]], item["recency"]))
+    content_by_event: Dict[Any, List[str]] = {}
+    for item in selected:
+        content_by_event.setdefault(item["event"]["id"], []).append(item["text"])
+
+    formatted_content = header
+    for event_id, texts in content_by_event.items():
+        formatted_content += f"Event: {events_by_id[event_id]['event_name']}\n"
+        formatted_content += "".join(texts)
+    return formatted_content
@@ -0,0 +1,230 @@
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from app import schemas
+from app.core.config import settings
+from app.core.supabase import supabase
+from app.core.claude import create_message, stream_message
+from app.core.query_plan import QueryPlan
+from app.services.quiz_cache import cache_quiz, content_watermark, get_cached_quiz
+from app.services.quiz_context import build_quiz_context
+from app.services.json_stream import ArrayItemStreamParser
+
+
+QUIZ_MODEL = "claude-sonnet-4-5-20250929"
+
+
+@dataclass
+class PreparedQuiz:
+    """
+    Either the cached quiz for a pair, or everything needed to generate a new one.
+    """
+    watermark: str
+    cached: Optional[schemas.QuizResponse] = None
+    friend_name: Optional[str] = None
+    prompt: Optional[str] = None
+
+
+def quiz_message_params(prompt: str) -> Dict[str, Any]:
+    return {
+        "model": QUIZ_MODEL,
+        "max_tokens": 4000,
+        "temperature": 0.7,
+        "messages": [
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ],
+    }
+
+
+def parse_question(q: Dict[str, Any]) -> schemas.QuizQuestion:
+    return schemas.QuizQuestion(
+        question=q["question"],
+        options=q["options"],
+        correct_answer=q["correct_answer"],
+        topic=q.get("topic", "General"),
+        explanation=q.get("explanation", "")
+    )
+
+
+async def prepare_quiz(user_id: str, friend_id: str) -> PreparedQuiz:
+    """
+    Load a pair's cached quiz, or gather their content and build the quiz prompt.
+    """
+    async def fetch_relations():
+        relations_response = await supabase.table("user_friends_events")\
+            .select("id, event_id")\
+            .eq("user_id", user_id)\
+            .eq("friend_id", friend_id)\
+            .execute()
+        return relations_response.data
+
+    async def fetch_friend():
+        friend_response = await supabase.table("friends").select("friend_name").eq("id", friend_id).single().execute()
+        return friend_response.data
+
+    async def fetch_content(relations):
+        content_response = await supabase.table("event_person_topics_content")\
+            .select("*")\
+            .in_("user_friend_event_id", [rel["id"] for rel in relations])\
+            .execute()
+        return content_response.data
+
+    async def fetch_events(relations):
+        events_response = await supabase.table("events")\
+            .select("id, event_name, event_date")\
+            .in_("id", [rel["event_id"] for rel in relations])\
+            .execute()
+        return events_response.data
+
+    async with QueryPlan() as plan:
+        plan.add("relations", fetch_relations)
+        plan.add("watermark", lambda relations: content_watermark([rel["id"] for rel in relations]), after=["relations"])
+        plan.add("friend", fetch_friend)
+        plan.add("content", fetch_content, after=["relations"])
+        plan.add("events", fetch_events, after=["relations"])
+
+        # The friend lookup depends on nothing, so it runs alongside the relations
+        plan.start("relations", "friend")
+
+        # Get all user-friend-event relationships
+        relations = await plan.get("relations")
+        if not relations or len(relations) < 2:
+            raise HTTPException(status_code=400, detail="Not enough interactions with this friend")
+        
+        # Content and events are fetched while the watermark is checked, so a cache
+        # miss costs two round trips; on a hit, leaving the plan cancels them
+        plan.start("content", "events")
+
+        # Serve the cached quiz if no content was added or removed since it was generated
+        watermark = await plan.get("watermark")
+        cached_quiz = await get_cached_quiz(user_id, friend_id, watermark)
+        if cached_quiz is not None:
+            quiz = schemas.QuizResponse(**cached_quiz)
+            return PreparedQuiz(watermark=watermark, cached=quiz, friend_name=quiz.friend_name)
+        
+        friend, contents, events = await plan.gather("friend", "content", "events")
+
+    if not friend:
+        raise HTTPException(status_code=404, detail="Friend not found")
+    friend_name = friend["friend_name"]
+    
+    if not contents:
+        raise HTTPException(status_code=404, detail="No content found for this friend")
+    
+    # Format a representative, token-bounded subset of the content for the prompt
+    formatted_content = build_quiz_context(
+        friend_name,
+        relations,
+        events,
+        contents,
+        token_budget=settings.QUIZ_CONTEXT_TOKEN_BUDGET,
+    )
+    
+    # Generate quiz using Claude
+    prompt = f"""Based on the following conversation records between a user and their friend {friend_name}, create a 10-question multiple choice quiz.
+
+{formatted_content}
+
+Create exactly 10 questions that test memory of qualitative details about conversations, events, and topics discussed. Focus on memorable details, personal information shared, opinions expressed, and specific topics discussed.
+
+Each question should:
+1. Be clear and specific
+2. Have 4 answer options (A, B, C, D)
+3. Have only one correct answer
+4. Test meaningful information rather than trivial details
+5. Include a mix of different topics and events
+
+Return the quiz in this exact JSON format:
+{{
+  "questions": [
+    {{
+      "question": "What did {friend_name} mention about...",
+      "options": ["Option A", "Option B", "Option C", "Option D"],
+      "correct_answer": 0,
+      "topic": "The main topic this question relates to",
+      "explanation": "Brief explanation of why this is the correct answer"
+    }}
+  ]
+}}
+
+The correct_answer should be the index (0-3) of the correct option.
+Make the questions engaging and focused on interesting details from the conversations."""
+
+    return PreparedQuiz(watermark=watermark, friend_name=friend_name, prompt=prompt)
+
+
+async def generate_quiz_for_pair(user_id: str, friend_id: str) -> schemas.QuizResponse:
+    """
+    Build the quiz for a user/friend pair, reusing the cached one while their content is unchanged.
+    """
+    prepared = await prepare_quiz(user_id, friend_id)
+    if prepared.cached is not None:
+        return prepared.cached
+
+    try:
+        message = await create_message(**quiz_message_params(prepared.prompt))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Quiz generation timed out")
+    
+    # Parse the response
+    response_text = message.content[0].text
+    
+    # Extract JSON from the response
+    try:
+        # Find the JSON content
+        json_start = response_text.find('{')
+        json_end = response_text.rfind('}') + 1
+        json_str = response_text[json_start:json_end]
+        quiz_data = json.loads(json_str)
+    except (json.JSONDecodeError, ValueError) as e:
+        raise HTTPException(status_code=500, detail=f"Failed to parse quiz response: {str(e)}")
+    
+    # Convert to response model
+    questions = [parse_question(q) for q in quiz_data["questions"]]
+    
+    quiz = schemas.QuizResponse(
+        questions=questions,
+        friend_name=prepared.friend_name
+    )
+    await cache_quiz(user_id, friend_id, prepared.watermark, quiz.model_dump())
+    return quiz
+
+
+async def stream_quiz_for_pair(prepared: PreparedQuiz, user_id: str, friend_id: str) -> AsyncIterator[schemas.QuizQuestion]:
+    """
+    Yield each quiz question as soon as Claude has finished writing it.
+
+    The quiz is cached like generate_quiz_for_pair, but only when Claude finished
+    its answer and every question in it was valid, so a stream cut off at
+    max_tokens never leaves a partial quiz in the cache.
+    """
+    if prepared.cached is not None:
+        for question in prepared.cached.questions:
+            yield question
+        return
+
+    parser = ArrayItemStreamParser()
+    questions = []
+    dropped = 0
+    stream = stream_message(**quiz_message_params(prepared.prompt))
+    async for text in stream:
+        for q in parser.feed(text):
+            try:
+                question = parse_question(q)
+            except (KeyError, TypeError, ValidationError):
+                dropped += 1
+                continue
+            questions.append(question)
+            yield question
+
+    if questions and stream.stop_reason == "end_turn" and not dropped and not parser.skipped:
+        quiz = schemas.QuizResponse(questions=questions, friend_name=prepared.friend_name)
+        await cache_quiz(user_id, friend_id, prepared.watermark, quiz.model_dump())
@@ -0,0 +1,28 @@
+import os
+from typing import Any, Dict
+
+from app.core.config import settings
+from app.core.jobs import JobQueue
+from app.services.quiz_generator import generate_quiz_for_pair
+
+
+async def pregenerate_quiz(payload: Dict[str, Any]) -> Dict[str, Any]:
+    # Generating stores the quiz in the quiz cache, where generate_quiz will find it
+    quiz = await generate_quiz_for_pair(payload["user_id"], payload["friend_id"])
+    return {"questions": len(quiz.questions)}
+
+
+# Quizzes to build ahead of time after new content is stored for a user/friend pair
+quiz_jobs = JobQueue(
+    os.path.join(settings.CACHE_DIR, "quiz_jobs.sqlite3"),
+    handler=pregenerate_quiz,
+    concurrency=settings.QUIZ_PREGENERATION_WORKERS,
+)
+
+
+def quiz_job_key(user_id: str, friend_id: str) -> str:
+    return f"{user_id}:{friend_id}"
+
+
+async def enqueue_quiz_pregeneration(user_id: str, friend_id: str) -> Dict[str, Any]:
+    return await quiz_jobs.aenqueue(quiz_job_key(user_id, friend_id), {"user_id": user_id, "friend_id": friend_id})
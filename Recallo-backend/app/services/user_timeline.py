@@ -0,0 +1,72 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.pagination import CREATED_ORDER, paginate, split_page
+from app.core.supabase import supabase
+from app.services.friend_names import attach_friend_names
+from app.services.friend_stats import attach_friend_stats
+
+# Timelines show the latest events first; undated events come last
+TIMELINE_ORDER = ("event_date", "id")
+
+Page = Tuple[List[Dict[str, Any]], Optional[str]]
+
+
+async def fetch_user_event_links(user_id: str) -> List[Dict[str, Any]]:
+    """
+    Every (relation id, event_id, friend_id) row of the user's user_friends_events.
+    """
+    ufe_response = await supabase.table("user_friends_events").select("id, event_id, friend_id").eq("user_id", user_id).execute()
+    return ufe_response.data
+
+
+async def read_user_events_page(user_id: str, cursor: Optional[str], limit: int) -> Page:
+    """
+    A page of the user's events with friend names, and the next page's cursor.
+
+    Events are paged directly, each with the user's user_friends_events links
+    embedded; the inner join keeps only events the user has a link to. Each
+    page costs the same however long the user's history is.
+    """
+    # 1. Fetch a page of the user's events with their friend_ids
+    events_query = supabase.table("events")\
+        .select("*, user_friends_events!inner(friend_id)")\
+        .eq("user_friends_events.user_id", user_id)
+    events_response = await paginate(events_query, TIMELINE_ORDER, cursor, limit, desc=True, nullable=True).execute()
+    page, next_cursor = split_page(events_response.data, TIMELINE_ORDER, limit)
+
+    # Group friend_ids by event_id
+    event_friends_map = {
+        event['id']: [link['friend_id'] for link in event.get('user_friends_events') or []]
+        for event in page
+    }
+    events = [{key: value for key, value in event.items() if key != 'user_friends_events'} for event in page]
+
+    # 2. Fetch friend names for the page's events at once
+    await attach_friend_names(events, event_friends_map)
+
+    return events, next_cursor
+
+
+async def read_user_friends_page(user_id: str, cursor: Optional[str], limit: int) -> Page:
+    """
+    A page of the user's friends with event stats, in the order they were added, and the next page's cursor.
+    """
+    # 1. Get a page of friend_ids for this user from user_friends
+    uf_query = supabase.table("user_friends").select("id, friend_id, created_at").eq("user_id", user_id)
+    uf_response = await paginate(uf_query, CREATED_ORDER, cursor, limit).execute()
+    user_friends_data, next_cursor = split_page(uf_response.data, CREATED_ORDER, limit)
+    
+    if not user_friends_data:
+        return [], None
+        
+    friend_ids = [item['friend_id'] for item in user_friends_data]
+    
+    # 2. Fetch friend details, kept in page order
+    friends_response = await supabase.table("friends").select("*").in_("id", friend_ids).execute()
+    friends_by_id = {friend['id']: friend for friend in friends_response.data}
+    friends = [friends_by_id[friend_id] for friend_id in dict.fromkeys(friend_ids) if friend_id in friends_by_id]
+    
+    # 3. Fetch stats for all friends at once
+    await attach_friend_stats(friends)
+
+    return friends, next_cursor
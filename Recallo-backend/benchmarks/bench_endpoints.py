@@ -0,0 +1,95 @@
+"""
+Latency and throughput of read endpoints as a user's data grows.
+
+Runs the app in-process against the in-memory Supabase stand-in, seeded with
+one user who has N friends and N events, and fires requests at each endpoint
+from concurrent clients. Every Supabase query waits `--latency` ms (plus up to
+`--jitter` ms) to stand in for the round trip to the database.
+
+Run from the backend root: python -m benchmarks.bench_endpoints [--latency 2]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.core.config import settings
+from app.main import app
+from tests.utils.memory_supabase import MemorySupabase, seed, serve
+
+SCALES = [10, 100, 1_000]
+API = settings.API_V1_STR
+
+
+def endpoints(tables):
+    user_id = tables["users"][0]["id"]
+    link = tables["user_friends_events"][0]
+    return {
+        "friends": f"{API}/friends/user/{user_id}",
+        "events": f"{API}/events/user/{user_id}",
+        "dashboard": f"{API}/users/{user_id}/dashboard",
+        "friend events": f"{API}/events/user/{user_id}/friend/{link['friend_id']}",
+        "event friends": f"{API}/friends/user/{user_id}/event/{link['event_id']}",
+        "friend content": f"{API}/quiz/content/{user_id}/{link['friend_id']}",
+        "content": f"{API}/content/",
+    }
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def measure(client, url, requests, concurrency):
+    latencies = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await client.get(url)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise RuntimeError(f"GET {url} returned {response.status_code}: {response.text[:200]}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return latencies, requests / elapsed
+
+
+async def run(args):
+    print(f"latency {args.latency} ms (+{args.jitter} ms jitter), {args.requests} requests, concurrency {args.concurrency}")
+    print(f"{'endpoint':>15} {'scale':>6} | {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8} {'req/s':>8} {'queries':>8}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for scale in args.scales:
+            tables = seed(friends_per_user=scale, events_per_user=scale)
+            memory = MemorySupabase(tables, latency=args.latency / 1000, jitter=args.jitter / 1000)
+            with serve(memory):
+                for name, url in endpoints(tables).items():
+                    # Warm up caches and code paths before timing
+                    await measure(client, url, min(5, args.requests), 1)
+                    memory.queries = 0
+                    latencies, throughput = await measure(client, url, args.requests, args.concurrency)
+                    print(
+                        f"{name:>15} {scale:>6} | "
+                        f"{percentile(latencies, 0.5):>8.2f} {percentile(latencies, 0.99):>8.2f} "
+                        f"{statistics.fmean(latencies):>8.2f} {throughput:>8.0f} {memory.queries / args.requests:>8.1f}"
+                    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=2.0, help="milliseconds added to every Supabase query")
+    parser.add_argument("--jitter", type=float, default=1.0, help="up to this many extra milliseconds per query")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint and scale")
+    parser.add_argument("--concurrency", type=int, default=10, help="requests in flight at once")
+    parser.add_argument("--scales", type=int, nargs="+", default=SCALES, help="friends and events per user")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
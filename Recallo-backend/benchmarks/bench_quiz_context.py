@@ -0,0 +1,75 @@
+"""
+Prompt size and build time of the quiz context as a friend's history grows.
+
+Compares formatting every content row (the previous behaviour, with its
+relation lookup per row) against the token-budgeted context builder.
+
+Run from the backend root: python -m benchmarks.bench_quiz_context
+"""
+import time
+
+from app.services.quiz_context import build_quiz_context, estimate_tokens
+
+TOPICS_PER_EVENT = 5
+TOKEN_BUDGET = 6000
+HISTORY_SIZES = [10, 100, 1_000, 5_000]
+
+
+def make_history(event_count):
+    relations = [{"id": i, "event_id": f"e{i}"} for i in range(event_count)]
+    events = [{"id": f"e{i}", "event_name": f"Event {i}", "event_date": f"{2000 + i // 365}-{i % 12 + 1:02d}-01"} for i in range(event_count)]
+    contents = [
+        {
+            "id": i * TOPICS_PER_EVENT + j,
+            "user_friend_event_id": i,
+            "topic": f"Topic {j}",
+            "content": "We talked about plans for the summer and what we both had been reading lately.",
+            "created_at": "2023-01-01T00:00:00",
+        }
+        for i in range(event_count)
+        for j in range(TOPICS_PER_EVENT)
+    ]
+    return relations, events, contents
+
+
+def format_everything(friend_name, relations, events, contents):
+    events_dict = {event["id"]: event for event in events}
+    content_by_event = {}
+    for content in contents:
+        event_id = None
+        for rel in relations:
+            if rel["id"] == content["user_friend_event_id"]:
+                event_id = rel["event_id"]
+                break
+        if event_id and event_id in events_dict:
+            content_by_event.setdefault(events_dict[event_id]["event_name"], []).append(content)
+    formatted_content = f"Friend: {friend_name}\n\n"
+    for event_name, topics in content_by_event.items():
+        formatted_content += f"Event: {event_name}\n"
+        for topic in topics:
+            formatted_content += f"  Topic: {topic['topic']}\n"
+            formatted_content += f"  Content: {topic['content']}\n\n"
+    return formatted_content
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    print(f"{'events':>8} {'topics':>8} | {'all tokens':>10} {'all ms':>9} | {'budget tokens':>13} {'budget ms':>9} {'events kept':>11}")
+    for event_count in HISTORY_SIZES:
+        relations, events, contents = make_history(event_count)
+        everything, everything_ms = timed(format_everything, "Sam", relations, events, contents)
+        budgeted, budgeted_ms = timed(build_quiz_context, "Sam", relations, events, contents, token_budget=TOKEN_BUDGET)
+        print(
+            f"{event_count:>8} {len(contents):>8} | "
+            f"{estimate_tokens(everything):>10} {everything_ms:>9.1f} | "
+            f"{estimate_tokens(budgeted):>13} {budgeted_ms:>9.1f} {budgeted.count('Event: '):>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
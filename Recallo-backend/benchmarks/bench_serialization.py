@@ -0,0 +1,93 @@
+"""
+Default versus fast (FAST_SERIALIZATION) response encoding for large list pages.
+
+For read_user_events, read_user_friends and read_content at 1k to 50k rows,
+reports the time to encode the rows alone (response-model validation and
+JSON dump against projection and orjson) and the whole request through the
+app against the in-memory Supabase, whose own work is the same in both modes.
+
+Run from the backend root: python -m benchmarks.bench_serialization
+"""
+import asyncio
+import os
+import statistics
+import time
+from typing import List
+from unittest.mock import patch
+
+# Pages this large are above the default cap; settings are read at import
+os.environ["MAX_PAGE_SIZE"] = "50000"
+
+import httpx
+from pydantic import TypeAdapter
+
+from app import schemas
+from app.core.config import settings
+from app.core.serialization import dumps, project
+from app.main import app
+from tests.utils.memory_supabase import MemorySupabase, seed, serve
+
+SIZES = [1_000, 5_000, 10_000, 50_000]
+RUNS = 5
+
+
+def best_of(fn, runs=RUNS):
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return min(times)
+
+
+def encode_default(model, rows):
+    # What FastAPI does with a response_model: validate, then dump to JSON
+    adapter = TypeAdapter(List[model])
+    return lambda: adapter.dump_json(adapter.validate_python(rows))
+
+
+def encode_fast(model, rows):
+    return lambda: dumps([project(model, row) for row in rows])
+
+
+async def request_ms(client, url):
+    times = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        response = await client.get(url)
+        times.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {url} returned {response.status_code}: {response.text[:200]}")
+    return statistics.median(times)
+
+
+async def main():
+    print(f"{'endpoint':>18} {'rows':>7} | {'encode ms':>9} {'fast':>7} {'x':>5} | {'request ms':>10} {'fast':>7} {'x':>5}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for size in SIZES:
+            tables = seed(friends_per_user=size, events_per_user=size, friends_per_event=1, topics_per_link=1)
+            user_id = tables["users"][0]["id"]
+            memory = MemorySupabase(tables)
+            cases = [
+                ("read_user_events", schemas.Event, f"{settings.API_V1_STR}/events/user/{user_id}?limit={size}"),
+                ("read_user_friends", schemas.Friend, f"{settings.API_V1_STR}/friends/user/{user_id}?limit={size}"),
+                ("read_content", schemas.Content, f"{settings.API_V1_STR}/content/?limit={size}"),
+            ]
+            with serve(memory):
+                for name, model, url in cases:
+                    # Encode exactly the rows the endpoint returns
+                    rows = (await client.get(url)).json()
+                    encode = best_of(encode_default(model, rows))
+                    encode_fast_ms = best_of(encode_fast(model, rows))
+                    request = await request_ms(client, url)
+                    with patch.object(settings, "FAST_SERIALIZATION", True):
+                        request_fast = await request_ms(client, url)
+                    print(
+                        f"{name:>18} {len(rows):>7} | {encode:>9.1f} {encode_fast_ms:>7.1f} {encode / encode_fast_ms:>5.1f} | "
+                        f"{request:>10.1f} {request_fast:>7.1f} {request / request_fast:>5.1f}"
+                    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+"""
+Cold start: time to import the app and to answer its first request.
+
+Each measurement runs in a fresh interpreter. The SDKs for Supabase,
+Deepgram and Anthropic are imported when first used rather than with the app
+(Supabase's when the lifespan connects); their import cost is listed
+separately, as it is paid once per process.
+
+Run from the backend root: python -m benchmarks.bench_startup
+"""
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+RUNS = 5
+# What the app runs when it first needs each SDK
+SDKS = {
+    "supabase": "from supabase import acreate_client",
+    "deepgram": "from deepgram import AsyncDeepgramClient",
+    "anthropic": "from anthropic import AsyncAnthropic",
+}
+
+# Placeholders so settings load; nothing here talks to the real services
+ENV = {
+    **os.environ,
+    "SUPABASE_URL": os.environ.get("SUPABASE_URL", "http://127.0.0.1:54321"),
+    "SUPABASE_KEY": os.environ.get("SUPABASE_KEY", "placeholder"),
+}
+
+IMPORT_APP = f"""
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = (time.perf_counter() - started) * 1000
+print(json.dumps({{"ms": elapsed, "sdks": [name for name in {list(SDKS)!r} if name in sys.modules]}}))
+"""
+
+
+def python(code: str) -> dict:
+    output = subprocess.run([sys.executable, "-c", code], env=ENV, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def import_sdk(statement: str) -> float:
+    code = f"import json, time; started = time.perf_counter(); {statement}; print(json.dumps({{'ms': (time.perf_counter() - started) * 1000}}))"
+    return python(code)["ms"]
+
+
+def first_request() -> float:
+    """
+    Milliseconds from launching uvicorn to the first successful response.
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=ENV,
+    )
+    try:
+        while True:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1):
+                    return (time.perf_counter() - started) * 1000
+            except OSError:
+                if server.poll() is not None:
+                    raise RuntimeError("uvicorn exited before serving a request")
+                time.sleep(0.005)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    imports = [python(IMPORT_APP) for _ in range(RUNS)]
+    loaded = sorted({name for run in imports for name in run["sdks"]})
+    print(f"median of {RUNS} runs, each in a fresh interpreter")
+    print(f"{'import app.main':>24} {statistics.median(run['ms'] for run in imports):>8.0f} ms  (SDKs loaded: {', '.join(loaded) or 'none'})")
+    print(f"{'first request':>24} {statistics.median(first_request() for _ in range(RUNS)):>8.0f} ms  (uvicorn launch to first response)")
+    for name, statement in SDKS.items():
+        print(f"{'import ' + name:>24} {statistics.median(import_sdk(statement) for _ in range(RUNS)):>8.0f} ms  (paid once per process)")
+
+
+if __name__ == "__main__":
+    main()
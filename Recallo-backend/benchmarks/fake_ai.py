@@ -0,0 +1,253 @@
+"""
+Local stand-ins for the Deepgram transcription and Anthropic messages APIs.
+
+Both answer with canned output after a configurable delay, and fail a
+configurable share of requests, so the audio and quiz endpoints can be
+exercised without paid API calls. Claude responses can be streamed as
+server-sent events, one chunk at a time.
+
+Serve both (then set DEEPGRAM_BASE_URL and ANTHROPIC_BASE_URL for the app):
+
+    python -m benchmarks.fake_ai --deepgram-port 8401 --anthropic-port 8402 --latency 0.5
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+TRANSCRIPT = (
+    "So I met up with Sam for coffee and we talked about her new job at the library, "
+    "the trip she is planning to Lisbon in the spring, and the book club she started."
+)
+
+TOPICS = {
+    "topics": [
+        {"topic": "New job", "content": "Sam told me all about her new job at the library."},
+        {"topic": "Travel plans", "content": "Sam is planning a trip to Lisbon in the spring."},
+        {"topic": "Book club", "content": "Sam started a book club and I might join."},
+    ]
+}
+
+
+def quiz(questions: int = 10) -> Dict[str, Any]:
+    return {
+        "questions": [
+            {
+                "question": f"What did Sam mention about topic {i + 1}?",
+                "options": ["A library job", "A trip to Lisbon", "A book club", "A new puppy"],
+                "correct_answer": i % 3,
+                "topic": ["New job", "Travel plans", "Book club"][i % 3],
+                "explanation": "Sam brought it up over coffee.",
+            }
+            for i in range(questions)
+        ]
+    }
+
+
+class Behaviour:
+    """
+    How a stand-in responds: `latency` seconds (plus up to `jitter`) before the
+    response starts, `chunk_delay` seconds between streamed chunks, and
+    `error_rate` of requests answered with `error_status` instead.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.2,
+        jitter: float = 0.0,
+        chunk_delay: float = 0.01,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.chunk_delay = chunk_delay
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+
+    async def wait(self) -> None:
+        await asyncio.sleep(self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0))
+
+    def should_fail(self) -> bool:
+        self.requests += 1
+        failed = self._random.random() < self.error_rate
+        self.failures += failed
+        return failed
+
+
+def deepgram_app(behaviour: Behaviour, transcript: str = TRANSCRIPT) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/v1/listen")
+    async def listen(request: Request):
+        digest = hashlib.sha256()
+        size = 0
+        async for chunk in request.stream():
+            digest.update(chunk)
+            size += len(chunk)
+        await behaviour.wait()
+        if behaviour.should_fail():
+            return JSONResponse({"err_code": "INTERNAL_SERVER_ERROR", "err_msg": "Injected failure"}, status_code=behaviour.error_status)
+
+        sha256 = digest.hexdigest()
+        # The audio hash keeps transcripts of different uploads distinct, like real speech would be
+        text = f"{transcript} (recording {sha256[:12]})"
+        return {
+            "metadata": {
+                "request_id": str(uuid.uuid4()),
+                "sha256": sha256,
+                "created": datetime.now(timezone.utc).isoformat(),
+                "duration": round(size / 32000, 2),
+                "channels": 1,
+                "models": [request.query_params.get("model", "nova-3")],
+                "model_info": {},
+            },
+            "results": {
+                "channels": [{
+                    "alternatives": [{"transcript": text, "confidence": 0.98, "words": []}],
+                    "detected_language": "en",
+                }],
+            },
+        }
+
+    return app
+
+
+def canned_reply(body: Dict[str, Any]) -> str:
+    system = body.get("system") or ""
+    if isinstance(system, list):
+        system = " ".join(block.get("text", "") for block in system)
+    prompt = json.dumps(body.get("messages", []))
+    if '"topics"' in system:
+        return json.dumps(TOPICS)
+    if "quiz" in prompt:
+        return json.dumps(quiz())
+    return "OK"
+
+
+def chunks(text: str, size: int = 24) -> List[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def anthropic_app(behaviour: Behaviour) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/v1/messages")
+    async def messages(request: Request):
+        body = await request.json()
+        await behaviour.wait()
+        if behaviour.should_fail():
+            return JSONResponse(
+                {"type": "error", "error": {"type": "api_error", "message": "Injected failure"}},
+                status_code=behaviour.error_status,
+            )
+
+        text = canned_reply(body)
+        input_tokens = len(json.dumps(body)) // 4
+        output_tokens = max(1, len(text) // 4)
+        message = {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "claude"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+        }
+        if not body.get("stream"):
+            await asyncio.sleep(behaviour.chunk_delay * len(chunks(text)))
+            return message
+
+        async def events() -> AsyncIterator[str]:
+            yield sse("message_start", {"type": "message_start", "message": {
+                **message, "content": [], "stop_reason": None,
+                "usage": {"input_tokens": input_tokens, "output_tokens": 1},
+            }})
+            yield sse("content_block_start", {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}})
+            for piece in chunks(text):
+                await asyncio.sleep(behaviour.chunk_delay)
+                yield sse("content_block_delta", {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": piece}})
+            yield sse("content_block_stop", {"type": "content_block_stop", "index": 0})
+            yield sse("message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None}, "usage": {"output_tokens": output_tokens}})
+            yield sse("message_stop", {"type": "message_stop"})
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+class FakeServer:
+    """
+    Serve an app with uvicorn on a background thread, with its own event loop.
+    """
+
+    def __init__(self, app: FastAPI, port: int = 0, host: str = "127.0.0.1"):
+        self.server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning", lifespan="off"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.servers[0].sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeServer":
+        self.thread.start()
+        while not self.server.started:
+            if not self.thread.is_alive():
+                raise RuntimeError("Fake server failed to start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        self.server.should_exit = True
+        self.thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve local Deepgram and Anthropic stand-ins")
+    parser.add_argument("--deepgram-port", type=int, default=8401)
+    parser.add_argument("--anthropic-port", type=int, default=8402)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before each response starts")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many extra seconds per response")
+    parser.add_argument("--chunk-delay", type=float, default=0.01, help="seconds between streamed Claude chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500)
+    args = parser.parse_args()
+
+    def behaviour():
+        return Behaviour(args.latency, args.jitter, args.chunk_delay, args.error_rate, args.error_status)
+
+    servers = [
+        FakeServer(deepgram_app(behaviour()), args.deepgram_port).start(),
+        FakeServer(anthropic_app(behaviour()), args.anthropic_port).start(),
+    ]
+    print(f"Deepgram at {servers[0].url}, Anthropic at {servers[1].url}; Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        for server in servers:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Load test for the AI-backed endpoints against local Deepgram and Anthropic stand-ins.
+
+Starts the stand-ins from `benchmarks.fake_ai` in a separate process, runs the
+app in-process against the in-memory Supabase, and fires concurrent audio
+uploads and quiz requests through it. Reports throughput and tail latency per
+endpoint, and how long the app's event loop was blocked while under load.
+
+Every upload has different bytes and every quiz is for a different friend, so
+no request is answered from the transcript, analysis or quiz caches.
+
+Run from the backend root: python -m benchmarks.load_ai [--stream] [--error-rate 0.05]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fakes(args):
+    deepgram_port, anthropic_port = free_port(), free_port()
+    process = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.fake_ai",
+        "--deepgram-port", str(deepgram_port),
+        "--anthropic-port", str(anthropic_port),
+        "--latency", str(args.latency),
+        "--jitter", str(args.jitter),
+        "--chunk-delay", str(args.chunk_delay),
+        "--error-rate", str(args.error_rate),
+    ], stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 15
+    for port in (deepgram_port, anthropic_port):
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    process.kill()
+                    raise RuntimeError("Fake AI servers did not start")
+                time.sleep(0.05)
+    return process, f"http://127.0.0.1:{deepgram_port}", f"http://127.0.0.1:{anthropic_port}"
+
+
+class LoopMonitor:
+    """
+    Measures how late the event loop wakes a task that sleeps `interval` seconds.
+    Lateness beyond a millisecond means something ran without yielding.
+    """
+
+    def __init__(self, interval: float = 0.005, threshold: float = 0.001):
+        self.interval = interval
+        self.threshold = threshold
+        self.lags = []
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lags.append(loop.time() - expected)
+
+    def blocked(self) -> float:
+        return sum(lag for lag in self.lags if lag > self.threshold)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def drive(name, requests, concurrency, send):
+    """
+    Run `send(i)` for each of `requests` indexes from `concurrency` workers.
+    `send` returns whether the request succeeded.
+    """
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in remaining:
+            started = time.perf_counter()
+            ok = await send(i)
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return name, latencies, errors, time.perf_counter() - started
+
+
+async def run(args, deepgram_url, anthropic_url):
+    # Configure the app before it is imported, as settings are read at import
+    os.environ["CACHE_DIR"] = tempfile.mkdtemp(prefix="recallo-load-")
+    os.environ["DEEPGRAM_BASE_URL"] = deepgram_url
+    os.environ["ANTHROPIC_BASE_URL"] = anthropic_url
+    os.environ.setdefault("DEEPGRAM_API_KEY", "fake")
+    os.environ.setdefault("ANTHROPIC_API_KEY", "fake")
+
+    import httpx
+
+    from app.core.config import settings
+    from app.main import app
+    from tests.utils.memory_supabase import MemorySupabase, seed, serve
+
+    tables = seed(friends_per_user=args.quizzes, events_per_user=3 * args.quizzes, friends_per_event=2)
+    user_id = tables["users"][0]["id"]
+    # A quiz needs at least two shared events with the friend
+    shared = Counter(link["friend_id"] for link in tables["user_friends_events"])
+    friend_ids = [friend_id for friend_id, events in shared.items() if events >= 2]
+    upload_url = f"{settings.API_V1_STR}/process_audio/{'stream' if args.stream else ''}"
+    quiz_url = f"{settings.API_V1_STR}/quiz/generate{'/stream' if args.stream else ''}"
+
+    def succeeded(response) -> bool:
+        return response.status_code == 200 and "event: error" not in response.text
+
+    async def upload(i):
+        audio = os.urandom(args.audio_kb * 1024)
+        response = await client.post(upload_url, files={"audio": (f"memo-{i}.m4a", audio, "audio/mp4")}, data={"friend_name": "Sam"})
+        return succeeded(response)
+
+    async def generate_quiz(i):
+        payload = {"user_id": user_id, "friend_id": friend_ids[i % len(friend_ids)]}
+        return succeeded(await client.post(quiz_url, json=payload))
+
+    monitor = LoopMonitor()
+    transport = httpx.ASGITransport(app=app)
+    with serve(MemorySupabase(tables, latency=args.db_latency / 1000)):
+        async with httpx.AsyncClient(transport=transport, base_url="http://load", timeout=None) as client:
+            monitoring = asyncio.create_task(monitor.run())
+            started = time.perf_counter()
+            results = await asyncio.gather(
+                drive("upload", args.uploads, args.concurrency, upload),
+                drive("quiz", args.quizzes, args.concurrency, generate_quiz),
+            )
+            elapsed = time.perf_counter() - started
+            monitoring.cancel()
+
+    print(
+        f"stand-in latency {args.latency}s (+{args.jitter}s), chunk delay {args.chunk_delay}s, "
+        f"error rate {args.error_rate:.0%}, concurrency {args.concurrency} per endpoint"
+        f"{', streaming' if args.stream else ''}"
+    )
+    print(f"{'endpoint':>8} | {'requests':>8} {'errors':>6} {'req/s':>7} | {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, latencies, errors, duration in results:
+        print(
+            f"{name:>8} | {len(latencies):>8} {errors:>6} {len(latencies) / duration:>7.1f} | "
+            f"{percentile(latencies, 0.5):>8.0f} {percentile(latencies, 0.95):>8.0f} "
+            f"{percentile(latencies, 0.99):>8.0f} {max(latencies):>8.0f}"
+        )
+    lags = [lag * 1000 for lag in monitor.lags]
+    print(
+        f"event loop: blocked {monitor.blocked() * 1000:.0f} ms of {elapsed * 1000:.0f} ms, "
+        f"lag p50 {percentile(lags, 0.5):.1f} ms, p99 {percentile(lags, 0.99):.1f} ms, max {max(lags):.1f} ms "
+        f"(mean {statistics.fmean(lags):.2f} ms over {len(lags)} samples)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--uploads", type=int, default=100, help="audio uploads to send")
+    parser.add_argument("--quizzes", type=int, default=100, help="quiz requests to send")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight per endpoint")
+    parser.add_argument("--audio-kb", type=int, default=256, help="size of each upload")
+    parser.add_argument("--stream", action="store_true", help="use the server-sent event endpoints")
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds before a stand-in responds")
+    parser.add_argument("--jitter", type=float, default=0.2, help="up to this many extra seconds per response")
+    parser.add_argument("--chunk-delay", type=float, default=0.01, help="seconds between streamed Claude chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of upstream calls that fail")
+    parser.add_argument("--db-latency", type=float, default=2.0, help="milliseconds per Supabase query")
+    args = parser.parse_args()
+
+    process, deepgram_url, anthropic_url = start_fakes(args)
+    try:
+        asyncio.run(run(args, deepgram_url, anthropic_url))
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,7 @@
 import uvicorn
 from fastapi import FastAPI
-from dotenv import load_dotenv
-
-# Load env vars (API keys)
-load_dotenv()
 
+# API keys are read from .env by app.core.config; the SDK clients are created on first use
 # Import ONLY your transcription router
 from app.api.api_v1.endpoints import process_audio
 
@@ -1,22 +1,87 @@
+import pytest
 from fastapi.testclient import TestClient
 from app.core.config import settings
 from unittest.mock import patch
+from uuid import uuid4
 
-# Mock Supabase response
-class MockResponse:
-    def __init__(self, data):
-        self.data = data
+from app.core.pagination import decode_cursor
+from tests.utils.supabase import MockSupabase
 
-    def execute(self):
-        return self
+USER_ID = "123e4567-e89b-12d3-a456-426614174000"
 
 def test_read_events(client: TestClient) -> None:
-    with patch("app.api.api_v1.endpoints.events.supabase") as mock_supabase:
-        mock_supabase.table.return_value.select.return_value.range.return_value.execute.return_value = MockResponse(
-            [{"id": "123e4567-e89b-12d3-a456-426614174000", "event_name": "Test Event", "created_at": "2023-01-01T00:00:00"}]
-        )
-        
+    mock_supabase = MockSupabase({"events": [
+        {"id": "123e4567-e89b-12d3-a456-426614174000", "event_name": "Test Event", "created_at": "2023-01-01T00:00:00"}
+    ]})
+    with patch("app.api.api_v1.endpoints.events.supabase", mock_supabase):
         response = client.get(f"{settings.API_V1_STR}/events/")
         assert response.status_code == 200
         assert len(response.json()) == 1
         assert response.json()[0]["event_name"] == "Test Event"
+        assert "x-next-cursor" not in response.headers
+
+def test_read_events_next_cursor(client: TestClient) -> None:
+    events = [
+        {"id": str(uuid4()), "event_name": f"Event {i}", "created_at": f"2023-01-0{i + 1}T00:00:00"}
+        for i in range(3)
+    ]
+    # The mock ignores filters, so it always returns the look-ahead row
+    with patch("app.api.api_v1.endpoints.events.supabase", MockSupabase({"events": events})):
+        response = client.get(f"{settings.API_V1_STR}/events/?limit=2")
+        assert len(response.json()) == 2
+        assert decode_cursor(response.headers["x-next-cursor"], 2) == ["2023-01-02T00:00:00", events[1]["id"]]
+
+        assert client.get(f"{settings.API_V1_STR}/events/?cursor=not-a-cursor").status_code == 400
+        assert client.get(f"{settings.API_V1_STR}/events/?limit=100000").status_code == 422
+
+def make_timeline_tables(event_count):
+    friends = [
+        {"id": str(uuid4()), "friend_name": f"Friend {i}"}
+        for i in range(3)
+    ]
+    events = [
+        {"id": str(uuid4()), "event_name": f"Event {i}", "event_date": "2023-01-01", "created_at": "2023-01-01T00:00:00"}
+        for i in range(event_count)
+    ]
+    # Events are read with the user's links embedded
+    for event in events:
+        event["user_friends_events"] = [{"friend_id": friend["id"]} for friend in friends]
+    return {"events": events, "friends": friends}
+
+def test_read_user_events_friend_names(client: TestClient) -> None:
+    mock_supabase = MockSupabase(make_timeline_tables(2))
+    with patch("app.services.user_timeline.supabase", mock_supabase), \
+         patch("app.services.friend_names.supabase", mock_supabase):
+        response = client.get(f"{settings.API_V1_STR}/events/user/{USER_ID}")
+    assert response.status_code == 200
+    for event in response.json():
+        assert event["friend_names"] == ["Friend 0", "Friend 1", "Friend 2"]
+
+@pytest.mark.query_budget(2)
+def test_read_user_events_query_count_is_flat(client: TestClient, supabase_tracer) -> None:
+    for event_count in (1, 10, 200):
+        tracer = supabase_tracer(MockSupabase(make_timeline_tables(event_count)))
+        response = client.get(f"{settings.API_V1_STR}/events/user/{USER_ID}")
+        assert response.status_code == 200
+        # Pages are capped at the default limit however long the history
+        assert len(response.json()) == min(event_count, 100)
+        assert [query.table for query in tracer.queries] == ["events", "friends"]
+
+def test_read_user_events_query_plan(client: TestClient, supabase_tracer) -> None:
+    tracer = supabase_tracer(MockSupabase(make_timeline_tables(2)))
+    client.get(f"{settings.API_V1_STR}/events/user/{USER_ID}")
+    client.get(f"{settings.API_V1_STR}/events/user/{USER_ID}")
+
+    requests = tracer.by_request()
+    url = f"GET {settings.API_V1_STR}/events/user/{USER_ID}"
+    assert list(requests) == [url, f"{url} #2"]
+    events = requests[url][0]
+    assert events.table == "events"
+    assert events.calls[0] == ("select", ("*, user_friends_events!inner(friend_id)",), {})
+    # Only the user filter, however many events the user has
+    assert events.filters == [("eq", ("user_friends_events.user_id", USER_ID), {})]
+    assert f"{url}: 2 queries" in tracer.plan()
+
+    tracer.assert_max_queries(2)
+    with pytest.raises(AssertionError, match="Query budget of 1 exceeded"):
+        tracer.assert_max_queries(1)
@@ -0,0 +1,94 @@
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from unittest.mock import patch
+from app.core.cache import MemoryCache
+from uuid import uuid4
+
+from tests.utils.supabase import MockSupabase
+
+USER_ID = "123e4567-e89b-12d3-a456-426614174000"
+
+def make_tables(friend_count):
+    friends = [
+        {"id": str(uuid4()), "friend_name": f"Friend {i}", "created_at": "2023-01-01T00:00:00"}
+        for i in range(friend_count)
+    ]
+    events = [
+        {"id": str(uuid4()), "event_date": f"2023-01-{i + 1:02d}"}
+        for i in range(3)
+    ]
+    links = [
+        {"friend_id": friend["id"], "event_id": event["id"]}
+        for friend in friends
+        for event in events
+    ]
+    # Stats are read as friends with their links and event dates embedded
+    for friend in friends:
+        friend["user_friends_events"] = [{"events": {"event_date": event["event_date"]}} for event in events]
+    return {
+        "user_friends": [
+            {"id": i, "friend_id": friend["id"], "created_at": friend["created_at"]}
+            for i, friend in enumerate(friends)
+        ],
+        "friends": friends,
+        "user_friends_events": links,
+        "events": events,
+    }
+
+def count_queries(client: TestClient, friend_count: int) -> int:
+    mock_supabase = MockSupabase(make_tables(friend_count))
+    with patch("app.services.user_timeline.supabase", mock_supabase), \
+         patch("app.services.friend_stats.supabase", mock_supabase):
+        response = client.get(f"{settings.API_V1_STR}/friends/user/{USER_ID}")
+    assert response.status_code == 200
+    assert len(response.json()) == min(friend_count, 100)
+    return mock_supabase.queries
+
+def test_read_user_friends_stats(client: TestClient) -> None:
+    mock_supabase = MockSupabase(make_tables(2))
+    with patch("app.services.user_timeline.supabase", mock_supabase), \
+         patch("app.services.friend_stats.supabase", mock_supabase):
+        response = client.get(f"{settings.API_V1_STR}/friends/user/{USER_ID}")
+    assert response.status_code == 200
+    for friend in response.json():
+        assert friend["event_count"] == 3
+        assert friend["last_event_date"].startswith("2023-01-03")
+
+def test_read_user_friends_query_count_is_flat(client: TestClient) -> None:
+    counts = [count_queries(client, n) for n in (1, 10, 200)]
+    assert counts == [3, 3, 3]
+
+def test_read_user_friends_stats_query(client: TestClient, supabase_tracer) -> None:
+    tracer = supabase_tracer(MockSupabase(make_tables(2)))
+    client.get(f"{settings.API_V1_STR}/friends/user/{USER_ID}")
+    stats = tracer.queries[-1]
+    assert stats.table == "friends"
+    assert stats.calls[0] == ("select", ("id, user_friends_events(events(event_date))",), {})
+    # The links come embedded in the friends, so there is no growing list of event ids
+    assert [method for method, _, _ in stats.filters] == ["in_"]
+
+def test_read_friend_is_cached_and_kept_consistent(client: TestClient, entity_cache: MemoryCache) -> None:
+    friend = {"id": str(uuid4()), "friend_name": "Sam", "created_at": "2023-01-01T00:00:00"}
+    mock_supabase = MockSupabase({"friends": [friend]})
+    url = f"{settings.API_V1_STR}/friends/{friend['id']}"
+    with patch("app.api.api_v1.endpoints.friends.supabase", mock_supabase), \
+         patch("app.services.entity_cache.supabase", mock_supabase):
+        assert client.get(url).json()["friend_name"] == "Sam"
+        assert client.get(url).json()["friend_name"] == "Sam"
+        assert mock_supabase.queries == 1
+
+        # Updates refresh the cached row
+        mock_supabase.tables["friends"] = [{**friend, "friend_name": "Samantha"}]
+        assert client.put(url, json={"friend_name": "Samantha"}).status_code == 200
+        assert client.get(url).json()["friend_name"] == "Samantha"
+        assert mock_supabase.queries == 2
+
+        # Deletes drop it
+        assert client.delete(url).status_code == 200
+        mock_supabase.tables["friends"] = []
+        assert client.get(url).status_code == 404
+        assert mock_supabase.queries == 4
+
+    response = client.get(f"{settings.API_V1_STR}/cache/entities")
+    assert response.json()["backend"] == "MemoryCache"
+    assert response.json()["hit_ratio"] == 0.5
@@ -0,0 +1,131 @@
+import asyncio
+from contextlib import ExitStack
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+from app.core.cache import MemoryCache, SQLiteCache
+from app.core.config import settings
+
+from tests.utils.supabase import MockSupabase
+
+USER_ID = "123e4567-e89b-12d3-a456-426614174000"
+FRIEND_ID = "223e4567-e89b-12d3-a456-426614174000"
+EVENT_ID = "323e4567-e89b-12d3-a456-426614174000"
+
+@pytest.fixture(autouse=True)
+def caches(tmp_path):
+    with patch("app.services.audio_pipeline.transcript_cache", SQLiteCache(str(tmp_path / "transcripts.sqlite3"), max_bytes=1024 * 1024)), \
+         patch("app.services.audio_pipeline.analysis_cache", SQLiteCache(str(tmp_path / "analysis.sqlite3"), max_bytes=1024 * 1024)), \
+         patch("app.services.entity_cache.entity_cache", MemoryCache(max_bytes=1024 * 1024)):
+        yield
+
+@pytest.fixture
+def enqueue_quiz_pregeneration():
+    with patch("app.services.ingest.enqueue_quiz_pregeneration") as mock:
+        yield mock
+
+def make_tables():
+    return {
+        "friends": [{"id": FRIEND_ID, "friend_name": "Sam", "created_at": "2023-01-01T00:00:00"}],
+        "events": [{"id": EVENT_ID, "event_name": "Hike", "event_date": "2023-01-01", "created_at": "2023-01-01T00:00:00"}],
+        "user_friends": [{"id": 1, "user_id": USER_ID, "friend_id": FRIEND_ID}],
+        "user_events": [{"id": 2, "user_id": USER_ID, "event_id": EVENT_ID}],
+        "user_friends_events": [{"id": 3, "user_id": USER_ID, "friend_id": FRIEND_ID, "event_id": EVENT_ID}],
+        "event_person_topics_content": [
+            {"id": 10, "user_friend_event_id": 3, "topic": "Hiking", "content": "We hiked", "created_at": "2023-01-01T00:00:00"}
+        ],
+    }
+
+def patch_services(mock_supabase):
+    stack = ExitStack()
+    stack.enter_context(patch("app.services.ingest.supabase", mock_supabase))
+    stack.enter_context(patch("app.services.entity_cache.supabase", mock_supabase))
+    stack.enter_context(patch("app.services.audio_pipeline.transcribe_file", AsyncMock(return_value=SimpleNamespace(
+        results=SimpleNamespace(channels=[SimpleNamespace(alternatives=[SimpleNamespace(transcript="We went hiking")])])
+    ))))
+    stack.enter_context(patch("app.services.audio_pipeline.create_message", AsyncMock(return_value=SimpleNamespace(
+        stop_reason="end_turn", content=[SimpleNamespace(text='{"topics": [{"topic": "Hiking", "content": "We hiked"}]}')]
+    ))))
+    return stack
+
+def ingest(client: TestClient, **data):
+    return client.post(
+        f"{settings.API_V1_STR}/ingest/",
+        files={"audio": ("memo.m4a", b"fake audio bytes", "audio/m4a")},
+        data={"user_id": USER_ID, **data},
+    )
+
+def test_ingest_new_friend_and_event(client: TestClient, enqueue_quiz_pregeneration) -> None:
+    mock_supabase = MockSupabase(make_tables())
+    with patch_services(mock_supabase):
+        response = ingest(client, friend_name="Sam", event_name="Hike", event_date="2023-01-01")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["transcript"] == "We went hiking"
+    assert body["friend_id"] == FRIEND_ID
+    assert body["user_friend_event_id"] == 3
+    assert [item["topic"] for item in body["content"]] == ["Hiking"]
+    assert set(body["timings"]) == {"transcribe", "analyze", "relations", "content", "total"}
+    assert "relations;dur=" in response.headers["server-timing"]
+    enqueue_quiz_pregeneration.assert_called_once_with(USER_ID, FRIEND_ID)
+
+    inserted = [(table, args[0]) for table, method, args, _ in mock_supabase.calls if method == "insert"]
+    assert ("friends", {"friend_name": "Sam"}) in inserted
+    assert ("events", {"event_name": "Hike", "event_date": "2023-01-01"}) in inserted
+    assert ("event_person_topics_content", [{"user_friend_event_id": 3, "topic": "Hiking", "content": "We hiked"}]) in inserted
+    assert not [call for call in mock_supabase.calls if call[1] == "delete"]
+
+def test_ingest_failure_deletes_created_rows(client: TestClient, enqueue_quiz_pregeneration) -> None:
+    tables = make_tables()
+    tables["event_person_topics_content"] = []
+    mock_supabase = MockSupabase(tables)
+    with patch_services(mock_supabase):
+        response = ingest(client, friend_name="Sam", event_name="Hike")
+    assert response.status_code == 400
+
+    deleted = [table for table, method, _, _ in mock_supabase.calls if method == "delete"]
+    assert set(deleted) == {"friends", "events", "user_friends", "user_events", "user_friends_events"}
+    # Links go before the rows they point at
+    assert deleted.index("user_friends_events") < min(deleted.index("friends"), deleted.index("events"))
+    enqueue_quiz_pregeneration.assert_not_called()
+
+class SlowFriendResponses(MockSupabase):
+    # Friend rows are committed at once, but the response arrives late
+    def table(self, name):
+        query = super().table(name)
+        if name == "friends":
+            execute = query.execute
+
+            async def slow_execute():
+                response = await execute()
+                await asyncio.sleep(0.05)
+                return response
+
+            query.execute = slow_execute
+        return query
+
+def test_ingest_failure_waits_for_in_flight_writes(client: TestClient, enqueue_quiz_pregeneration) -> None:
+    tables = make_tables()
+    # Creating the event fails while the friend insert is still in flight
+    tables["events"] = []
+    mock_supabase = SlowFriendResponses(tables)
+    with patch_services(mock_supabase):
+        response = ingest(client, friend_name="Sam", event_name="Hike")
+    assert response.status_code == 400
+
+    deleted = [(table, args) for table, method, args, _ in mock_supabase.calls if method == "in_"]
+    assert ("friends", ("id", [FRIEND_ID])) in deleted
+
+def test_ingest_existing_friend_and_event_writes_nothing_on_analysis_failure(client: TestClient, enqueue_quiz_pregeneration) -> None:
+    mock_supabase = MockSupabase(make_tables())
+    with patch_services(mock_supabase), \
+         patch("app.services.audio_pipeline.create_message", AsyncMock(side_effect=asyncio.TimeoutError)):
+        response = ingest(client, friend_id=FRIEND_ID, event_id=EVENT_ID)
+    assert response.status_code == 504
+    assert {method for _, method, _, _ in mock_supabase.calls} <= {"select", "eq"}
+
+def test_ingest_requires_friend_and_event(client: TestClient) -> None:
+    assert ingest(client, event_name="Hike").status_code == 422
+    assert ingest(client, friend_name="Sam").status_code == 422
@@ -0,0 +1,247 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from app.core.cache import SQLiteCache
+from app.core.config import settings
+from app.core.jobs import JobQueue
+from app.services.audio_jobs import process_audio_job
+
+from tests.utils.claude import FakeStream, read_events
+
+@pytest.fixture(autouse=True)
+def transcript_cache(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "transcripts.sqlite3"), max_bytes=1024 * 1024)
+    with patch("app.services.audio_pipeline.transcript_cache", cache):
+        yield cache
+
+@pytest.fixture(autouse=True)
+def analysis_cache(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "analysis.sqlite3"), max_bytes=1024 * 1024, ttl=60)
+    with patch("app.services.audio_pipeline.analysis_cache", cache):
+        yield cache
+
+@pytest.fixture
+def audio_jobs(tmp_path):
+    # No background workers: tests drain the queue with run_once
+    queue = JobQueue(str(tmp_path / "audio_jobs.sqlite3"), handler=process_audio_job, concurrency=0)
+    with patch("app.services.audio_jobs.audio_jobs", queue), \
+         patch("app.services.audio_jobs.AUDIO_SPOOL_DIR", str(tmp_path / "spool")):
+        yield queue
+
+def audio_failures(endpoint, status):
+    return REGISTRY.get_sample_value(
+        "recallo_audio_processing_failures_total", {"endpoint": endpoint, "status": status},
+    ) or 0.0
+
+def make_transcription(transcript):
+    alternative = SimpleNamespace(transcript=transcript)
+    channel = SimpleNamespace(alternatives=[alternative])
+    return SimpleNamespace(results=SimpleNamespace(channels=[channel]))
+
+def make_message(text):
+    return SimpleNamespace(stop_reason="end_turn", content=[SimpleNamespace(text=text)])
+
+def post_audio(client: TestClient, **data):
+    return client.post(
+        f"{settings.API_V1_STR}/process_audio/",
+        files={"audio": ("memo.m4a", b"fake audio bytes", "audio/m4a")},
+        data=data,
+    )
+
+def test_process_audio(client: TestClient) -> None:
+    received = []
+
+    async def fake_transcribe(audio, **options):
+        # The upload is streamed as chunks rather than read into one buffer
+        async for chunk in audio:
+            received.append(chunk)
+        assert options["model"] == "nova-3"
+        return make_transcription("We went hiking")
+
+    with patch("app.services.audio_pipeline.transcribe_file", fake_transcribe), \
+         patch("app.services.audio_pipeline.create_message", AsyncMock(return_value=make_message('{"topics": [{"topic": "Hiking", "content": "We hiked"}]}'))):
+        response = post_audio(client, friend_name="Sam")
+    assert response.status_code == 200
+    assert response.json() == {"topics": [{"topic": "Hiking", "content": "We hiked"}]}
+    assert b"".join(received) == b"fake audio bytes"
+
+def test_process_audio_too_large(client: TestClient) -> None:
+    with patch.object(settings, "MAX_AUDIO_UPLOAD_BYTES", 4), \
+         patch("app.services.audio_pipeline.transcribe_file", AsyncMock()) as mock_transcribe:
+        response = post_audio(client)
+    assert response.status_code == 413
+    mock_transcribe.assert_not_called()
+
+def test_process_audio_transcription_timeout(client: TestClient) -> None:
+    before = audio_failures("process_audio", "504")
+    with patch("app.services.audio_pipeline.transcribe_file", AsyncMock(side_effect=asyncio.TimeoutError)):
+        response = post_audio(client)
+    assert response.status_code == 504
+    assert audio_failures("process_audio", "504") == before + 1
+
+def test_process_audio_logs_and_counts_unexpected_errors(client: TestClient, caplog) -> None:
+    before = audio_failures("process_audio", "500")
+    with patch("app.services.audio_pipeline.transcribe_file", AsyncMock(side_effect=RuntimeError("boom"))), \
+         caplog.at_level("ERROR", logger="app.api.api_v1.endpoints.process_audio"):
+        response = post_audio(client)
+    assert response.status_code == 500
+    assert response.json()["detail"] == "boom"
+    assert caplog.records[-1].exc_info[0] is RuntimeError
+    assert audio_failures("process_audio", "500") == before + 1
+
+def test_process_audio_reuses_cached_transcript(client: TestClient, transcript_cache: SQLiteCache) -> None:
+    mock_transcribe = AsyncMock(return_value=make_transcription("We went hiking"))
+    with patch("app.services.audio_pipeline.transcribe_file", mock_transcribe), \
+         patch("app.services.audio_pipeline.create_message", AsyncMock(return_value=make_message('{"topics": []}'))):
+        assert post_audio(client, remarks="mountains").status_code == 200
+        assert post_audio(client, remarks="mountains").status_code == 200
+        # Different keyterms are a different transcription
+        assert post_audio(client, remarks="lakeside").status_code == 200
+    assert mock_transcribe.await_count == 2
+
+    response = client.get(f"{settings.API_V1_STR}/process_audio/cache")
+    assert response.status_code == 200
+    assert response.json()["transcripts"]["hits"] == 1
+    assert response.json()["transcripts"]["misses"] == 2
+    assert response.json()["transcripts"]["entries"] == 2
+
+def test_process_audio_reuses_cached_analysis(client: TestClient) -> None:
+    mock_create_message = AsyncMock(return_value=make_message('{"topics": [{"topic": "Hiking", "content": "We hiked"}]}'))
+    with patch("app.services.audio_pipeline.transcribe_file", AsyncMock(return_value=make_transcription("We went hiking"))), \
+         patch("app.services.audio_pipeline.create_message", mock_create_message):
+        first = post_audio(client, friend_name="Sam")
+        second = post_audio(client, friend_name="Sam")
+        assert mock_create_message.await_count == 1
+        # Another friend is a different analysis
+        post_audio(client, friend_name="Alex")
+        assert mock_create_message.await_count == 2
+        # A prompt edit invalidates previous results
+        with patch("app.services.audio_pipeline.ANALYSIS_PROMPT_VERSION", 2):
+            post_audio(client, friend_name="Sam")
+        assert mock_create_message.await_count == 3
+    assert first.json() == second.json()
+
+def test_process_audio_stream(client: TestClient) -> None:
+    document = '```json\n{"topics": [{"topic": "Hiking", "content": "We hiked"}, {"topic": "Food", "content": "We ate {ramen}"}]}\n```'
+
+    def fake_stream_message(**kwargs):
+        return FakeStream(document)
+
+    with patch("app.services.audio_pipeline.transcribe_file", AsyncMock(return_value=make_transcription("We went hiking"))), \
+         patch("app.services.audio_pipeline.stream_message", fake_stream_message):
+        response = client.post(
+            f"{settings.API_V1_STR}/process_audio/stream",
+            files={"audio": ("memo.m4a", b"fake audio bytes", "audio/m4a")},
+            data={"friend_name": "Sam"},
+        )
+    assert response.status_code == 200
+    events = read_events(response)
+    assert [name for name, _ in events] == ["received", "transcribed", "topic", "topic", "done"]
+    assert events[0][1]["bytes"] == len(b"fake audio bytes")
+    assert events[1][1]["transcript"] == "We went hiking"
+    assert events[1][1]["cached"] is False
+    assert events[3][1]["content"] == "We ate {ramen}"
+    assert set(events[4][1]["timings"]) == {"transcribe_ms", "analyze_ms"}
+    assert all("elapsed_ms" in data for _, data in events)
+
+    # The streamed topics are cached for the buffered endpoint too
+    with patch("app.services.audio_pipeline.create_message", AsyncMock()) as mock_create_message:
+        response = post_audio(client, friend_name="Sam")
+    assert response.json()["topics"][1]["topic"] == "Food"
+    mock_create_message.assert_not_called()
+
+@pytest.mark.parametrize("document, stop_reason", [
+    # Cut off mid-way through the second topic
+    ('{"topics": [{"topic": "Hiking", "content": "We hiked"}, {"topic": "Fo', "max_tokens"),
+    # A topic without content is dropped
+    ('{"topics": [{"topic": "Hiking", "content": "We hiked"}, {"topic": "Food"}]}', "end_turn"),
+])
+def test_process_audio_stream_does_not_cache_partial_topics(client: TestClient, document, stop_reason) -> None:
+    with patch("app.services.audio_pipeline.transcribe_file", AsyncMock(return_value=make_transcription("We went hiking"))), \
+         patch("app.services.audio_pipeline.stream_message", lambda **kwargs: FakeStream(document, stop_reason=stop_reason)):
+        response = client.post(
+            f"{settings.API_V1_STR}/process_audio/stream",
+            files={"audio": ("memo.m4a", b"fake audio bytes", "audio/m4a")},
+            data={"friend_name": "Sam"},
+        )
+    assert [name for name, _ in read_events(response)] == ["received", "transcribed", "topic", "done"]
+
+    with patch("app.services.audio_pipeline.create_message", AsyncMock(return_value=make_message('{"topics": []}'))) as mock_create_message:
+        post_audio(client, friend_name="Sam")
+    mock_create_message.assert_awaited_once()
+
+def test_process_audio_stream_reports_errors(client: TestClient) -> None:
+    with patch("app.services.audio_pipeline.transcribe_file", AsyncMock(side_effect=asyncio.TimeoutError)):
+        response = client.post(
+            f"{settings.API_V1_STR}/process_audio/stream",
+            files={"audio": ("memo.m4a", b"fake audio bytes", "audio/m4a")},
+        )
+    events = read_events(response)
+    assert [name for name, _ in events] == ["received", "error"]
+    assert events[1][1]["status_code"] == 504
+
+def test_process_audio_stream_logs_unexpected_errors(client: TestClient, caplog) -> None:
+    before = audio_failures("process_audio_stream", "500")
+    with patch("app.services.audio_pipeline.transcribe_file", AsyncMock(side_effect=RuntimeError("boom"))), \
+         caplog.at_level("ERROR", logger="app.api.api_v1.endpoints.process_audio"):
+        response = client.post(
+            f"{settings.API_V1_STR}/process_audio/stream",
+            files={"audio": ("memo.m4a", b"fake audio bytes", "audio/m4a")},
+        )
+    events = read_events(response)
+    assert events[-1] == ("error", {"status_code": 500, "detail": "boom", "elapsed_ms": events[-1][1]["elapsed_ms"]})
+    assert caplog.records[-1].exc_info[0] is RuntimeError
+    assert audio_failures("process_audio_stream", "500") == before + 1
+
+def submit_audio(client: TestClient, **data):
+    return client.post(
+        f"{settings.API_V1_STR}/process_audio/jobs",
+        files={"audio": ("memo.m4a", b"fake audio bytes", "audio/m4a")},
+        data=data,
+    )
+
+def test_process_audio_job(client: TestClient, audio_jobs: JobQueue, tmp_path) -> None:
+    mock_transcribe = AsyncMock(return_value=make_transcription("We went hiking"))
+    with patch("app.services.audio_pipeline.transcribe_file", mock_transcribe), \
+         patch("app.services.audio_pipeline.create_message", AsyncMock(return_value=make_message('{"topics": [{"topic": "Hiking", "content": "We hiked"}]}'))):
+        response = submit_audio(client, friend_name="Sam")
+        assert response.status_code == 202
+        job_id = response.json()["id"]
+        assert response.json()["status"] == "queued"
+        # Resubmitting the same recording joins the queued job
+        assert submit_audio(client, friend_name="Sam").json()["id"] == job_id
+        assert audio_jobs.counts()["queued"] == 1
+
+        assert asyncio.run(audio_jobs.run_once())
+        response = client.get(f"{settings.API_V1_STR}/process_audio/jobs/{job_id}")
+        assert response.status_code == 200
+        assert response.json()["status"] == "done"
+        assert response.json()["result"] == {"transcript": "We went hiking", "topics": [{"topic": "Hiking", "content": "We hiked"}]}
+
+        # A finished job is returned as is, without running again
+        response = submit_audio(client, friend_name="Sam")
+        assert response.json()["id"] == job_id
+        assert response.json()["status"] == "done"
+        assert not asyncio.run(audio_jobs.run_once())
+        # Other parameters are another job
+        assert submit_audio(client, friend_name="Alex").json()["id"] != job_id
+    assert mock_transcribe.await_count == 1
+    assert len(list((tmp_path / "spool").iterdir())) == 1
+
+def test_process_audio_job_failure_can_be_resubmitted(client: TestClient, audio_jobs: JobQueue) -> None:
+    with patch("app.services.audio_pipeline.transcribe_file", AsyncMock(side_effect=asyncio.TimeoutError)):
+        job_id = submit_audio(client).json()["id"]
+        asyncio.run(audio_jobs.run_once())
+    response = client.get(f"{settings.API_V1_STR}/process_audio/jobs/{job_id}")
+    assert response.json()["status"] == "failed"
+    assert response.json()["error"] == "Transcription timed out"
+
+    assert submit_audio(client).json()["status"] == "queued"
+
+def test_read_process_audio_job_not_found(client: TestClient, audio_jobs: JobQueue) -> None:
+    response = client.get(f"{settings.API_V1_STR}/process_audio/jobs/missing")
+    assert response.status_code == 404
@@ -0,0 +1,228 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from app.core.cache import SQLiteCache
+from app.core.config import settings
+from app.core.jobs import JobQueue
+from app.services.quiz_jobs import pregenerate_quiz
+
+from tests.utils.claude import FakeStream, read_events
+from tests.utils.memory_supabase import MemorySupabase
+from tests.utils.supabase import MockSupabase
+
+USER_ID = "123e4567-e89b-12d3-a456-426614174000"
+FRIEND_ID = "223e4567-e89b-12d3-a456-426614174000"
+EVENT_IDS = ["323e4567-e89b-12d3-a456-426614174000", "423e4567-e89b-12d3-a456-426614174000"]
+
+QUIZ = {
+    "questions": [
+        {
+            "question": "Where did we go hiking?",
+            "options": ["Alps", "Andes", "Rockies", "Atlas"],
+            "correct_answer": 0,
+            "topic": "Hiking",
+            "explanation": "We hiked in the Alps",
+        }
+    ]
+}
+
+def make_tables():
+    return {
+        "user_friends_events": [
+            {"id": i + 1, "event_id": event_id, "user_id": USER_ID, "friend_id": FRIEND_ID}
+            for i, event_id in enumerate(EVENT_IDS)
+        ],
+        "event_person_topics_content": [
+            {"id": 1, "user_friend_event_id": 1, "topic": "Hiking", "content": "We hiked in the Alps", "created_at": "2023-01-01T00:00:00"}
+        ],
+        "events": [
+            {"id": event_id, "event_name": f"Event {i}", "event_date": "2023-01-01"}
+            for i, event_id in enumerate(EVENT_IDS)
+        ],
+        "friends": [{"friend_name": "Sam"}],
+    }
+
+@pytest.fixture
+def mock_supabase(tmp_path):
+    mock = MockSupabase(make_tables())
+    cache = SQLiteCache(str(tmp_path / "quizzes.sqlite3"), max_bytes=1024 * 1024)
+    with patch("app.api.api_v1.endpoints.quiz.supabase", mock), \
+         patch("app.api.api_v1.endpoints.content.supabase", mock), \
+         patch("app.services.quiz_generator.supabase", mock), \
+         patch("app.services.quiz_cache.supabase", mock), \
+         patch("app.services.quiz_cache.quiz_cache", cache):
+        yield mock
+
+@pytest.fixture
+def mock_create_message():
+    message = SimpleNamespace(content=[SimpleNamespace(text=json.dumps(QUIZ))])
+    with patch("app.services.quiz_generator.create_message", AsyncMock(return_value=message)) as mock:
+        yield mock
+
+@pytest.fixture
+def quiz_jobs(tmp_path):
+    # A queue without workers, drained by the test itself
+    queue = JobQueue(str(tmp_path / "quiz_jobs.sqlite3"), handler=pregenerate_quiz, concurrency=0)
+    with patch("app.services.quiz_jobs.quiz_jobs", queue), \
+         patch("app.api.api_v1.endpoints.quiz.quiz_jobs", queue):
+        yield queue
+
+def generate(client: TestClient):
+    return client.post(f"{settings.API_V1_STR}/quiz/generate", json={"user_id": USER_ID, "friend_id": FRIEND_ID})
+
+def test_generate_quiz(client: TestClient, mock_supabase: MockSupabase, mock_create_message: AsyncMock) -> None:
+    response = generate(client)
+    assert response.status_code == 200
+    assert response.json()["friend_name"] == "Sam"
+    assert response.json()["questions"][0]["question"] == QUIZ["questions"][0]["question"]
+
+def test_generate_quiz_is_cached(client: TestClient, mock_supabase: MockSupabase, mock_create_message: AsyncMock) -> None:
+    first = generate(client)
+    mock_supabase.queries = 0
+    second = generate(client)
+    assert second.json() == first.json()
+    assert mock_create_message.await_count == 1
+    # The relations and watermark decide a hit; the friend, content and events
+    # prefetched alongside them go unused
+    assert mock_supabase.queries == 5
+
+def test_generate_quiz_cache_follows_content_watermark(client: TestClient, mock_supabase: MockSupabase, mock_create_message: AsyncMock) -> None:
+    generate(client)
+    mock_supabase.tables["event_person_topics_content"].insert(
+        0, {"id": 2, "user_friend_event_id": 2, "topic": "Food", "content": "We had ramen", "created_at": "2023-01-02T00:00:00"}
+    )
+    generate(client)
+    assert mock_create_message.await_count == 2
+
+def test_update_content_invalidates_quiz(client: TestClient, mock_supabase: MockSupabase, mock_create_message: AsyncMock) -> None:
+    generate(client)
+    response = client.put(f"{settings.API_V1_STR}/content/1", json={"content": "We hiked in the Andes"})
+    assert response.status_code == 200
+    generate(client)
+    assert mock_create_message.await_count == 2
+
+def test_bulk_content_pregenerates_quiz(client: TestClient, mock_supabase: MockSupabase, mock_create_message: AsyncMock, quiz_jobs: JobQueue) -> None:
+    bulk = {"user_friend_event_id": 1, "topics": [{"topic": "Food", "content": "We had ramen"}]}
+    assert client.post(f"{settings.API_V1_STR}/content/bulk", json=bulk).status_code == 200
+    # A second upload for the same pair coalesces into the queued job
+    assert client.post(f"{settings.API_V1_STR}/content/bulk", json=bulk).status_code == 200
+    assert client.get(f"{settings.API_V1_STR}/quiz/jobs").json()["queued"] == 1
+
+    assert asyncio.run(quiz_jobs.run_once())
+    assert not asyncio.run(quiz_jobs.run_once())
+
+    response = client.get(f"{settings.API_V1_STR}/quiz/jobs/{USER_ID}/{FRIEND_ID}")
+    assert response.status_code == 200
+    assert response.json()["status"] == "done"
+
+    # The quiz is then served from the precomputed result
+    assert generate(client).status_code == 200
+    assert mock_create_message.await_count == 1
+
+def test_read_quiz_job_not_found(client: TestClient, quiz_jobs: JobQueue) -> None:
+    response = client.get(f"{settings.API_V1_STR}/quiz/jobs/{USER_ID}/{FRIEND_ID}")
+    assert response.status_code == 404
+
+def test_generate_quiz_stream(client: TestClient, mock_supabase: MockSupabase) -> None:
+    document = json.dumps({"questions": QUIZ["questions"] * 3})
+    calls = []
+
+    def fake_stream_message(**kwargs):
+        calls.append(kwargs)
+        return FakeStream(document, size=7)
+
+    with patch("app.services.quiz_generator.stream_message", fake_stream_message):
+        response = client.post(f"{settings.API_V1_STR}/quiz/generate/stream", json={"user_id": USER_ID, "friend_id": FRIEND_ID})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = read_events(response)
+        assert [name for name, _ in events] == ["start", "question", "question", "question", "done"]
+        assert events[0][1] == {"friend_name": "Sam"}
+        assert events[1][1]["index"] == 0
+        assert events[1][1]["question"] == QUIZ["questions"][0]["question"]
+        assert events[-1][1] == {"count": 3}
+
+        # The streamed quiz is cached for both endpoints
+        response = client.post(f"{settings.API_V1_STR}/quiz/generate/stream", json={"user_id": USER_ID, "friend_id": FRIEND_ID})
+        assert [name for name, _ in read_events(response)] == ["start", "question", "question", "question", "done"]
+        assert len(generate(client).json()["questions"]) == 3
+    assert len(calls) == 1
+
+def test_generate_quiz_stream_does_not_cache_partial_quiz(client: TestClient, mock_supabase: MockSupabase, mock_create_message: AsyncMock) -> None:
+    # Claude ran out of tokens after two questions
+    document = json.dumps({"questions": QUIZ["questions"] * 3})
+    document = document[:document.rindex('{"question"')]
+    with patch("app.services.quiz_generator.stream_message", lambda **kwargs: FakeStream(document, stop_reason="max_tokens")):
+        response = client.post(f"{settings.API_V1_STR}/quiz/generate/stream", json={"user_id": USER_ID, "friend_id": FRIEND_ID})
+    assert [name for name, _ in read_events(response)] == ["start", "question", "question", "done"]
+
+    # The next request generates a full quiz instead of serving the partial one
+    assert generate(client).status_code == 200
+    mock_create_message.assert_awaited_once()
+
+def test_generate_quiz_stream_not_enough_interactions(client: TestClient, mock_supabase: MockSupabase) -> None:
+    mock_supabase.tables["user_friends_events"] = mock_supabase.tables["user_friends_events"][:1]
+    response = client.post(f"{settings.API_V1_STR}/quiz/generate/stream", json={"user_id": USER_ID, "friend_id": FRIEND_ID})
+    assert response.status_code == 400
+
+def test_generate_quiz_runs_independent_queries_concurrently(client: TestClient, mock_supabase: MockSupabase, mock_create_message: AsyncMock) -> None:
+    mock_supabase.latency = 0.01
+    assert generate(client).status_code == 200
+    # The friend is fetched with the relations, then content and events with the watermark
+    selects = [table for table, method, _, _ in mock_supabase.calls if method == "select"]
+    assert selects == ["user_friends_events", "friends", "event_person_topics_content", "events", "event_person_topics_content"]
+    assert mock_supabase.max_in_flight == 3
+
+def make_content_tables():
+    other_friend_id = str(uuid4())
+    event_ids = [str(uuid4()) for _ in range(4)]
+    return {
+        "user_friends_events": [
+            {"id": i + 1, "event_id": event_id, "user_id": USER_ID, "friend_id": FRIEND_ID if i < 3 else other_friend_id}
+            for i, event_id in enumerate(event_ids)
+        ],
+        "event_person_topics_content": [
+            {"id": i + 1, "user_friend_event_id": i + 1, "topic": f"Topic {i}", "content": f"Content {i}", "created_at": f"2023-01-0{i + 1}T00:00:00"}
+            for i in range(4)
+        ],
+        "events": [
+            {"id": event_id, "event_name": f"Event {i}", "event_date": f"2023-01-0{i + 1}"}
+            for i, event_id in enumerate(event_ids)
+        ],
+    }, event_ids
+
+@pytest.mark.query_budget(3)
+def test_get_friend_content(client: TestClient, supabase_tracer) -> None:
+    tables, event_ids = make_content_tables()
+    tracer = supabase_tracer(MemorySupabase(tables, latency=0.01))
+    url = f"{settings.API_V1_STR}/quiz/content/{USER_ID}/{FRIEND_ID}"
+
+    response = client.get(url, params={"limit": 2})
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["topic"] for item in body["content"]] == ["Topic 0", "Topic 1"]
+    assert "user_friends_events" not in body["content"][0]
+    # Only the relations and events the page's content belongs to, read at once
+    assert sorted(rel["id"] for rel in body["relations"]) == [1, 2]
+    assert sorted(event["id"] for event in body["events"]) == sorted(event_ids[:2])
+    filters = {query.table: query.filters for query in tracer.queries[1:]}
+    assert sorted(filters["user_friends_events"][0][1][1]) == [1, 2]
+    assert sorted(filters["events"][0][1][1]) == sorted(event_ids[:2])
+    first, second = sorted(tracer.queries[1:], key=lambda query: query.start)
+    assert second.start < first.start + first.duration
+
+    body = client.get(url, params={"limit": 2, "cursor": response.headers["X-Next-Cursor"]}).json()
+    assert [item["topic"] for item in body["content"]] == ["Topic 2"]
+    assert [rel["id"] for rel in body["relations"]] == [3]
+    assert [event["id"] for event in body["events"]] == [event_ids[2]]
+
+def test_get_friend_content_without_content(client: TestClient, supabase_tracer) -> None:
+    tracer = supabase_tracer(MemorySupabase(make_content_tables()[0]))
+    response = client.get(f"{settings.API_V1_STR}/quiz/content/{USER_ID}/{uuid4()}")
+    assert response.json() == {"events": [], "content": [], "relations": []}
+    assert [query.table for query in tracer.queries] == ["event_person_topics_content"]
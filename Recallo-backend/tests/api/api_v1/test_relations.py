@@ -0,0 +1,61 @@
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from app.core.config import settings
+
+from tests.utils.memory_supabase import MemorySupabase
+from tests.utils.supabase import MockSupabase
+
+USER_ID = "123e4567-e89b-12d3-a456-426614174000"
+FRIEND_IDS = ["223e4567-e89b-12d3-a456-426614174000", "323e4567-e89b-12d3-a456-426614174000"]
+EVENT_ID = "423e4567-e89b-12d3-a456-426614174000"
+
+def test_create_user_friends_events_bulk(client: TestClient) -> None:
+    stored = [
+        {"id": i + 1, "user_id": USER_ID, "friend_id": friend_id, "event_id": EVENT_ID, "created_at": "2023-01-01T00:00:00"}
+        for i, friend_id in enumerate(FRIEND_IDS)
+    ]
+    mock_supabase = MockSupabase({"user_friends_events": stored})
+    payload = [
+        {"user_id": USER_ID, "friend_id": friend_id, "event_id": EVENT_ID}
+        # The second friend is sent twice, as a retried request would
+        for friend_id in FRIEND_IDS + FRIEND_IDS[1:]
+    ]
+    with patch("app.api.api_v1.endpoints.relations.supabase", mock_supabase):
+        response = client.post(f"{settings.API_V1_STR}/relations/user-friends-events/bulk", json=payload)
+    assert response.status_code == 200
+    assert [relation["id"] for relation in response.json()] == [1, 2]
+
+    # One statement, upserting on the natural key, with UUIDs as strings and duplicates removed
+    assert mock_supabase.queries == 1
+    (table, method, args, kwargs), = [call for call in mock_supabase.calls if call[1] == "upsert"]
+    assert table == "user_friends_events"
+    assert kwargs["on_conflict"] == "user_id,friend_id,event_id"
+    assert kwargs["ignore_duplicates"] is True
+    assert args[0] == payload[:2]
+
+def test_create_user_friends_bulk_keeps_existing_rows(client: TestClient) -> None:
+    existing = {"id": 7, "user_id": USER_ID, "friend_id": FRIEND_IDS[0], "username": "sam", "friendname": "Alex", "created_at": "2023-01-01T00:00:00"}
+    memory = MemorySupabase({"user_friends": [dict(existing)]})
+    payload = [{"user_id": USER_ID, "friend_id": friend_id} for friend_id in FRIEND_IDS]
+    with patch("app.api.api_v1.endpoints.relations.supabase", memory):
+        response = client.post(f"{settings.API_V1_STR}/relations/user-friends/bulk", json=payload)
+    assert response.status_code == 200
+    relations = response.json()
+    assert [relation["friend_id"] for relation in relations] == FRIEND_IDS
+    assert relations[0]["id"] == 7
+
+    # Re-linking does not null out the stored names
+    assert memory.tables["user_friends"][0] == existing
+    assert relations[0]["username"] == "sam" and relations[0]["friendname"] == "Alex"
+    assert len(memory.tables["user_friends"]) == 2
+
+def test_create_user_friends_bulk_validates(client: TestClient) -> None:
+    mock_supabase = MockSupabase({"user_friends": []})
+    with patch("app.api.api_v1.endpoints.relations.supabase", mock_supabase):
+        response = client.post(f"{settings.API_V1_STR}/relations/user-friends/bulk", json=[{"user_id": "nope", "friend_id": FRIEND_IDS[0]}])
+        assert response.status_code == 422
+        response = client.post(f"{settings.API_V1_STR}/relations/user-events/bulk", json=[])
+        assert response.status_code == 200
+        assert response.json() == []
+    assert mock_supabase.queries == 0
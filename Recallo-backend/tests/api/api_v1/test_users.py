@@ -0,0 +1,67 @@
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from app.core.config import settings
+
+from tests.utils.supabase import MockSupabase
+
+USER_ID = "123e4567-e89b-12d3-a456-426614174000"
+
+def make_tables():
+    friends = [
+        {"id": str(uuid4()), "friend_name": f"Friend {i}", "created_at": "2023-01-01T00:00:00"}
+        for i in range(2)
+    ]
+    events = [
+        {"id": str(uuid4()), "event_name": f"Event {i}", "event_date": f"2023-01-0{i + 1}", "created_at": "2023-01-01T00:00:00"}
+        for i in range(3)
+    ]
+    links = [
+        {"id": i * 10 + j, "event_id": event["id"], "friend_id": friend["id"]}
+        for i, event in enumerate(events)
+        for j, friend in enumerate(friends)
+    ]
+    for friend in friends:
+        friend["user_friends_events"] = [{"events": {"event_date": event["event_date"]}} for event in events]
+    for event in events:
+        event["user_friends_events"] = [{"friend_id": friend["id"]} for friend in friends]
+    return {
+        "users": [{"id": USER_ID, "username": "sam", "created_at": "2023-01-01T00:00:00"}],
+        "user_friends": [
+            {"id": i, "friend_id": friend["id"], "created_at": friend["created_at"]}
+            for i, friend in enumerate(friends)
+        ],
+        "friends": friends,
+        "user_friends_events": links,
+        "events": events,
+        "event_person_topics_content": [
+            {"id": 1, "user_friend_event_id": 0, "topic": "Hiking", "content": "We hiked", "created_at": "2023-01-01T00:00:00"}
+        ],
+    }
+
+@pytest.mark.query_budget(10)
+def test_read_user_dashboard(client: TestClient, supabase_tracer) -> None:
+    mock_supabase = MockSupabase(make_tables(), latency=0.01)
+    supabase_tracer(mock_supabase)
+    response = client.get(f"{settings.API_V1_STR}/users/{USER_ID}/dashboard")
+    assert response.status_code == 200
+    dashboard = response.json()
+    assert dashboard["user"]["username"] == "sam"
+    assert len(dashboard["events"]) == 3
+    assert dashboard["events"][0]["friend_names"] == ["Friend 0", "Friend 1"]
+    assert dashboard["friends"][0]["event_count"] == 3
+    assert dashboard["recent_content"][0]["topic"] == "Hiking"
+    assert dashboard["stats"] == {"friend_count": 2, "event_count": 3, "content_count": 1}
+
+    # Independent sections overlap instead of queueing behind each other
+    assert mock_supabase.max_in_flight >= 3
+    timings = dict(part.split(";dur=") for part in response.headers["server-timing"].split(", "))
+    assert set(timings) == {"user", "links", "events", "content", "friends", "stats", "total"}
+
+def test_read_user_dashboard_user_not_found(client: TestClient, supabase_tracer) -> None:
+    tables = make_tables()
+    tables["users"] = []
+    supabase_tracer(MockSupabase(tables))
+    response = client.get(f"{settings.API_V1_STR}/users/{USER_ID}/dashboard")
+    assert response.status_code == 404
@@ -0,0 +1,70 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+from anthropic import AsyncAnthropic, InternalServerError
+from deepgram import AsyncDeepgramClient, DeepgramClientEnvironment
+
+from app.core.deepgram import transcribe_file
+from benchmarks.fake_ai import TOPICS, Behaviour, FakeServer, anthropic_app, deepgram_app
+
+@pytest.fixture(scope="module")
+def servers():
+    deepgram = FakeServer(deepgram_app(Behaviour(latency=0, chunk_delay=0))).start()
+    anthropic = FakeServer(anthropic_app(Behaviour(latency=0, chunk_delay=0))).start()
+    failing = FakeServer(anthropic_app(Behaviour(latency=0, error_rate=1.0))).start()
+    yield deepgram.url, anthropic.url, failing.url
+    for server in (deepgram, anthropic, failing):
+        server.stop()
+
+def test_deepgram_transcribes_through_sdk(servers) -> None:
+    url = servers[0]
+    client = AsyncDeepgramClient(
+        api_key="fake",
+        environment=DeepgramClientEnvironment(base=url, production=url, agent=url, agent_rest=url),
+    )
+    async def chunks():
+        yield b"audio "
+        yield b"bytes"
+
+    async def run():
+        response = await client.listen.v1.media.transcribe_file(request=b"audio bytes", model="nova-3")
+        # The app's wrapper, with a streamed body
+        with patch("app.core.deepgram.get_deepgram", lambda: client):
+            streamed = await transcribe_file(chunks(), model="nova-3")
+        return response, streamed
+
+    response, streamed = asyncio.run(run())
+    transcript = response.results.channels[0].alternatives[0].transcript
+    assert transcript.startswith("So I met up with Sam")
+    assert response.metadata.models == ["nova-3"]
+    assert streamed.metadata.sha256 == response.metadata.sha256
+
+def test_anthropic_messages_and_stream_through_sdk(servers) -> None:
+    client = AsyncAnthropic(api_key="fake", base_url=servers[1], max_retries=0)
+    params = {
+        "model": "claude-test",
+        "max_tokens": 100,
+        "system": 'Return JSON: {"topics": []}',
+        "messages": [{"role": "user", "content": "Transcript: hello"}],
+    }
+
+    async def run():
+        message = await client.messages.create(**params)
+        async with client.messages.stream(**params) as stream:
+            streamed = [text async for text in stream.text_stream]
+            final = await stream.get_final_message()
+        return message, streamed, final
+
+    message, streamed, final = asyncio.run(run())
+    assert json.loads(message.content[0].text) == TOPICS
+    assert len(streamed) > 1 and "".join(streamed) == message.content[0].text
+    assert final.usage.output_tokens > 0
+
+def test_injected_failures(servers) -> None:
+    client = AsyncAnthropic(api_key="fake", base_url=servers[2], max_retries=0)
+    with pytest.raises(InternalServerError):
+        asyncio.run(client.messages.create(
+            model="claude-test", max_tokens=10, messages=[{"role": "user", "content": "hi"}],
+        ))
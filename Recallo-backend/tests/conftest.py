@@ -1,9 +1,56 @@
+import os
+import tempfile
+
 import pytest
+from contextlib import ExitStack
 from typing import Generator
+from unittest.mock import patch
 from fastapi.testclient import TestClient
+
+# Keep caches and job queues created during tests out of the working tree
+os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="recallo-tests-"))
+
+from app.core.cache import MemoryCache
 from app.main import app
+from tests.utils.query_tracer import SupabaseTracer, trace_supabase
+
+def pytest_configure(config) -> None:
+    config.addinivalue_line(
+        "markers",
+        "query_budget(n): fail if any request in the test runs more than n Supabase queries",
+    )
 
 @pytest.fixture(scope="module")
 def client() -> Generator:
     with TestClient(app) as c:
         yield c
+
+@pytest.fixture(autouse=True)
+def entity_cache() -> Generator:
+    """
+    A fresh in-memory entity cache per test, so cached rows never leak between tests.
+    """
+    cache = MemoryCache(max_bytes=1024 * 1024, ttl=60)
+    with patch("app.services.entity_cache.entity_cache", cache):
+        yield cache
+
+@pytest.fixture
+def supabase_tracer(request) -> Generator:
+    """
+    Call with a mock client to route every module's `supabase` through a tracer:
+    `tracer = supabase_tracer(MockSupabase(tables))`. With a `query_budget(n)`
+    mark, each traced request is checked against the budget when the test ends.
+    """
+    tracers = []
+    with ExitStack() as stack:
+        def trace(mock_client) -> SupabaseTracer:
+            tracer = SupabaseTracer(mock_client)
+            stack.enter_context(trace_supabase(tracer))
+            tracers.append(tracer)
+            return tracer
+        yield trace
+
+    marker = request.node.get_closest_marker("query_budget")
+    if marker is not None:
+        for tracer in tracers:
+            tracer.assert_max_queries(marker.args[0])
@@ -0,0 +1,80 @@
+import asyncio
+import sqlite3
+from unittest.mock import patch
+
+from app.core.cache import MemoryCache, SQLiteCache
+
+def test_cache_get_set(tmp_path) -> None:
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), max_bytes=1024)
+    assert cache.get("a") is None
+    cache.set("a", "alpha")
+    assert cache.get("a") == "alpha"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_cache_evicts_least_recently_used(tmp_path) -> None:
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), max_bytes=20)
+    with patch("app.core.cache.time.time", side_effect=range(100)):
+        cache.set("a", "x" * 8)
+        cache.set("b", "x" * 8)
+        cache.get("a")
+        cache.set("c", "x" * 8)
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+    assert cache.stats()["size_bytes"] == 16
+
+def test_cache_ttl(tmp_path) -> None:
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite3"), max_bytes=1024, ttl=10)
+    with patch("app.core.cache.time.time", return_value=0):
+        cache.set("a", "alpha")
+    with patch("app.core.cache.time.time", return_value=5):
+        assert cache.get("a") == "alpha"
+    with patch("app.core.cache.time.time", return_value=11):
+        assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+def test_cache_async_calls_wait_off_the_event_loop(tmp_path) -> None:
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SQLiteCache(path, max_bytes=1024)
+    cache.set("a", "alpha")
+    # Another process holding the write lock
+    blocker = sqlite3.connect(path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+
+    async def run():
+        write = asyncio.create_task(cache.aset("b", "beta"))
+        ticks = 0
+        while ticks < 10:
+            await asyncio.sleep(0.01)
+            ticks += 1
+        assert not write.done()
+        blocker.execute("ROLLBACK")
+        await write
+        assert await cache.aget("b") == "beta"
+        await cache.adelete("b")
+        assert await cache.aget("b") is None
+
+    asyncio.run(run())
+
+def test_memory_cache_evicts_least_recently_used() -> None:
+    cache = MemoryCache(max_bytes=20)
+    cache.set("a", "x" * 8)
+    cache.set("b", "x" * 8)
+    cache.get("a")
+    cache.set("c", "x" * 8)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["size_bytes"] == 16
+    assert cache.stats()["hit_ratio"] == 0.75
+
+def test_memory_cache_ttl() -> None:
+    cache = MemoryCache(max_bytes=1024, ttl=10)
+    with patch("app.core.cache.time.time", return_value=0):
+        cache.set("a", "alpha")
+    with patch("app.core.cache.time.time", return_value=5):
+        assert cache.get("a") == "alpha"
+    with patch("app.core.cache.time.time", return_value=11):
+        assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
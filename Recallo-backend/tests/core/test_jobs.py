@@ -0,0 +1,95 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+from app.core.jobs import JobQueue
+
+def make_queue(tmp_path, handler):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"), handler=handler, concurrency=0)
+
+def test_jobs_are_coalesced(tmp_path) -> None:
+    handler = AsyncMock(return_value={"ok": True})
+    queue = make_queue(tmp_path, handler)
+    queue.enqueue("a", {"n": 1})
+    queue.enqueue("a", {"n": 2})
+    queue.enqueue("b", {"n": 3})
+    assert queue.counts()["queued"] == 2
+
+    while asyncio.run(queue.run_once()):
+        pass
+    assert handler.await_count == 2
+    assert queue.get("a")["payload"] == {"n": 2}
+    assert queue.get("a")["status"] == "done"
+    assert queue.get("a")["result"] == {"ok": True}
+
+def test_enqueue_while_running_runs_again(tmp_path) -> None:
+    queue = make_queue(tmp_path, None)
+
+    async def handler(payload):
+        if payload["n"] == 1:
+            queue.enqueue("a", {"n": 2})
+        return payload
+
+    queue.handler = handler
+    queue.enqueue("a", {"n": 1})
+    assert asyncio.run(queue.run_once())
+    assert queue.get("a")["status"] == "queued"
+    assert asyncio.run(queue.run_once())
+    assert queue.get("a")["status"] == "done"
+    assert queue.get("a")["result"] == {"n": 2}
+
+def test_failed_jobs_record_error(tmp_path) -> None:
+    queue = make_queue(tmp_path, AsyncMock(side_effect=ValueError("boom")))
+    queue.enqueue("a", {})
+    asyncio.run(queue.run_once())
+    assert queue.get("a")["status"] == "failed"
+    assert queue.get("a")["error"] == "boom"
+
+def test_workers_drain_queue(tmp_path) -> None:
+    handler = AsyncMock(return_value=None)
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), handler=handler, concurrency=2, poll_interval=0.01)
+
+    async def run():
+        await queue.start()
+        for key in "abc":
+            queue.enqueue(key, {})
+        for _ in range(100):
+            if queue.counts()["done"] == 3:
+                break
+            await asyncio.sleep(0.01)
+        await queue.stop()
+
+    asyncio.run(run())
+    assert queue.counts()["done"] == 3
+    assert handler.await_count == 3
+
+def test_submit_only_retries_failed_jobs(tmp_path) -> None:
+    handler = AsyncMock(side_effect=[RuntimeError("boom"), {"ok": True}])
+    queue = make_queue(tmp_path, handler)
+    _, queued = queue.submit("a", {"n": 1})
+    assert queued
+    _, queued = queue.submit("a", {"n": 2})
+    assert not queued
+    assert asyncio.run(queue.run_once())
+    assert queue.get("a")["status"] == "failed"
+
+    job, queued = queue.submit("a", {"n": 3})
+    assert queued and job["status"] == "queued"
+    assert asyncio.run(queue.run_once())
+    job, queued = queue.submit("a", {"n": 4})
+    assert not queued
+    assert job["status"] == "done"
+    assert job["payload"] == {"n": 3}
+
+def test_async_calls(tmp_path) -> None:
+    handler = AsyncMock(return_value={"ok": True})
+    queue = make_queue(tmp_path, handler)
+
+    async def run():
+        job = await queue.aenqueue("a", {"n": 1})
+        assert job["status"] == "queued"
+        _, queued = await queue.asubmit("a", {"n": 2})
+        assert not queued
+        assert await queue.run_once()
+        assert (await queue.aget("a"))["result"] == {"ok": True}
+
+    asyncio.run(run())
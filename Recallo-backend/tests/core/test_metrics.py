@@ -0,0 +1,121 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import deepgram
+from app.core.metrics import (
+    CLAUDE_TOKENS,
+    REQUEST_QUERIES,
+    UPSTREAM_CALLS,
+    InstrumentedTransport,
+    MetricsMiddleware,
+    current_request,
+    RequestStats,
+    record_claude_usage,
+    render_metrics,
+    supabase_target,
+)
+
+def sample(metric, suffix, **labels) -> float:
+    for family in metric.collect():
+        for s in family.samples:
+            if s.name.endswith(suffix) and s.labels == labels:
+                return s.value
+    return 0.0
+
+def make_client() -> httpx.AsyncClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        status = 404 if request.url.path.endswith("missing") else 200
+        return httpx.Response(status, json=[])
+    return httpx.AsyncClient(
+        base_url="http://supabase.test",
+        transport=InstrumentedTransport(httpx.MockTransport(handler)),
+    )
+
+def test_supabase_target() -> None:
+    assert supabase_target("/rest/v1/friends") == "friends"
+    assert supabase_target("/rest/v1/rpc/match_topics") == "rpc/match_topics"
+    assert supabase_target("/auth/v1/user") == "auth"
+    assert supabase_target("/") == "unknown"
+
+def test_transport_counts_queries_for_current_request() -> None:
+    before_ok = sample(UPSTREAM_CALLS, "_total", upstream="supabase", target="friends", outcome="ok")
+    before_error = sample(UPSTREAM_CALLS, "_total", upstream="supabase", target="missing", outcome="error")
+
+    async def run():
+        stats = RequestStats()
+        token = current_request.set(stats)
+        try:
+            async with make_client() as client:
+                await asyncio.gather(*(client.get("/rest/v1/friends") for _ in range(3)))
+                await client.get("/rest/v1/missing")
+        finally:
+            current_request.reset(token)
+        return stats
+
+    stats = asyncio.run(run())
+    assert stats.supabase_queries == 4
+    assert sample(UPSTREAM_CALLS, "_total", upstream="supabase", target="friends", outcome="ok") == before_ok + 3
+    assert sample(UPSTREAM_CALLS, "_total", upstream="supabase", target="missing", outcome="error") == before_error + 1
+
+def test_middleware_records_queries_by_route_template() -> None:
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/things/{thing_id}")
+    async def read_thing(thing_id: str):
+        async with make_client() as client:
+            await client.get("/rest/v1/things")
+            await client.get("/rest/v1/thing_tags")
+        return {"id": thing_id}
+
+    before = sample(REQUEST_QUERIES, "_sum", method="GET", route="/things/{thing_id}")
+    with TestClient(app) as client:
+        assert client.get("/things/1").status_code == 200
+        assert client.get("/things/2").status_code == 200
+        assert client.get("/nowhere").status_code == 404
+
+    assert sample(REQUEST_QUERIES, "_sum", method="GET", route="/things/{thing_id}") == before + 4
+    assert sample(REQUEST_QUERIES, "_count", method="GET", route="unmatched") >= 1
+
+    content, content_type = render_metrics()
+    assert content_type.startswith("text/plain")
+    assert b'route="/things/{thing_id}"' in content
+    assert b"/things/1" not in content
+
+def test_record_claude_usage() -> None:
+    class Usage:
+        input_tokens = 120
+        output_tokens = 30
+        cache_read_input_tokens = None
+
+    before = sample(CLAUDE_TOKENS, "_total", model="test-model", kind="input")
+    record_claude_usage("test-model", Usage())
+    record_claude_usage("test-model", None)
+    assert sample(CLAUDE_TOKENS, "_total", model="test-model", kind="input") == before + 120
+    assert sample(CLAUDE_TOKENS, "_total", model="test-model", kind="cache_read") == 0
+
+def test_transcribe_file_tracks_deepgram_calls() -> None:
+    async def transcribe(request, **options):
+        if options["model"] == "slow-model":
+            await asyncio.sleep(1)
+        return {"request": request, "options": options}
+
+    client = SimpleNamespace(listen=SimpleNamespace(v1=SimpleNamespace(media=SimpleNamespace(transcribe_file=transcribe))))
+    before_ok = sample(UPSTREAM_CALLS, "_total", upstream="deepgram", target="test-model", outcome="ok")
+    before_timeout = sample(UPSTREAM_CALLS, "_total", upstream="deepgram", target="slow-model", outcome="timeout")
+
+    with patch("app.core.deepgram.get_deepgram", lambda: client), \
+         patch.object(deepgram.settings, "DEEPGRAM_TIMEOUT", 0.01):
+        response = asyncio.run(deepgram.transcribe_file(b"audio", model="test-model"))
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(deepgram.transcribe_file(b"audio", model="slow-model"))
+
+    assert response == {"request": b"audio", "options": {"model": "test-model"}}
+    assert sample(UPSTREAM_CALLS, "_total", upstream="deepgram", target="test-model", outcome="ok") == before_ok + 1
+    assert sample(UPSTREAM_CALLS, "_total", upstream="deepgram", target="slow-model", outcome="timeout") == before_timeout + 1
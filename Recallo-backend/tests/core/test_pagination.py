@@ -0,0 +1,25 @@
+import pytest
+from fastapi import HTTPException
+
+from app.core.pagination import decode_cursor, encode_cursor, keyset_filter
+
+def test_cursor_round_trip() -> None:
+    cursor = encode_cursor(["2023-01-01T00:00:00+00:00", 42])
+    assert decode_cursor(cursor, 2) == ["2023-01-01T00:00:00+00:00", 42]
+
+def test_invalid_cursor() -> None:
+    for cursor in ("not-a-cursor", encode_cursor([1, 2, 3]), encode_cursor({"a": 1})):
+        with pytest.raises(HTTPException) as exc_info:
+            decode_cursor(cursor, 2)
+        assert exc_info.value.status_code == 400
+
+def test_keyset_filter() -> None:
+    assert keyset_filter(("created_at", "id"), ["2023-01-01T00:00:00", 7]) == \
+        'created_at.gt."2023-01-01T00:00:00",and(created_at.eq."2023-01-01T00:00:00",id.gt."7")'
+
+def test_keyset_filter_nullable_descending() -> None:
+    # Nulls sort last, so a dated cursor is followed by later-dated and undated rows
+    assert keyset_filter(("event_date", "id"), ["2023-01-01", "b"], desc=True, nullable=True) == \
+        'event_date.lt."2023-01-01",and(event_date.eq."2023-01-01",id.lt."b"),event_date.is.null'
+    assert keyset_filter(("event_date", "id"), [None, "b"], desc=True, nullable=True) == \
+        'and(event_date.is.null,id.lt."b")'
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from app.core.query_plan import QueryPlan
+
+def test_steps_run_after_dependencies_and_concurrently() -> None:
+    log = []
+
+    def step(name, delay, result):
+        async def run(*dependencies):
+            log.append(("start", name, dependencies))
+            await asyncio.sleep(delay)
+            log.append(("end", name))
+            return result
+        return run
+
+    async def run():
+        async with QueryPlan() as plan:
+            plan.add("relations", step("relations", 0.01, [1, 2]))
+            plan.add("content", step("content", 0.05, "content"), after=["relations"])
+            plan.add("events", step("events", 0.05, "events"), after=["relations"])
+            plan.add("friend", step("friend", 0.01, "friend"))
+            started = asyncio.get_running_loop().time()
+            results = await plan.gather("content", "events", "friend")
+            elapsed = asyncio.get_running_loop().time() - started
+            # relations ran once for both dependents
+            assert await plan.get("relations") == [1, 2]
+        return results, elapsed, plan.timings
+
+    results, elapsed, timings = asyncio.run(run())
+    assert results == ["content", "events", "friend"]
+    # Critical path (0.01 + 0.05), not the sum (0.12)
+    assert elapsed < 0.1
+    assert ("start", "content", ([1, 2],)) in log
+    assert log.index(("end", "relations")) < log.index(("start", "content", ([1, 2],)))
+    assert [entry[1] for entry in log if entry[0] == "start"].count("relations") == 1
+    assert set(timings) == {"relations", "content", "events", "friend"}
+
+def test_dependencies_must_be_defined_first() -> None:
+    plan = QueryPlan()
+    with pytest.raises(ValueError):
+        plan.add("content", asyncio.sleep, after=["relations"])
+    plan.add("relations", asyncio.sleep)
+    with pytest.raises(ValueError):
+        plan.add("relations", asyncio.sleep)
+
+def test_leaving_the_plan_cancels_unneeded_steps() -> None:
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def fail():
+        raise ValueError("boom")
+
+    async def run():
+        async with QueryPlan() as plan:
+            plan.add("slow", slow)
+            plan.add("fail", fail)
+            plan.start("slow")
+            with pytest.raises(ValueError):
+                await plan.gather("fail", "slow")
+
+    asyncio.run(run())
+    assert cancelled == [True]
+
+def test_settle_waits_for_running_steps() -> None:
+    finished = []
+
+    async def write():
+        await asyncio.sleep(0.01)
+        finished.append("write")
+
+    async def fail():
+        raise ValueError("boom")
+
+    async def run():
+        async with QueryPlan() as plan:
+            plan.add("write", write)
+            plan.add("fail", fail)
+            with pytest.raises(ValueError):
+                try:
+                    await plan.gather("write", "fail")
+                except ValueError:
+                    await plan.settle()
+                    raise
+
+    asyncio.run(run())
+    assert finished == ["write"]
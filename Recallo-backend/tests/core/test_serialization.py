@@ -0,0 +1,54 @@
+import json
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from app import schemas
+from app.core.config import settings
+from app.core.serialization import dumps, project
+from tests.utils.supabase import MockSupabase
+
+USER_ID = "123e4567-e89b-12d3-a456-426614174000"
+
+def test_project_keeps_model_fields_and_defaults() -> None:
+    row = {"id": str(uuid4()), "event_name": "Picnic", "created_at": "2023-01-01T00:00:00+00:00", "user_id": USER_ID}
+    projected = project(schemas.Event, row)
+    assert projected == {
+        "id": row["id"], "created_at": row["created_at"], "event_name": "Picnic",
+        "event_date": None, "friend_names": [],
+    }
+    assert json.loads(dumps([projected])) == [projected]
+
+def test_project_validates_incomplete_rows() -> None:
+    with pytest.raises(ValidationError):
+        project(schemas.Event, {"id": str(uuid4()), "event_name": "Picnic"})
+
+def test_fast_path_matches_default_response(client: TestClient) -> None:
+    friends = [{"id": str(uuid4()), "friend_name": f"Friend {i}"} for i in range(3)]
+    events = [
+        {"id": str(uuid4()), "event_name": f"Event {i}", "event_date": "2023-01-01", "created_at": "2023-01-01T00:00:00", "notes": "x"}
+        for i in range(3)
+    ]
+    tables = {
+        "user_friends_events": [{"event_id": event["id"], "friend_id": friend["id"]} for event in events for friend in friends],
+        "events": events,
+        "friends": friends,
+    }
+    url = f"{settings.API_V1_STR}/events/user/{USER_ID}?limit=2"
+
+    responses = {}
+    for fast in (False, True):
+        mock_supabase = MockSupabase(tables)
+        with patch.object(settings, "FAST_SERIALIZATION", fast), \
+             patch("app.services.user_timeline.supabase", mock_supabase), \
+             patch("app.services.friend_names.supabase", mock_supabase):
+            responses[fast] = client.get(url)
+
+    default, fast = responses[False], responses[True]
+    assert fast.status_code == 200
+    assert fast.json() == default.json()
+    assert fast.headers["x-next-cursor"] == default.headers["x-next-cursor"]
+    assert "notes" not in fast.json()[0]
@@ -0,0 +1,32 @@
+import json
+
+from app.services.json_stream import ArrayItemStreamParser
+
+QUESTIONS = [
+    {"question": "What did {Sam} say about \"braces\" }?", "options": ["[a]", "b", "c", "d"], "correct_answer": 1},
+    {"question": "Second?", "options": ["a", "b", "c", "d"], "correct_answer": 0, "topic": "Nested {\"x\": [1]}"},
+]
+
+def feed_in_chunks(text, size):
+    parser = ArrayItemStreamParser()
+    parsed = []
+    for i in range(0, len(text), size):
+        parsed.append(parser.feed(text[i:i + size]))
+    return parsed
+
+def test_questions_are_emitted_as_they_complete() -> None:
+    document = "Here is your quiz:\n" + json.dumps({"questions": QUESTIONS}, indent=2) + "\nEnjoy!"
+    for size in (1, 7, len(document)):
+        parsed = feed_in_chunks(document, size)
+        assert [q for batch in parsed for q in batch] == QUESTIONS
+
+def test_first_question_arrives_before_the_document_ends() -> None:
+    document = json.dumps({"questions": QUESTIONS})
+    first_end = document.index(json.dumps(QUESTIONS[0])) + len(json.dumps(QUESTIONS[0]))
+    parser = ArrayItemStreamParser()
+    assert parser.feed(document[:first_end]) == [QUESTIONS[0]]
+    assert parser.feed(document[first_end:]) == [QUESTIONS[1]]
+
+def test_malformed_question_is_skipped() -> None:
+    parser = ArrayItemStreamParser()
+    assert parser.feed('{"questions": [{"question": tru}, ' + json.dumps(QUESTIONS[1]) + "]}") == [QUESTIONS[1]]
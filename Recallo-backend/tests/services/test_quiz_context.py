@@ -0,0 +1,51 @@
+from app.services.quiz_context import build_quiz_context, estimate_tokens
+
+def make_history(event_count, topics_per_event):
+    relations = [{"id": i, "event_id": f"e{i}"} for i in range(event_count)]
+    events = [
+        {"id": f"e{i}", "event_name": f"Event {i}", "event_date": f"2023-{i // 28 + 1:02d}-{i % 28 + 1:02d}"}
+        for i in range(event_count)
+    ]
+    contents = [
+        {
+            "id": i * topics_per_event + j,
+            "user_friend_event_id": i,
+            "topic": f"Topic {i}-{j}",
+            "content": "Something memorable happened. " * 5,
+            "created_at": "2023-01-01T00:00:00",
+        }
+        for i in range(event_count)
+        for j in range(topics_per_event)
+    ]
+    return relations, events, contents
+
+def test_small_history_is_kept_whole() -> None:
+    relations, events, contents = make_history(2, 2)
+    context = build_quiz_context("Sam", relations, events, contents, token_budget=10_000)
+    assert context.startswith("Friend: Sam\n\nEvent: Event 0\n  Topic: Topic 0-0\n")
+    assert context.count("  Topic: ") == 4
+    assert context.count("Event: ") == 2
+
+def test_context_stays_within_budget() -> None:
+    relations, events, contents = make_history(200, 10)
+    context = build_quiz_context("Sam", relations, events, contents, token_budget=2000)
+    assert estimate_tokens(context) <= 2000
+    assert context.count("  Topic: ") > 0
+
+def test_context_spreads_over_events() -> None:
+    relations, events, contents = make_history(20, 20)
+    context = build_quiz_context("Sam", relations, events, contents, token_budget=1000)
+    # Rather than exhausting the newest event, topics come from several events
+    assert context.count("Event: ") > 3
+
+def test_context_prefers_recent_events() -> None:
+    relations, events, contents = make_history(20, 1)
+    context = build_quiz_context("Sam", relations, events, contents, token_budget=100)
+    assert context.count("Event: ") == 1
+    assert "Event: Event 19\n" in context
+
+def test_content_without_event_is_skipped() -> None:
+    relations, events, contents = make_history(1, 1)
+    contents.append({"id": 99, "user_friend_event_id": 42, "topic": "Orphan", "content": "x"})
+    context = build_quiz_context("Sam", relations, events, contents, token_budget=10_000)
+    assert "Orphan" not in context
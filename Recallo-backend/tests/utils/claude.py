@@ -0,0 +1,24 @@
+import json
+
+# Stands in for app.core.claude.StreamedMessage: yields `document` in `size`
+# character chunks, then sets `stop_reason` as the real stream does once it ends.
+class FakeStream:
+    def __init__(self, document, size=5, stop_reason="end_turn"):
+        self.document = document
+        self.size = size
+        self.final_stop_reason = stop_reason
+        self.stop_reason = None
+
+    async def __aiter__(self):
+        for i in range(0, len(self.document), self.size):
+            yield self.document[i:i + self.size]
+        self.stop_reason = self.final_stop_reason
+
+
+# Parses a Server-Sent Events response body into (event, data) pairs
+def read_events(response):
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
@@ -0,0 +1,467 @@
+"""
+In-memory stand-in for the part of the supabase-py query builder the app uses.
+
+Tables are lists of row dicts. Queries support select (with column lists,
+embedded resources such as `events(event_date)` or `user_friends_events!inner(friend_id)`,
+and `count="exact"`), eq/neq/gt/gte/lt/lte/is_/in_ (also on embedded columns,
+as `user_friends_events.user_id`), the `or_` filters built by keyset
+pagination, order (with nullsfirst), limit, range and single, as well as
+insert, update, upsert and delete. Every execute() can be delayed by a
+fixed latency plus random jitter to stand in for the network round trip.
+
+`seed()` builds a consistent synthetic dataset of users, friends, events,
+relations and content at a chosen scale, and `serve()` points every app
+module's shared client at a MemorySupabase.
+"""
+import asyncio
+import random
+import sys
+import uuid
+from contextlib import ExitStack
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from unittest.mock import patch
+
+from postgrest.exceptions import APIError
+
+from app.core.supabase import supabase as supabase_pool
+
+Row = Dict[str, Any]
+Condition = Callable[[Row], bool]
+
+# Tables whose ids are bigint sequences; the rest use uuids
+INTEGER_IDS = {"user_events", "user_friends", "user_friends_events", "event_person_topics_content"}
+
+
+class MemoryResponse:
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class MemorySupabase:
+    def __init__(self, tables: Optional[Dict[str, List[Row]]] = None, latency: float = 0.0, jitter: float = 0.0, seed: int = 0):
+        self.tables: Dict[str, List[Row]] = tables if tables is not None else {}
+        self.latency = latency
+        self.jitter = jitter
+        self.queries = 0
+        self._random = random.Random(seed)
+        self._next_ids: Dict[str, int] = {}
+
+    def table(self, name: str) -> "MemoryQuery":
+        return MemoryQuery(self, name)
+
+    def rows(self, name: str) -> List[Row]:
+        return self.tables.setdefault(name, [])
+
+    def new_id(self, name: str) -> Any:
+        if name not in INTEGER_IDS:
+            return str(uuid.uuid4())
+        if name not in self._next_ids:
+            self._next_ids[name] = max((row["id"] for row in self.rows(name)), default=0) + 1
+        self._next_ids[name] += 1
+        return self._next_ids[name] - 1
+
+    def related(self, table: str, row: Row, name: str) -> Any:
+        """
+        The `name` rows embedded in a `table` row, found by the `<singular>_id` naming
+        of foreign keys: one row (or None) when the row holds the key, as
+        user_friends_events.event_id -> events, otherwise the list of rows pointing
+        back at it, as friends <- user_friends_events.friend_id.
+        """
+        key = next((key for key in foreign_keys(name) if key in row), None)
+        if key is not None:
+            return next((other for other in self.rows(name) if other.get("id") == row[key]), None)
+        back = foreign_keys(table)
+        return [other for other in self.rows(name) if any(other.get(key) == row.get("id") for key in back)]
+
+    async def wait(self) -> None:
+        self.queries += 1
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        # Sleep even for zero latency so a query always yields to the event loop
+        await asyncio.sleep(delay)
+
+
+def singular(table: str) -> str:
+    return table[:-1] if table.endswith("s") else table
+
+
+def foreign_keys(table: str) -> List[str]:
+    # Columns that may reference `table`: "events" -> event_id,
+    # "user_friends_events" -> user_friends_event_id or user_friend_event_id
+    return list(dict.fromkeys([f"{singular(table)}_id", "_".join(singular(part) for part in table.split("_")) + "_id"]))
+
+
+class Selection:
+    """
+    A parsed select: its columns (None for `*`) and embedded resources by table,
+    each with whether it is `!inner` and its own Selection.
+    """
+
+    def __init__(self, columns: Optional[List[str]] = None, embeds: Optional[Dict[str, tuple]] = None):
+        self.columns = columns
+        self.embeds: Dict[str, tuple] = embeds or {}
+
+
+def parse_select(text: str) -> Selection:
+    columns: List[str] = []
+    embeds: Dict[str, tuple] = {}
+    star = False
+    for part in split_top_level(text):
+        part = part.strip()
+        if part == "*":
+            star = True
+        elif "(" in part and part.endswith(")"):
+            name, inner = part[:-1].split("(", 1)
+            name, _, hint = name.partition("!")
+            embeds[name.strip()] = (hint == "inner", parse_select(inner))
+        elif part:
+            columns.append(part)
+    return Selection(None if star else columns, embeds)
+
+
+def coerce(row_value: Any, value: Any) -> Any:
+    # PostgREST filter values arrive as strings; compare them as the column's type
+    if isinstance(row_value, bool) or value is None:
+        return value
+    if isinstance(row_value, (int, float)) and isinstance(value, str):
+        return type(row_value)(value)
+    if isinstance(row_value, str):
+        return str(value)
+    return value
+
+
+def compare(row: Row, column: str, op: str, value: Any) -> bool:
+    row_value = row.get(column)
+    if op == "is":
+        return row_value is None if value in (None, "null") else row_value == value
+    if row_value is None:
+        return False
+    value = coerce(row_value, value)
+    if op == "eq":
+        return row_value == value
+    if op == "neq":
+        return row_value != value
+    if op == "gt":
+        return row_value > value
+    if op == "gte":
+        return row_value >= value
+    if op == "lt":
+        return row_value < value
+    if op == "lte":
+        return row_value <= value
+    raise ValueError(f"Unsupported operator {op!r}")
+
+
+def split_top_level(text: str) -> List[str]:
+    parts, depth, quoted, start, i = [], 0, False, 0, 0
+    while i < len(text):
+        char = text[i]
+        if quoted and char == "\\":
+            i += 2
+            continue
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append(text[start:i])
+            start = i + 1
+        i += 1
+    parts.append(text[start:])
+    return parts
+
+
+def unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return value
+
+
+def parse_logic(text: str) -> Condition:
+    """
+    Parse a PostgREST logic tree (`a.gt."1",and(a.eq."1",b.gt."2")`) into a row predicate.
+    """
+    conditions = [parse_condition(part) for part in split_top_level(text)]
+    return lambda row: any(condition(row) for condition in conditions)
+
+
+def parse_condition(text: str) -> Condition:
+    for operator, combine in (("and(", all), ("or(", any)):
+        if text.startswith(operator) and text.endswith(")"):
+            conditions = [parse_condition(part) for part in split_top_level(text[len(operator):-1])]
+            return lambda row: combine(condition(row) for condition in conditions)
+    column, op, value = text.split(".", 2)
+    value = unquote(value)
+    return lambda row: compare(row, column, op, None if op == "is" and value == "null" else value)
+
+
+class MemoryQuery:
+    def __init__(self, client: MemorySupabase, name: str):
+        self.client = client
+        self.name = name
+        self.action = "select"
+        self.selection = Selection()
+        self.count: Optional[str] = None
+        self.payload: Any = None
+        self.on_conflict: Sequence[str] = ()
+        self.ignore_duplicates = False
+        self.conditions: List[Condition] = []
+        self.embed_conditions: Dict[str, List[Condition]] = {}
+        self.orders: List[tuple] = []
+        self.offset = 0
+        self.row_limit: Optional[int] = None
+        self.is_single = False
+
+    # Actions
+
+    def select(self, columns: str = "*", count: Optional[str] = None) -> "MemoryQuery":
+        self.selection = parse_select(columns)
+        self.count = count
+        return self
+
+    def insert(self, rows: Any) -> "MemoryQuery":
+        self.action, self.payload = "insert", rows
+        return self
+
+    def upsert(self, rows: Any, on_conflict: str = "", ignore_duplicates: bool = False) -> "MemoryQuery":
+        self.action, self.payload = "upsert", rows
+        self.on_conflict = [column for column in on_conflict.split(",") if column] or ["id"]
+        self.ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, values: Row) -> "MemoryQuery":
+        self.action, self.payload = "update", values
+        return self
+
+    def delete(self) -> "MemoryQuery":
+        self.action = "delete"
+        return self
+
+    # Filters
+
+    def _condition(self, column: str, condition: Condition) -> "MemoryQuery":
+        # `table.column` filters the embedded table's rows instead of the top-level ones
+        name, dot, _ = column.partition(".")
+        if dot:
+            self.embed_conditions.setdefault(name, []).append(condition)
+        else:
+            self.conditions.append(condition)
+        return self
+
+    def _filter(self, column: str, op: str, value: Any) -> "MemoryQuery":
+        field = column.partition(".")[2] or column
+        return self._condition(column, lambda row: compare(row, field, op, value))
+
+    def eq(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "neq", value)
+
+    def gt(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "lte", value)
+
+    def is_(self, column: str, value: Any) -> "MemoryQuery":
+        return self._filter(column, "is", value)
+
+    def in_(self, column: str, values: Sequence[Any]) -> "MemoryQuery":
+        # Compared as text, which matches both uuid and integer columns
+        values = {str(value) for value in values}
+        field = column.partition(".")[2] or column
+        return self._condition(column, lambda row: row.get(field) is not None and str(row[field]) in values)
+
+    def or_(self, filters: str) -> "MemoryQuery":
+        self.conditions.append(parse_logic(filters))
+        return self
+
+    # Modifiers
+
+    def order(self, column: str, desc: bool = False, nullsfirst: Optional[bool] = None) -> "MemoryQuery":
+        # Postgres puts nulls last ascending and first descending unless told otherwise
+        self.orders.append((column, desc, desc if nullsfirst is None else nullsfirst))
+        return self
+
+    def limit(self, size: int) -> "MemoryQuery":
+        self.row_limit = size
+        return self
+
+    def range(self, start: int, end: int) -> "MemoryQuery":
+        self.offset, self.row_limit = start, end - start + 1
+        return self
+
+    def single(self) -> "MemoryQuery":
+        self.is_single = True
+        return self
+
+    # Execution
+
+    def _embedded(self, table: str, row: Row, name: str, conditions: Sequence[Condition]) -> List[Row]:
+        found = self.client.related(table, row, name)
+        rows = found if isinstance(found, list) else [found] if found is not None else []
+        return [other for other in rows if all(condition(other) for condition in conditions)]
+
+    def _matching(self) -> List[Row]:
+        rows = [row for row in self.client.rows(self.name) if all(condition(row) for condition in self.conditions)]
+        # An !inner embed drops the rows it has nothing to embed for
+        for name, (inner, _) in self.selection.embeds.items():
+            if inner:
+                conditions = self.embed_conditions.get(name, [])
+                rows = [row for row in rows if self._embedded(self.name, row, name, conditions)]
+        return rows
+
+    def _sorted(self, rows: List[Row]) -> List[Row]:
+        # Stable sorts applied last key first give a multi-column order
+        for column, desc, nulls_first in reversed(self.orders):
+            present = sorted((row for row in rows if row.get(column) is not None), key=lambda row: row[column], reverse=desc)
+            missing = [row for row in rows if row.get(column) is None]
+            rows = missing + present if nulls_first else present + missing
+        return rows
+
+    def _shape(self, table: str, row: Row, selection: Selection, embed_conditions: Dict[str, List[Condition]]) -> Row:
+        if selection.columns is None:
+            shaped = dict(row)
+        else:
+            shaped = {column: row.get(column) for column in selection.columns}
+        for name, (_, embedded) in selection.embeds.items():
+            rows = [
+                self._shape(name, other, embedded, {})
+                for other in self._embedded(table, row, name, embed_conditions.get(name, []))
+            ]
+            if isinstance(self.client.related(table, row, name), list):
+                shaped[name] = rows
+            else:
+                shaped[name] = rows[0] if rows else None
+        return shaped
+
+    def _project(self, rows: List[Row]) -> List[Row]:
+        return [self._shape(self.name, row, self.selection, self.embed_conditions) for row in rows]
+
+    def _new_row(self, values: Row) -> Row:
+        row = dict(values)
+        row.setdefault("id", self.client.new_id(self.name))
+        row.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+        self.client.rows(self.name).append(row)
+        return row
+
+    def _write(self) -> List[Row]:
+        table = self.client.rows(self.name)
+        if self.action == "insert":
+            rows = self.payload if isinstance(self.payload, list) else [self.payload]
+            return [self._new_row(values) for values in rows]
+        if self.action == "upsert":
+            written = []
+            for values in self.payload if isinstance(self.payload, list) else [self.payload]:
+                existing = next((
+                    row for row in table
+                    if all(compare(row, column, "eq", values.get(column)) for column in self.on_conflict)
+                ), None)
+                if existing is None:
+                    written.append(self._new_row(values))
+                elif not self.ignore_duplicates:
+                    existing.update(values)
+                    written.append(existing)
+            return written
+        matching = self._matching()
+        if self.action == "update":
+            for row in matching:
+                row.update(self.payload)
+            return matching
+        if self.action == "delete":
+            ids = {id(row) for row in matching}
+            table[:] = [row for row in table if id(row) not in ids]
+            return matching
+        raise ValueError(f"Unsupported action {self.action!r}")
+
+    async def execute(self) -> MemoryResponse:
+        await self.client.wait()
+        if self.action != "select":
+            return MemoryResponse(self._project(self._write()))
+
+        rows = self._sorted(self._matching())
+        count = len(rows) if self.count == "exact" else None
+        end = None if self.row_limit is None else self.offset + self.row_limit
+        rows = self._project(rows[self.offset:end])
+        if self.is_single:
+            if len(rows) != 1:
+                raise APIError({"message": "JSON object requested, multiple (or no) rows returned", "code": "PGRST116"})
+            return MemoryResponse(rows[0], count)
+        return MemoryResponse(rows, count)
+
+
+def seed(
+    users: int = 1,
+    friends_per_user: int = 10,
+    events_per_user: int = 10,
+    friends_per_event: int = 2,
+    topics_per_link: int = 3,
+    seed: int = 0,
+) -> Dict[str, List[Row]]:
+    """
+    Synthetic tables: each user has their own friends and events, each event is
+    shared with `friends_per_event` of the user's friends, and each of those
+    friend/event links has `topics_per_link` content rows.
+    """
+    rng = random.Random(seed)
+    started = datetime(2023, 1, 1)
+
+    def new_uuid() -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    def timestamp(offset: int) -> str:
+        return (started + timedelta(minutes=offset)).isoformat()
+
+    tables: Dict[str, List[Row]] = {name: [] for name in (
+        "users", "friends", "events", "user_friends", "user_events",
+        "user_friends_events", "event_person_topics_content",
+    )}
+
+    def add(name: str, row: Row) -> Row:
+        if name in INTEGER_IDS:
+            row = {"id": len(tables[name]) + 1, **row}
+        tables[name].append(row)
+        return row
+
+    for u in range(users):
+        user = add("users", {"id": new_uuid(), "username": f"user{u}", "email": f"user{u}@example.com", "age": 20 + u % 50, "created_at": timestamp(u)})
+        friends = []
+        for f in range(friends_per_user):
+            friend = add("friends", {"id": new_uuid(), "friend_name": f"Friend {u}-{f}", "created_at": timestamp(f)})
+            add("user_friends", {"user_id": user["id"], "friend_id": friend["id"], "username": user["username"], "friendname": friend["friend_name"], "created_at": timestamp(f)})
+            friends.append(friend)
+        for e in range(events_per_user):
+            event_date = date(2020, 1, 1) + timedelta(days=rng.randrange(1500))
+            event = add("events", {"id": new_uuid(), "event_name": f"Event {u}-{e}", "event_date": event_date.isoformat(), "created_at": timestamp(e)})
+            add("user_events", {"user_id": user["id"], "event_id": event["id"], "created_at": timestamp(e)})
+            for friend in rng.sample(friends, min(friends_per_event, len(friends))):
+                link = add("user_friends_events", {"user_id": user["id"], "friend_id": friend["id"], "event_id": event["id"], "created_at": timestamp(e)})
+                for t in range(topics_per_link):
+                    add("event_person_topics_content", {
+                        "user_friend_event_id": link["id"],
+                        "topic": f"Topic {t}",
+                        "content": "We talked about plans for the summer and what we had been reading lately.",
+                        "created_at": timestamp(e * topics_per_link + t),
+                    })
+    return tables
+
+
+def serve(client: MemorySupabase) -> ExitStack:
+    """
+    Point every loaded app module's shared `supabase` client at `client`.
+    """
+    stack = ExitStack()
+    for name, module in list(sys.modules.items()):
+        if name.startswith("app.") and name != "app.core.supabase" and getattr(module, "supabase", None) is supabase_pool:
+            stack.enter_context(patch.object(module, "supabase", client))
+    return stack
@@ -0,0 +1,126 @@
+import sys
+import time
+from contextlib import ExitStack
+from typing import Any, Dict, List, Optional, Tuple
+from unittest.mock import patch
+
+from app.core.metrics import current_request
+from app.core.supabase import supabase as supabase_pool
+
+# Builder methods that pick rows rather than shape the query, shown as filters in plans
+FILTERS = {
+    "eq", "neq", "gt", "gte", "lt", "lte", "like", "ilike", "is_", "in_",
+    "contains", "contained_by", "or_", "not_", "filter", "match",
+}
+
+# Wraps a Supabase client (a MockSupabase or a MagicMock) and records, for each
+# executed query, its table, the builder calls that made it, which request
+# issued it and when it ran.
+class SupabaseTracer:
+    def __init__(self, client):
+        self.client = client
+        self.queries: List["TracedQuery"] = []
+        self.started = time.perf_counter()
+
+    def table(self, name):
+        return TracingBuilder(self, name, self.client.table(name), [])
+
+    def by_request(self) -> Dict[str, List["TracedQuery"]]:
+        """
+        Executed queries grouped by request, as "METHOD /path" (repeated requests
+        get a "#2", "#3" suffix). Queries run outside a request are under "outside request".
+        """
+        groups: Dict[int, Tuple[str, List[TracedQuery]]] = {}
+        seen: Dict[str, int] = {}
+        for query in self.queries:
+            key = id(query.request)
+            if key not in groups:
+                label = query.request_label
+                seen[label] = seen.get(label, 0) + 1
+                if seen[label] > 1:
+                    label = f"{label} #{seen[label]}"
+                groups[key] = (label, [])
+            groups[key][1].append(query)
+        return dict(groups.values())
+
+    def plan(self) -> str:
+        """
+        Per-request dump of queries in the order they started, with start and end
+        offsets so queries that overlapped are visible.
+        """
+        lines = []
+        for label, queries in self.by_request().items():
+            lines.append(f"{label}: {len(queries)} queries")
+            for number, query in enumerate(sorted(queries, key=lambda q: q.start), 1):
+                lines.append(
+                    f"  {number}. {query.describe()}  "
+                    f"[+{query.start * 1000:.1f}ms, {query.duration * 1000:.1f}ms]"
+                )
+        return "\n".join(lines) or "no queries"
+
+    def assert_max_queries(self, budget: int) -> None:
+        # Each request (and work outside requests) must stay within the budget
+        over = {label: len(queries) for label, queries in self.by_request().items() if len(queries) > budget}
+        assert not over, f"Query budget of {budget} exceeded by {over}\n{self.plan()}"
+
+class TracedQuery:
+    def __init__(self, table: str, calls: List[Tuple[str, tuple, dict]], request: Optional[Any]):
+        self.table = table
+        self.calls = list(calls)
+        self.request = request
+        self.start = 0.0
+        self.duration = 0.0
+
+    @property
+    def request_label(self) -> str:
+        if self.request is None:
+            return "outside request"
+        return f"{self.request.method} {self.request.path}"
+
+    @property
+    def filters(self) -> List[Tuple[str, tuple, dict]]:
+        return [call for call in self.calls if call[0] in FILTERS]
+
+    def describe(self) -> str:
+        parts = [self.table]
+        for method, args, kwargs in self.calls:
+            arguments = [repr(arg) for arg in args] + [f"{key}={value!r}" for key, value in kwargs.items()]
+            parts.append(f"{method}({', '.join(arguments)})")
+        return ".".join(parts)
+
+class TracingBuilder:
+    def __init__(self, tracer, table, builder, calls):
+        self.tracer = tracer
+        self.table = table
+        self.builder = builder
+        self.calls = calls
+
+    def __getattr__(self, method):
+        def call(*args, **kwargs):
+            builder = getattr(self.builder, method)(*args, **kwargs)
+            return TracingBuilder(self.tracer, self.table, builder, self.calls + [(method, args, kwargs)])
+        return call
+
+    async def execute(self):
+        query = TracedQuery(self.table, self.calls, current_request.get())
+        self.tracer.queries.append(query)
+        started = time.perf_counter()
+        query.start = started - self.tracer.started
+        try:
+            return await self.builder.execute()
+        finally:
+            query.duration = time.perf_counter() - started
+
+def trace_supabase(tracer: SupabaseTracer) -> ExitStack:
+    """
+    Route every app module's shared `supabase` client through the tracer,
+    replacing any tracer already in place.
+    """
+    stack = ExitStack()
+    for name, module in list(sys.modules.items()):
+        if not name.startswith("app.") or name == "app.core.supabase":
+            continue
+        current = getattr(module, "supabase", None)
+        if current is supabase_pool or isinstance(current, SupabaseTracer):
+            stack.enter_context(patch.object(module, "supabase", tracer))
+    return stack
@@ -0,0 +1,52 @@
+import asyncio
+
+# Mock Supabase response
+class MockResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+# Mock Supabase client that serves fixed rows per table, counts executed queries
+# and records query builder calls.
+# With `latency`, each query takes that many seconds and the peak number of
+# queries in flight at once is recorded.
+class MockSupabase:
+    def __init__(self, tables, latency=0):
+        self.tables = tables
+        self.queries = 0
+        self.calls = []
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def table(self, name):
+        return MockQuery(self, name)
+
+class MockQuery:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        self.is_single = False
+
+    def __getattr__(self, method):
+        # Record builder calls (select, eq, upsert, ...) as (table, method, args, kwargs)
+        def call(*args, **kwargs):
+            self.client.calls.append((self.name, method, args, kwargs))
+            return self
+        return call
+
+    def single(self):
+        self.is_single = True
+        return self
+
+    async def execute(self):
+        self.client.queries += 1
+        if self.client.latency:
+            self.client.in_flight += 1
+            self.client.max_in_flight = max(self.client.max_in_flight, self.client.in_flight)
+            await asyncio.sleep(self.client.latency)
+            self.client.in_flight -= 1
+        rows = self.client.tables[self.name]
+        if self.is_single:
+            return MockResponse(rows[0] if rows else None)
+        return MockResponse(rows)
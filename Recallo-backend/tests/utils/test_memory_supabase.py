@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from postgrest.exceptions import APIError
+
+from app.core.config import settings
+from tests.utils.memory_supabase import MemorySupabase, seed, serve
+
+def test_seed_is_consistent() -> None:
+    tables = seed(users=2, friends_per_user=5, events_per_user=4, friends_per_event=2, topics_per_link=3)
+    assert len(tables["friends"]) == 10
+    assert len(tables["user_friends_events"]) == 2 * 4 * 2
+    assert len(tables["event_person_topics_content"]) == 2 * 4 * 2 * 3
+    friend_ids = {friend["id"] for friend in tables["friends"]}
+    assert all(link["friend_id"] in friend_ids for link in tables["user_friends_events"])
+    assert seed(users=1) == seed(users=1)
+
+def test_queries() -> None:
+    memory = MemorySupabase(seed(friends_per_user=5, events_per_user=5))
+    user_id = memory.tables["users"][0]["id"]
+
+    async def run():
+        counted = await memory.table("user_friends").select("id", count="exact").eq("user_id", user_id).limit(1).execute()
+        assert counted.count == 5 and counted.data == [{"id": 1}]
+
+        ordered = await memory.table("events").select("event_date").order("event_date", desc=True).range(1, 2).execute()
+        dates = sorted((event["event_date"] for event in memory.tables["events"]), reverse=True)
+        assert [row["event_date"] for row in ordered.data] == dates[1:3]
+
+        keyset = await memory.table("user_friends").select("id").or_('id.gt."3",and(id.eq."3",id.gt."0")').execute()
+        assert [row["id"] for row in keyset.data] == [3, 4, 5]
+
+        created = await memory.table("friends").insert({"friend_name": "Sam"}).execute()
+        friend_id = created.data[0]["id"]
+        await memory.table("friends").update({"friend_name": "Samantha"}).eq("id", friend_id).execute()
+        single = await memory.table("friends").select("friend_name").eq("id", friend_id).single().execute()
+        assert single.data == {"friend_name": "Samantha"}
+
+        await memory.table("friends").delete().eq("id", friend_id).execute()
+        with pytest.raises(APIError):
+            await memory.table("friends").select("*").eq("id", friend_id).single().execute()
+
+        link = {"user_id": user_id, "friend_id": friend_id}
+        first = await memory.table("user_friends").upsert(link, on_conflict="user_id,friend_id", ignore_duplicates=True).execute()
+        again = await memory.table("user_friends").upsert(link, on_conflict="user_id,friend_id", ignore_duplicates=True).execute()
+        assert first.data[0]["id"] == 6 and again.data == []
+
+    asyncio.run(run())
+
+def test_pages_cover_every_row_once(client: TestClient) -> None:
+    tables = seed(friends_per_user=25, events_per_user=25)
+    user_id = tables["users"][0]["id"]
+    # Shared dates exercise the tie-breaker
+    for event in tables["events"][::3]:
+        event["event_date"] = "2022-06-01"
+    tables["events"][1]["event_date"] = None
+
+    seen = []
+    url = f"{settings.API_V1_STR}/events/user/{user_id}?limit=7"
+    with serve(MemorySupabase(tables)):
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            seen.extend(event["id"] for event in response.json())
+            cursor = response.headers.get("x-next-cursor")
+            url = cursor and f"{settings.API_V1_STR}/events/user/{user_id}?limit=7&cursor={cursor}"
+    assert sorted(seen) == sorted(event["id"] for event in tables["events"])
+
+def test_embedded_resources() -> None:
+    memory = MemorySupabase(seed(friends_per_user=3, events_per_user=4, friends_per_event=2))
+    user_id = memory.tables["users"][0]["id"]
+    dates = {event["id"]: event["event_date"] for event in memory.tables["events"]}
+
+    async def run():
+        friends = await memory.table("friends").select("id, user_friends_events(events(event_date))").execute()
+        for friend in friends.data:
+            links = [link for link in memory.tables["user_friends_events"] if link["friend_id"] == friend["id"]]
+            assert sorted(link["events"]["event_date"] for link in friend["user_friends_events"]) == \
+                sorted(dates[link["event_id"]] for link in links)
+
+        # Only events with a link of this user's, each once, with just those links embedded
+        memory.tables["events"].append({"id": "unlinked", "event_name": "Unlinked", "event_date": None})
+        events = await memory.table("events")\
+            .select("id, user_friends_events!inner(friend_id)")\
+            .eq("user_friends_events.user_id", user_id)\
+            .execute()
+        assert sorted(event["id"] for event in events.data) == sorted(dates)
+        assert all(len(event["user_friends_events"]) == 2 for event in events.data)
+
+    asyncio.run(run())
@@ -23,13 +23,25 @@ export interface Content {
   content: string;
 }
 
-export const fetchFriendsbyUser = async (userId: string): Promise<Friend[]> => {
-  try {
-    const response = await fetch(`${API_URL}/friends/user/${userId}`);
+// List endpoints return one page at a time; follow the X-Next-Cursor header to the last page
+const fetchAllPages = async <T>(url: string): Promise<T[]> => {
+  const rows: T[] = [];
+  let cursor: string | null = null;
+  do {
+    const separator = url.includes('?') ? '&' : '?';
+    const response = await fetch(cursor ? `${url}${separator}cursor=${encodeURIComponent(cursor)}` : url);
     if (!response.ok) {
       throw new Error('Network response was not ok');
     }
-    return await response.json();
+    rows.push(...(await response.json()));
+    cursor = response.headers.get('X-Next-Cursor');
+  } while (cursor);
+  return rows;
+};
+
+export const fetchFriendsbyUser = async (userId: string): Promise<Friend[]> => {
+  try {
+    return await fetchAllPages<Friend>(`${API_URL}/friends/user/${userId}`);
   } catch (error) {
     console.error('Error fetching friends:', error);
     return [];
@@ -52,11 +64,7 @@ export const fetchFriendsByUserAndEvent = async (userId: string, eventId: string
 
 export const fetchEventsByUser = async (userId: string): Promise<Event[]> => {
   try {
-    const response = await fetch(`${API_URL}/events/user/${userId}`);
-    if (!response.ok) {
-      throw new Error('Network response was not ok');
-    }
-    return await response.json();
+    return await fetchAllPages<Event>(`${API_URL}/events/user/${userId}`);
   } catch (error) {
     console.error('Error fetching events:', error);
     return [];